@@ -0,0 +1,130 @@
+# ayanamsa.py
+"""
+Ayanamsa models, all vectorized over NumPy arrays of TT Julian dates.
+
+Every model gives the mean ayanamsa of date, to be subtracted from mean
+tropical longitudes of date (see tropical_of_date). Nutation is left out on
+both sides, where it would cancel anyway.
+
+- lahiri, raman, kp: fixed value at a reference epoch carried forward with the
+  IAU 2006 general precession in longitude (closed form, a few array ops).
+- true_chitrapaksha: keeps Spica (Chitra) at exactly 180 degrees sidereal.
+  Spica's position (with proper motion) is evaluated once on a 10-day table
+  over the ephemeris span and linearly interpolated afterwards; exact=True
+  (the reference precision tier) evaluates it at every instant instead.
+
+Models are looked up by name; register() adds new ones.
+"""
+
+import threading
+from typing import Callable, Dict, List, Union
+
+import numpy as np
+
+J2000 = 2451545.0
+DEFAULT_AYANAMSA = "lahiri"
+
+Number = Union[float, np.ndarray]
+
+def precession_deg(jd_tt: Number) -> Number:
+    """General precession in longitude since J2000 (IAU 2006), degrees."""
+    t = (np.asarray(jd_tt) - J2000) / 36525.0
+    return (5028.796195 * t + 1.1054348 * t**2 + 0.00007964 * t**3) / 3600.0
+
+def tropical_of_date(lon_j2000: Number, jd_tt: Number) -> Number:
+    """Ecliptic longitude on the J2000 ecliptic -> mean ecliptic and equinox of date."""
+    return (lon_j2000 + precession_deg(jd_tt)) % 360.0
+
+# -------------------------
+# Models
+# -------------------------
+def _precessing(epoch_jd: float, value_deg: float) -> Callable[[Number], Number]:
+    """Model with a fixed value at epoch_jd, moving with the precession."""
+    offset = value_deg - precession_deg(epoch_jd)
+    def model(jd_tt: Number) -> Number:
+        return offset + precession_deg(jd_tt)
+    return model
+
+# Lahiri (Indian Calendar Reform Committee): 23 deg 15' 00.658" at 1956-03-21 0h TT,
+# with the small correction Swiss Ephemeris applies for the modern precession
+lahiri = _precessing(2435553.5, 23.250182778 - 0.004658035)
+# B. V. Raman and K. S. Krishnamurti, both defined at 1900-01-00 12h
+raman = _precessing(2415020.0, 21.01444)
+kp = _precessing(2415020.0, 22.363889)
+
+# Spica, Hipparcos (HIP 65474), ICRS J2000
+_SPICA = dict(ra_hours=201.29824736 / 15.0, dec_degrees=-11.16131949,
+              ra_mas_per_year=-42.35, dec_mas_per_year=-30.67, parallax_mas=13.06)
+# de421 span (1899-07-29 .. 2053-10-09)
+_TABLE_START, _TABLE_END, _TABLE_STEP = 2414870.0, 2471170.0, 10.0
+
+_tables: Dict[str, tuple] = {}
+_tables_lock = threading.Lock()
+
+def _spica_ayanamsa(jd_tt: Number) -> Number:
+    from skyfield.api import Star
+    from panchang3 import EPH, TS
+    pos = EPH["earth"].at(TS.tt_jd(jd_tt)).observe(Star(**_SPICA))
+    lon = tropical_of_date(pos.ecliptic_latlon()[1].degrees, jd_tt)
+    return (lon - 180.0) % 360.0
+
+def _spica_table() -> tuple:
+    jd = np.arange(_TABLE_START, _TABLE_END + _TABLE_STEP, _TABLE_STEP)
+    return jd, _spica_ayanamsa(jd)
+
+def _table(name: str, builder: Callable[[], tuple]) -> tuple:
+    table = _tables.get(name)
+    if table is None:
+        with _tables_lock:
+            table = _tables.get(name)
+            if table is None:
+                table = _tables[name] = builder()
+    return table
+
+def true_chitrapaksha(jd_tt: Number) -> Number:
+    jd, values = _table("true_chitrapaksha", _spica_table)
+    return np.interp(jd_tt, jd, values)
+
+# -------------------------
+# Registry
+# -------------------------
+_MODELS: Dict[str, Callable[[Number], Number]] = {
+    "lahiri": lahiri,
+    "raman": raman,
+    "kp": kp,
+    "true_chitrapaksha": true_chitrapaksha,
+}
+
+# table-free versions of the table-driven models
+_EXACT: Dict[str, Callable[[Number], Number]] = {
+    "true_chitrapaksha": _spica_ayanamsa,
+}
+
+def register(name: str, model: Callable[[Number], Number]) -> None:
+    """Add a model: a function of TT Julian date(s) returning degrees."""
+    _MODELS[name] = model
+
+def models() -> List[str]:
+    return sorted(_MODELS)
+
+def validate(name: str) -> str:
+    """Canonical model name; raises ValueError for unknown models."""
+    key = (name or DEFAULT_AYANAMSA).strip().lower()
+    if key not in _MODELS:
+        raise ValueError(f"unknown ayanamsa: {name!r} (expected any of {', '.join(models())})")
+    return key
+
+def ayanamsa_deg(jd_tt: Number, model: str = DEFAULT_AYANAMSA, exact: bool = False) -> Number:
+    """Ayanamsa of date in degrees for scalar or array TT Julian dates (exact: skip tables)."""
+    key = validate(model)
+    if exact and key in _EXACT:
+        return _EXACT[key](jd_tt)
+    return _MODELS[key](jd_tt)
+
+# -------------------------
+# CLI test
+# -------------------------
+if __name__ == "__main__":
+    for year in (1900, 1956, 2000, 2025, 2050):
+        jd = J2000 + (year - 2000) * 365.25
+        print(year, "  ".join(f"{m}={ayanamsa_deg(jd, m):.5f}" for m in models()))
@@ -0,0 +1,223 @@
+# batcher.py
+"""
+Micro-batching of concurrent single-day /panchang computations.
+
+A /panchang cache miss does not call the engine directly. If the same
+result is already pending or being computed, it waits for that one;
+otherwise it joins the current batch. The first request of a batch (the leader) waits up to
+PANCHANG_BATCH_WINDOW_MS, or until PANCHANG_BATCH_MAX requests have joined,
+then computes the whole batch in its own thread and hands every waiting
+request its row; the next arrival starts a new batch.
+
+Within a batch, requests are grouped by (location, fields, ayanamsa,
+precision). Identical days are computed once, and the days of a group are
+evaluated together by the range engine: one sunrise search, one longitude
+evaluation over the Time array of all sunrises, one transition search for
+each run of nearby dates. The new/full moon search is geocentric, so it runs
+once per batch (and precision) over the span of all its dates and is shared
+by every location; sunrises and transitions are topocentric and stay one
+range call per location.
+
+Metrics (per process): batches, requests (and how many joined an identical
+pending one), batch sizes, time spent waiting for the batch to close, and
+efficiency, the requests served per engine call.
+"""
+
+import datetime as _dt
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from typing import Deque, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+import config
+from cities import Location
+
+# dates of one location further apart than this are computed by separate range calls
+# (an extra day costs a few ms of a range call, a separate call ~50 ms)
+MAX_GAP_DAYS = 14
+# batches spanning more days than this do not share a moon-phase search
+MAX_SHARED_PHASE_DAYS = 400
+# batches kept for the recent-size and wait-time statistics
+HISTORY = 1024
+
+class _Request(NamedTuple):
+    loc: Location
+    day: _dt.date
+    fields: Optional[str]
+    fields_key: str
+    ayanamsa: str
+    precision: str
+    enqueued: float
+    future: Future
+
+class MicroBatcher:
+    """Collects concurrent requests for a short window and computes them together."""
+
+    def __init__(self, window_ms: float = config.BATCH_WINDOW_MS, max_batch: int = config.BATCH_MAX):
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._cond = threading.Condition()
+        self._pending: List[_Request] = []
+        self._inflight: Dict[Hashable, Future] = {}
+        self._sizes: Deque[int] = deque(maxlen=HISTORY)
+        self._waits: Deque[float] = deque(maxlen=HISTORY)
+        self.batches = 0
+        self.requests = 0
+        self.coalesced = 0
+        self.engine_calls = 0
+        self.days_computed = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and self.max_batch > 1
+
+    def submit(self, loc: Location, day: _dt.date, fields: Optional[str], fields_key: str,
+               ayanamsa: str, precision: str) -> Dict:
+        """The panchang row of one day; blocks until its batch has been computed."""
+        key = (loc.key, day, fields_key, ayanamsa, precision)
+        req = _Request(loc, day, fields, fields_key, ayanamsa, precision, time.perf_counter(), Future())
+        with self._cond:
+            same = self._inflight.get(key)
+            if same is None:
+                self._inflight[key] = req.future
+                req.future.add_done_callback(lambda _: self._forget(key))
+            else:
+                self.coalesced += 1
+                self.requests += 1
+        if same is not None:
+            return same.result()
+        with self._cond:
+            self._pending.append(req)
+            leader = len(self._pending) == 1
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+        if leader:
+            deadline = req.enqueued + self.window
+            with self._cond:
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending = self._pending, []
+            self._run(batch)
+        return req.future.result()
+
+    def _forget(self, key: Hashable) -> None:
+        with self._cond:
+            self._inflight.pop(key, None)
+
+    # -------------------------
+    # Computation
+    # -------------------------
+    def _run(self, batch: List[_Request]) -> None:
+        started = time.perf_counter()
+        try:
+            self._compute_batch(batch, started)
+        finally:
+            # never leave a waiting request behind
+            for req in batch:
+                if not req.future.done():
+                    req.future.set_exception(RuntimeError("batch failed"))
+
+    def _compute_batch(self, batch: List[_Request], started: float) -> None:
+        groups: Dict[Hashable, List[_Request]] = defaultdict(list)
+        for req in batch:
+            groups[(req.loc.key, req.fields_key, req.ayanamsa, req.precision)].append(req)
+        try:
+            phases = _shared_phases(batch)
+        except Exception:
+            phases = {}  # each range call searches its own
+        calls = days = errors = 0
+        for reqs in groups.values():
+            by_day: Dict[_dt.date, List[_Request]] = defaultdict(list)
+            for req in reqs:
+                by_day[req.day].append(req)
+            for run in _runs(sorted(by_day)):
+                calls += 1
+                days += (run[-1] - run[0]).days + 1
+                try:
+                    rows = _compute(reqs[0], run[0], run[-1], phases.get(reqs[0].precision))
+                except Exception as e:
+                    errors += 1
+                    for day in run:
+                        for req in by_day[day]:
+                            req.future.set_exception(e)
+                    continue
+                for day in run:
+                    row = rows[(day - run[0]).days]
+                    for req in by_day[day]:
+                        req.future.set_result(row)
+        with self._cond:
+            self.batches += 1
+            self.requests += len(batch)
+            self.engine_calls += calls
+            self.days_computed += days
+            self.errors += errors
+            self._sizes.append(len(batch))
+            self._waits.extend(started - req.enqueued for req in batch)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            sizes = sorted(self._sizes)
+            waits = sorted(self._waits)
+            return {
+                "enabled": self.enabled,
+                "window_ms": round(self.window * 1000.0, 3),
+                "max_batch": self.max_batch,
+                "batches": self.batches,
+                "requests": self.requests,
+                "coalesced": self.coalesced,
+                "engine_calls": self.engine_calls,
+                "days_computed": self.days_computed,
+                "errors": self.errors,
+                "batch_size": {"mean": round(sum(sizes) / len(sizes), 2) if sizes else None,
+                               "p50": _pct(sizes, 0.5), "max": sizes[-1] if sizes else None},
+                "wait_ms": {"mean": round(sum(waits) / len(waits) * 1000.0, 3) if waits else None,
+                            "p95": round(_pct(waits, 0.95) * 1000.0, 3) if waits else None},
+                # requests served per range-engine call (1.0 = no batching gain)
+                "efficiency": round(self.requests / self.engine_calls, 3) if self.engine_calls else None,
+            }
+
+def _pct(values: List[float], q: float):
+    return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+def _runs(days: List[_dt.date]) -> List[List[_dt.date]]:
+    """Sorted dates split where consecutive ones are more than MAX_GAP_DAYS apart."""
+    runs: List[List[_dt.date]] = []
+    for day in days:
+        if runs and (day - runs[-1][-1]).days <= MAX_GAP_DAYS:
+            runs[-1].append(day)
+        else:
+            runs.append([day])
+    return runs
+
+def _shared_phases(batch: List[_Request]) -> Dict[str, Dict[int, np.ndarray]]:
+    """One moon-phase series per precision, covering every date of the batch that needs it."""
+    from panchang3 import resolve_fields
+    from panchang_range import moon_phase_series_for_dates
+    spans: Dict[str, Tuple[_dt.date, _dt.date]] = {}
+    for req in batch:
+        if "lunar_month" in resolve_fields(req.fields):
+            lo, hi = spans.get(req.precision, (req.day, req.day))
+            spans[req.precision] = (min(lo, req.day), max(hi, req.day))
+    out = {}
+    for precision, (lo, hi) in spans.items():
+        if (hi - lo).days <= MAX_SHARED_PHASE_DAYS:
+            out[precision] = moon_phase_series_for_dates(lo, hi, precision)
+    return out
+
+def _compute(req: _Request, first: _dt.date, last: _dt.date, phases=None) -> List[Dict]:
+    from panchang_range import get_panchang_range
+    loc = req.loc
+    rows = get_panchang_range(first, last, loc.lat, loc.lon, fields=req.fields, ayanamsa=req.ayanamsa,
+                              tz=loc.tz, precision=req.precision, phases=phases)
+    for row in rows:
+        row["location"] = loc.info()
+    return rows
+
+BATCHER = MicroBatcher()
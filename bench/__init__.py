@@ -0,0 +1 @@
+"""Benchmarks and load tools; run from the repo root, e.g. ``python -m bench.loadtest``."""
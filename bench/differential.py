@@ -0,0 +1,334 @@
+# bench/differential.py
+"""
+Differential accuracy and speed check of every panchang engine against a
+golden dataset.
+
+A fixed corpus (locations x windows of consecutive local dates spread over
+1900-2050) is evaluated by each engine:
+
+    panchang    panchang.get_panchang       (legacy; tropical, UTC day)
+    panchang2   panchang2.get_panchang      (legacy; tropical, UTC day)
+    panchang3   panchang3.get_panchang      (reference, fields="core")
+    range       panchang_range.get_panchang_range, one call per window
+    grid        the same with sunrise interpolated from a 0.1 deg grid (sungrid.py)
+    index       tithi/nakshatra from the event index at the range engine's sunrises
+
+Each result is reduced to limb codes (tithi 1-30, nakshatra/yoga 0-26,
+karana 0-10, vara 0-6, sunrise in unix seconds) and compared with the golden
+file. The report gives per engine and limb the number of disagreements with
+examples, the sunrise error in seconds and the time per computed day. Engines
+listed in --strict must match the golden data exactly (sunrise within
+--sunrise-tol) or the exit status is 1, so a speedup is verified in one run:
+
+    python -m bench.differential
+    python -m bench.differential --engines panchang3,range --strict panchang3,range
+    python -m bench.differential --write-golden    # after an intended change
+
+The golden file (bench/golden.npz) holds the corpus definition and the
+reference codes as small integer arrays.
+"""
+
+import argparse
+import datetime as _dt
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden.npz")
+GOLDEN_VERSION = 1
+REFERENCE = "panchang3"
+GRID_DEG = 0.1
+
+DEFAULT_CITIES = ("delhi", "chennai", "singapore", "tokyo", "sydney",
+                  "cape-town", "london", "new-york", "anchorage", "sao-paulo")
+DEFAULT_WINDOWS = 24
+DEFAULT_DAYS = 7
+
+LIMBS = ("tithi", "nakshatra", "yoga", "karana", "vara")
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+MISSING = -1
+
+# -------------------------
+# Corpus
+# -------------------------
+class Case(NamedTuple):
+    city: str
+    lat: float
+    lon: float
+    tz: str
+    start: _dt.date
+    days: int
+
+def window_starts(n: int, first: _dt.date = _dt.date(1901, 1, 3),
+                  last: _dt.date = _dt.date(2049, 11, 20)) -> List[_dt.date]:
+    """n window starts spread over [first, last]; the odd stride varies month and weekday."""
+    span = (last - first).days
+    stride = span // max(1, n - 1) if n > 1 else 0
+    stride -= 1 - stride % 2
+    return [first + _dt.timedelta(days=i * stride) for i in range(n)]
+
+def corpus(cities: Sequence[str] = DEFAULT_CITIES, windows: int = DEFAULT_WINDOWS,
+           days: int = DEFAULT_DAYS) -> List[Case]:
+    from cities import get_city
+    out = []
+    for slug in cities:
+        c = get_city(slug)
+        for start in window_starts(windows):
+            out.append(Case(c.slug, c.lat, c.lon, c.tz, start, days))
+    return out
+
+# -------------------------
+# Limb codes
+# -------------------------
+def _codes() -> Dict[str, Dict[str, int]]:
+    from panchang3 import KARANA_CORE, KARANA_LAST4, NAKSHATRA, YOGA, tithi_label
+    return {
+        "tithi": {tithi_label(i): i for i in range(1, 31)},
+        "nakshatra": {name: i for i, name in enumerate(NAKSHATRA)},
+        "yoga": {name: i for i, name in enumerate(YOGA)},
+        "karana": {name: i for i, name in enumerate(KARANA_CORE + KARANA_LAST4)},
+        "vara": {name: i for i, name in enumerate(WEEKDAYS)},
+    }
+
+CODES = _codes()
+
+def _code(limb: str, name: str) -> int:
+    # the legacy engines spell Vishti "Vishti (Bhadra)"
+    return CODES[limb].get(name.split(" (Bhadra)")[0], MISSING)
+
+def _unix(iso: str, fmt: str = "%Y-%m-%dT%H:%M:%SZ") -> int:
+    return int(_dt.datetime.strptime(iso, fmt).replace(tzinfo=_dt.timezone.utc).timestamp())
+
+def _row(tithi=MISSING, nakshatra=MISSING, yoga=MISSING, karana=MISSING,
+         vara=MISSING, sunrise=MISSING) -> List[int]:
+    return [tithi, nakshatra, yoga, karana, vara, sunrise]
+
+def _from_panchang3(r: Dict) -> List[int]:
+    return _row(r["tithi_index"], _code("nakshatra", r["nakshatra"]), _code("yoga", r["yoga"]),
+                _code("karana", r["karana"]), _code("vara", r["var"]), _unix(r["sunrise"]))
+
+# -------------------------
+# Engines
+# -------------------------
+def _dates(case: Case) -> List[_dt.date]:
+    return [case.start + _dt.timedelta(days=i) for i in range(case.days)]
+
+def _engine_panchang(case: Case, timings: List[float]) -> List[List[int]]:
+    import panchang
+    rows = []
+    for d in _dates(case):
+        t0 = time.perf_counter()
+        r = panchang.get_panchang(d, case.lat, case.lon)
+        timings.append(time.perf_counter() - t0)
+        rows.append(_row(_code("tithi", r["tithi"]), _code("nakshatra", r["nakshatra"]),
+                         _code("yoga", r["yoga"]), _code("karana", r["karana"]), _code("vara", r["var"])))
+    return rows
+
+def _engine_panchang2(case: Case, timings: List[float]) -> List[List[int]]:
+    import panchang2
+    rows = []
+    for d in _dates(case):
+        t0 = time.perf_counter()
+        r = panchang2.get_panchang(d, case.lat, case.lon)
+        timings.append(time.perf_counter() - t0)
+        rows.append(_row(r["tithi"]["number"], r["nakshatra"]["number"] - 1, r["yoga"]["number"] - 1,
+                         _code("karana", r["karana"]["name"]), _code("vara", r["vara"]),
+                         _unix(r["sunrise"], "%Y-%m-%d %H:%M:%S UTC")))
+    return rows
+
+def _engine_panchang3(case: Case, timings: List[float]) -> List[List[int]]:
+    import panchang3
+    rows = []
+    for d in _dates(case):
+        t0 = time.perf_counter()
+        r = panchang3.get_panchang(d, case.lat, case.lon, fields="core", tz=case.tz)
+        timings.append(time.perf_counter() - t0)
+        rows.append(_from_panchang3(r))
+    return rows
+
+def _engine_range(case: Case, timings: List[float], sunrise_grid: float = 0.0) -> List[List[int]]:
+    from panchang_range import get_panchang_range
+    t0 = time.perf_counter()
+    out = get_panchang_range(case.start, _dates(case)[-1], case.lat, case.lon, fields="core", tz=case.tz,
+                             sunrise_grid=sunrise_grid)
+    timings.extend([(time.perf_counter() - t0) / case.days] * case.days)
+    return [_from_panchang3(r) for r in out]
+
+def _engine_grid(case: Case, timings: List[float]) -> List[List[int]]:
+    import sungrid
+    # a cold cell uses the exact search; warm it so the interpolation is what gets checked
+    sungrid.warm(case.start - _dt.timedelta(days=1), case.days + 2, case.lat, case.lon, case.tz, GRID_DEG)
+    return _engine_range(case, timings, GRID_DEG)
+
+def _engine_index(case: Case, timings: List[float]) -> List[List[int]]:
+    import events
+    from panchang3 import TS
+    from panchang_range import sunrise_sunset_series
+    index = events.get_index()
+    t0 = time.perf_counter()
+    sunrise, _ = sunrise_sunset_series(case.start, case.days, case.lat, case.lon, case.tz)
+    limbs = {}
+    for limb in ("tithi", "nakshatra"):
+        jd, idx = index.series[limb]
+        limbs[limb] = idx[np.searchsorted(jd, sunrise, side="right") - 1]
+    timings.extend([(time.perf_counter() - t0) / case.days] * case.days)
+    utc = TS.tt_jd(sunrise).utc_datetime()
+    return [_row(tithi=int(limbs["tithi"][i]) + 1, nakshatra=int(limbs["nakshatra"][i]),
+                 vara=d.weekday(), sunrise=int(round(utc[i].timestamp())))
+            for i, d in enumerate(_dates(case))]
+
+ENGINES: Dict[str, Callable[[Case, List[float]], List[List[int]]]] = {
+    "panchang": _engine_panchang,
+    "panchang2": _engine_panchang2,
+    "panchang3": _engine_panchang3,
+    "range": _engine_range,
+    "grid": _engine_grid,
+    "index": _engine_index,
+}
+
+def evaluate(engine: str, cases: Sequence[Case]) -> Dict:
+    """Codes (n_days x 6 int64) and per-day seconds of one engine over the corpus."""
+    fn = ENGINES[engine]
+    timings: List[float] = []
+    rows: List[List[int]] = []
+    for case in cases:
+        rows.extend(fn(case, timings))
+    return {"codes": np.asarray(rows, dtype=np.int64), "seconds": np.asarray(timings)}
+
+# -------------------------
+# Golden data
+# -------------------------
+def write_golden(cases: Sequence[Case], codes: np.ndarray, path: str = GOLDEN_PATH) -> None:
+    # corpus order: cities outer, windows inner
+    cities = list(dict.fromkeys(c.city for c in cases))
+    np.savez_compressed(
+        path,
+        version=np.int16(GOLDEN_VERSION),
+        cities=np.asarray(cities),
+        starts=np.asarray(list(dict.fromkeys(c.start.toordinal() for c in cases)), dtype=np.int32),
+        days=np.int16(cases[0].days),
+        limbs=codes[:, :5].astype(np.int8),
+        sunrise=codes[:, 5],
+    )
+
+def read_golden(path: str = GOLDEN_PATH):
+    """(cases, codes) stored in the golden file."""
+    from cities import get_city
+    with np.load(path) as z:
+        if int(z["version"]) != GOLDEN_VERSION:
+            raise ValueError(f"{path} has version {int(z['version'])}, expected {GOLDEN_VERSION}")
+        starts = [_dt.date.fromordinal(int(o)) for o in z["starts"]]
+        days = int(z["days"])
+        codes = np.column_stack([z["limbs"].astype(np.int64), z["sunrise"]])
+        cities = [str(s) for s in z["cities"]]
+    cases = []
+    for slug in cities:
+        c = get_city(slug)
+        cases.extend(Case(c.slug, c.lat, c.lon, c.tz, s, days) for s in starts)
+    return cases, codes
+
+# -------------------------
+# Comparison
+# -------------------------
+def compare(cases: Sequence[Case], got: np.ndarray, want: np.ndarray,
+            sunrise_tol: float = 1.0, max_examples: int = 5) -> Dict:
+    """Per-limb disagreements of `got` with `want`; limbs an engine lacks are skipped."""
+    labels = [(c.city, (c.start + _dt.timedelta(days=i)).isoformat()) for c in cases for i in range(c.days)]
+    report = {}
+    for j, limb in enumerate(LIMBS + ("sunrise",)):
+        present = got[:, j] != MISSING
+        if not present.any():
+            report[limb] = None
+            continue
+        if limb == "sunrise":
+            err = np.abs(got[:, j] - want[:, j]).astype(float)
+            bad = present & (err > sunrise_tol)
+        else:
+            bad = present & (got[:, j] != want[:, j])
+        entry = {"disagree": int(bad.sum()), "rate": round(float(bad.sum()) / int(present.sum()), 4)}
+        if limb == "sunrise":
+            entry["max_error_s"] = float(err[present].max())
+            entry["mean_error_s"] = round(float(err[present].mean()), 2)
+        entry["examples"] = [
+            {"city": labels[k][0], "date": labels[k][1], "got": int(got[k, j]), "want": int(want[k, j])}
+            for k in np.nonzero(bad)[0][:max_examples]
+        ]
+        report[limb] = entry
+    return report
+
+def timing(seconds: np.ndarray) -> Dict:
+    ms = seconds * 1000.0
+    return {
+        "days": int(len(ms)),
+        "total_s": round(float(seconds.sum()), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+    }
+
+def run(engines: Sequence[str], strict: Sequence[str] = (), golden: str = GOLDEN_PATH,
+        sunrise_tol: float = 1.0) -> Dict:
+    cases, want = read_golden(golden)
+    report = {"golden": golden, "days": int(len(want)), "engines": {}, "failed": []}
+    for engine in engines:
+        result = evaluate(engine, cases)
+        limbs = compare(cases, result["codes"], want, sunrise_tol)
+        report["engines"][engine] = {"timing": timing(result["seconds"]), "limbs": limbs}
+        if engine in strict and any(v and v["disagree"] for v in limbs.values()):
+            report["failed"].append(engine)
+    ref = report["engines"].get(REFERENCE)
+    if ref:
+        for name, entry in report["engines"].items():
+            entry["timing"]["speedup_vs_reference"] = round(
+                ref["timing"]["mean_ms"] / max(entry["timing"]["mean_ms"], 1e-9), 2)
+    return report
+
+# -------------------------
+# CLI
+# -------------------------
+def _names(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--engines", default=",".join(ENGINES), help="comma separated: " + ", ".join(ENGINES))
+    ap.add_argument("--strict", default="panchang3,range", help="engines that must match the golden data")
+    ap.add_argument("--golden", default=GOLDEN_PATH)
+    ap.add_argument("--sunrise-tol", type=float, default=1.0, help="allowed sunrise difference (seconds)")
+    ap.add_argument("--write-golden", action="store_true", help=f"recompute the golden file with {REFERENCE}")
+    ap.add_argument("--cities", default=",".join(DEFAULT_CITIES), help="corpus cities (with --write-golden)")
+    ap.add_argument("--windows", type=int, default=DEFAULT_WINDOWS, help="date windows (with --write-golden)")
+    ap.add_argument("--days", type=int, default=DEFAULT_DAYS, help="days per window (with --write-golden)")
+    ap.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = ap.parse_args(argv)
+
+    engines, strict = _names(args.engines), _names(args.strict)
+    unknown = [e for e in engines + strict if e not in ENGINES]
+    if unknown:
+        ap.error(f"unknown engines: {', '.join(unknown)}")
+
+    if args.write_golden:
+        cases = corpus(_names(args.cities), args.windows, args.days)
+        result = evaluate(REFERENCE, cases)
+        write_golden(cases, result["codes"], args.golden)
+        print(f"wrote {len(result['codes'])} days to {args.golden} "
+              f"({os.path.getsize(args.golden)} bytes)", file=sys.stderr)
+        return 0
+
+    if not os.path.exists(args.golden):
+        ap.error(f"{args.golden} not found; create it with --write-golden")
+    report = run(engines, strict, args.golden, args.sunrise_tol)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    return 1 if report["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
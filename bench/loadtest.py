@@ -0,0 +1,335 @@
+# bench/loadtest.py
+"""
+Replay a request log (or a synthetic traffic mix) against the API and report
+throughput, p50/p95/p99 latency and error rate per route as JSON.
+
+A local `uvicorn main:app` is started unless --url points at a running server,
+so worker counts and engine settings (passed with --env) can be compared:
+
+    python -m bench.loadtest --synthetic 500 --concurrency 16
+    python -m bench.loadtest --log traffic.jsonl --rate 50 --workers 4
+    python -m bench.loadtest --synthetic 500 --workers 4 --prefork
+    python -m bench.loadtest --synthetic 200 --write-log traffic.jsonl
+
+Log format: one JSON object per line with a "path" (query string allowed)
+and optionally "params" (dict merged into the query). Lines without a
+path are counted as skipped.
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import datetime as _dt
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# (name, lat, lon) used by the synthetic mix
+SYNTHETIC_LOCATIONS = [
+    ("Delhi", 28.61, 77.23),
+    ("Mumbai", 19.08, 72.88),
+    ("Chennai", 13.08, 80.27),
+    ("Kolkata", 22.57, 88.36),
+    ("London", 51.51, -0.13),
+    ("New York", 40.71, -74.01),
+]
+
+# route -> relative weight (the /debug routes are left out: they fail on every call)
+DEFAULT_MIX = {"/panchang": 90, "/month": 10}
+
+# -------------------------
+# Request sources
+# -------------------------
+def read_log(path: str) -> Tuple[List[str], int]:
+    """Return (request paths with query, number of skipped lines)."""
+    out, skipped = [], 0
+    with open(path) as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if not isinstance(rec, dict) or not isinstance(rec.get("path"), str):
+                skipped += 1
+                continue
+            p = rec["path"]
+            params = rec.get("params")
+            if isinstance(params, dict) and params:
+                p += ("&" if "?" in p else "?") + urllib.parse.urlencode(params)
+            out.append(p)
+    return out, skipped
+
+def parse_mix(spec: Optional[str]) -> Dict[str, float]:
+    """'panchang=80,month=5' -> {'/panchang': 80.0, '/month': 5.0}"""
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        route = name.strip()
+        if not route.startswith("/"):
+            route = "/" + route.replace(".", "/")
+        mix[route] = float(weight or 1)
+    return mix
+
+def synthetic_requests(n: int, mix: Dict[str, float], seed: int = 0,
+                       years: Tuple[int, int] = (2020, 2030)) -> List[str]:
+    """n request paths drawn from the weighted route mix."""
+    rng = random.Random(seed)
+    routes = list(mix)
+    weights = [mix[r] for r in routes]
+    start = _dt.date(years[0], 1, 1).toordinal()
+    end = _dt.date(years[1], 12, 31).toordinal()
+    out = []
+    for _ in range(n):
+        route = rng.choices(routes, weights)[0]
+        _, lat, lon = rng.choice(SYNTHETIC_LOCATIONS)
+        day = _dt.date.fromordinal(rng.randint(start, end))
+        if route == "/month":
+            params = {"year": day.year, "month": day.month}
+        else:
+            params = {"date": day.isoformat()}
+        params.update(lat=lat, lon=lon)
+        out.append(route + "?" + urllib.parse.urlencode(params))
+    return out
+
+# -------------------------
+# Local server
+# -------------------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(workers: int = 1, env: Optional[Dict[str, str]] = None,
+                 timeout: float = 60.0, prefork: bool = False) -> Tuple[subprocess.Popen, str]:
+    """
+    Start `uvicorn main:app` (or the pre-fork server.py) on a free port and
+    wait until it answers.
+    """
+    port = _free_port()
+    if prefork:
+        cmd = [sys.executable, "server.py", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+               "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, env={**os.environ, **(env or {})})
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            urllib.request.urlopen(url + "/openapi.json", timeout=2).read()
+            return proc, url
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("server did not start in time")
+
+def stop_server(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+# -------------------------
+# Replay
+# -------------------------
+def _route(path: str) -> str:
+    return urllib.parse.urlsplit(path).path
+
+def _one(url: str, path: str, timeout: float) -> Tuple[bool, Optional[int]]:
+    """
+    Issue one GET; returns (ok, status). Non-2xx statuses fail, and so does a
+    JSON object body with an "error" key (older endpoints answer errors with 200).
+    """
+    try:
+        with urllib.request.urlopen(url + path, timeout=timeout) as resp:
+            body = resp.read()
+            status = resp.status
+            content_type = resp.headers.get("Content-Type", "")
+    except urllib.error.HTTPError as e:
+        return False, e.code
+    except (urllib.error.URLError, OSError):
+        return False, None
+    if "json" in content_type:
+        try:
+            value = json.loads(body)
+        except ValueError:
+            return False, status
+        if isinstance(value, dict) and "error" in value:
+            return False, status
+    return True, status
+
+def replay(url: str, paths: List[str], concurrency: int = 8, rate: float = 0.0,
+           timeout: float = 60.0) -> List[Tuple[str, float, bool, Optional[int]]]:
+    """
+    Send every path once using `concurrency` threads.
+    rate > 0 schedules request i at i / rate seconds (open loop); 0 means as fast as possible.
+    With a rate, latency is measured from the scheduled send time, so time a
+    request spent waiting for a free thread behind slow ones is counted
+    (no coordinated omission).
+    Returns (route, latency_seconds, ok, status) per request.
+    """
+    results = []
+    lock = threading.Lock()
+    counter = iter(range(len(paths)))
+    t_start = time.perf_counter()
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            if rate > 0:
+                t0 = t_start + i / rate
+                delay = t0 - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                t0 = time.perf_counter()
+            ok, status = _one(url, paths[i], timeout)
+            elapsed = time.perf_counter() - t0
+            with lock:
+                results.append((_route(paths[i]), elapsed, ok, status))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, concurrency))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+def _percentile(sorted_vals: List[float], q: float) -> Optional[float]:
+    if not sorted_vals:
+        return None
+    k = (len(sorted_vals) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return round(sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo), 3)
+
+def summarize(results: Iterable[Tuple[str, float, bool, Optional[int]]], wall_seconds: float) -> Dict:
+    """Per-route and total throughput, latency percentiles (ms) and error rate."""
+    by_route: Dict[str, List[Tuple[float, bool, Optional[int]]]] = {}
+    for route, elapsed, ok, status in results:
+        by_route.setdefault(route, []).append((elapsed, ok, status))
+
+    def stats(rows):
+        lat = sorted(r[0] * 1000.0 for r in rows)
+        errors = sum(1 for r in rows if not r[1])
+        statuses: Dict[str, int] = {}
+        for r in rows:
+            key = str(r[2]) if r[2] is not None else "conn_error"
+            statuses[key] = statuses.get(key, 0) + 1
+        return {
+            "requests": len(rows),
+            "throughput_rps": round(len(rows) / wall_seconds, 3) if wall_seconds > 0 else None,
+            "p50_ms": _percentile(lat, 50),
+            "p95_ms": _percentile(lat, 95),
+            "p99_ms": _percentile(lat, 99),
+            "max_ms": round(lat[-1], 3) if lat else None,
+            "error_rate": round(errors / len(rows), 4) if rows else 0.0,
+            "status": statuses,
+        }
+
+    all_rows = [row for rows in by_route.values() for row in rows]
+    return {
+        "wall_seconds": round(wall_seconds, 3),
+        "total": stats(all_rows),
+        "routes": {route: stats(rows) for route, rows in sorted(by_route.items())},
+    }
+
+def run(paths: List[str], url: Optional[str] = None, workers: int = 1,
+        env: Optional[Dict[str, str]] = None, concurrency: int = 8, rate: float = 0.0,
+        warmup: int = 0, timeout: float = 60.0, prefork: bool = False) -> Dict:
+    """Start a server if needed, replay paths and return the summary dict."""
+    proc = None
+    if url is None:
+        proc, url = start_server(workers=workers, env=env, prefork=prefork)
+    try:
+        if warmup:
+            replay(url, paths[:warmup], concurrency=concurrency, timeout=timeout)
+        t0 = time.perf_counter()
+        results = replay(url, paths, concurrency=concurrency, rate=rate, timeout=timeout)
+        report = summarize(results, time.perf_counter() - t0)
+    finally:
+        if proc is not None:
+            stop_server(proc)
+    return report
+
+# -------------------------
+# CLI
+# -------------------------
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--log", help="JSONL request log to replay")
+    src.add_argument("--synthetic", type=int, metavar="N", help="generate N synthetic requests")
+    ap.add_argument("--mix", help="synthetic route weights, e.g. panchang=90,month=10")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--write-log", metavar="PATH", help="write the request list as JSONL and exit")
+    ap.add_argument("--url", help="target an already running server instead of starting one")
+    ap.add_argument("--workers", type=int, default=1, help="uvicorn workers for the local server")
+    ap.add_argument("--prefork", action="store_true", help="run the local server with server.py")
+    ap.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                    help="extra environment for the local server (repeatable)")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--rate", type=float, default=0.0, help="requests/second, 0 = closed loop")
+    ap.add_argument("--warmup", type=int, default=0, help="replay the first N requests before measuring")
+    ap.add_argument("--timeout", type=float, default=60.0)
+    ap.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = ap.parse_args(argv)
+
+    skipped = 0
+    if args.log:
+        paths, skipped = read_log(args.log)
+    else:
+        paths = synthetic_requests(args.synthetic, parse_mix(args.mix), seed=args.seed)
+
+    if args.write_log:
+        with open(args.write_log, "w") as fh:
+            for p in paths:
+                fh.write(json.dumps({"path": p}) + "\n")
+        return 0
+    if not paths:
+        ap.error("no replayable requests (log lines need a 'path')")
+
+    env = dict(kv.split("=", 1) for kv in args.env)
+    report = run(paths, url=args.url, workers=args.workers, env=env,
+                 concurrency=args.concurrency, rate=args.rate,
+                 warmup=args.warmup, timeout=args.timeout, prefork=args.prefork)
+    report["config"] = {
+        "source": args.log or f"synthetic:{args.synthetic}",
+        "skipped_lines": skipped,
+        "url": args.url,
+        "workers": args.workers,
+        "prefork": args.prefork,
+        "env": env,
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+# bench/memory.py
+"""
+Resident memory per worker, for plain `uvicorn --workers` and the pre-fork
+server (server.py).
+
+For each server mode the server is started with 1 and with N workers, warmed
+up with a synthetic traffic mix, and the proportional set size (PSS: shared
+pages split between the processes sharing them) of the server and all its
+worker processes is summed from /proc/<pid>/smaps_rollup (Linux only).
+The report gives the per-process breakdown and the marginal memory of each
+additional worker: (PSS with N workers - PSS with 1 worker) / (N - 1).
+
+    python -m bench.memory --workers 4
+    python -m bench.memory --workers 8 --requests 400 --out memory.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+from bench.loadtest import DEFAULT_MIX, replay, start_server, stop_server, synthetic_requests
+
+MODES = ("uvicorn", "prefork")
+
+# -------------------------
+# /proc sampling
+# -------------------------
+def _children(pid: int) -> List[int]:
+    out = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as fh:
+                stat = fh.read()
+        except OSError:
+            continue
+        # the command name may contain spaces; ppid is the second field after it
+        if int(stat.rsplit(")", 1)[1].split()[1]) == pid:
+            out.append(int(entry))
+    return out
+
+def process_tree(pid: int) -> List[int]:
+    tree, todo = [], [pid]
+    while todo:
+        p = todo.pop()
+        tree.append(p)
+        todo.extend(_children(p))
+    return tree
+
+def memory_kb(pid: int) -> Dict[str, int]:
+    """Rss, Pss, shared and private kB of one process."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as fh:
+        for line in fh:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+# -------------------------
+# Measurement
+# -------------------------
+def measure(mode: str, workers: int, paths: List[str], settle: float = 3.0,
+            concurrency: int = 8) -> Dict:
+    proc, url = start_server(workers=workers, prefork=mode == "prefork",
+                             env={"PANCHANG_JOB_WORKERS": "1"}, timeout=180.0)
+    try:
+        replay(url, paths, concurrency=concurrency)
+        # let background warm-up (event index, eclipse tables) finish everywhere
+        time.sleep(settle)
+        replay(url, paths, concurrency=concurrency)
+        procs = []
+        for pid in process_tree(proc.pid):
+            try:
+                procs.append({"pid": pid, **memory_kb(pid)})
+            except OSError:
+                pass
+    finally:
+        stop_server(proc)
+    return {
+        "mode": mode,
+        "workers": workers,
+        "processes": procs,
+        "total_pss_mb": round(sum(p["pss"] for p in procs) / 1024.0, 1),
+        "total_rss_mb": round(sum(p["rss"] for p in procs) / 1024.0, 1),
+    }
+
+def run(workers: int = 4, requests: int = 200, modes=MODES, seed: int = 0) -> Dict:
+    paths = synthetic_requests(requests, DEFAULT_MIX, seed=seed)
+    report = {"workers": workers, "requests": requests, "modes": {}}
+    for mode in modes:
+        one = measure(mode, 1, paths)
+        many = measure(mode, workers, paths)
+        per_worker = (many["total_pss_mb"] - one["total_pss_mb"]) / max(1, workers - 1)
+        report["modes"][mode] = {
+            "one_worker": one,
+            "n_workers": many,
+            "pss_mb_per_additional_worker": round(per_worker, 1),
+        }
+    return report
+
+# -------------------------
+# CLI
+# -------------------------
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--requests", type=int, default=200, help="synthetic requests per warm-up pass")
+    ap.add_argument("--modes", default=",".join(MODES), help="comma separated: uvicorn, prefork")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = ap.parse_args(argv)
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        ap.error("needs Linux /proc/<pid>/smaps_rollup")
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        ap.error(f"unknown modes: {', '.join(unknown)}")
+
+    report = run(args.workers, args.requests, modes, args.seed)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+# bench/precision.py
+"""
+Latency and error of every precision tier (precision.py) against its budget.
+
+Over the golden corpus of bench.differential (cities x week-long windows,
+1901-2049) each tier is compared with the reference tier:
+
+- sunrise: largest difference of the range engine's sunrises, seconds
+- longitudes: largest difference of the sidereal sun and moon, arcseconds,
+  evaluated at the same instants (the reference sunrises)
+- moon phases: largest difference of the new and full moon times, seconds
+- latency: median time of one warm /panchang day (default fields), ms
+- cold latency: median time of the first request for a new date at a nearby
+  new coordinate (no pooled context, no cached grid cell), ms
+
+A tier over any of its budgets fails the run (exit status 1). Latency
+budgets are for a single core of a current server; --latency-scale
+stretches them on slower machines.
+
+    python -m bench.precision
+    python -m bench.precision --tiers fast --latency-scale 2
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from bench.differential import GOLDEN_PATH, read_golden
+
+def _errors(cases, tier: str) -> Dict[str, float]:
+    from skyfield.api import wgs84
+    from panchang3 import TS, sun_moon_longitudes
+    from panchang_range import PHASE_LOOKBACK_DAYS, moon_phase_series, sunrise_values
+    from precision import tier as precision_tier
+    sunrise = longitude = phase = 0.0
+    for c in cases:
+        observer = wgs84.latlon(latitude_degrees=c.lat, longitude_degrees=c.lon)
+        tiers = {}
+        for name in (tier, "reference"):
+            t = precision_tier(name)
+            if t.sunrise_grid > 0:
+                import sungrid
+                # cold cells use the exact search; warm them so the grid is what gets measured
+                sungrid.warm(c.start, c.days, c.lat, c.lon, c.tz, t.sunrise_grid)
+            rise, _, _, _ = sunrise_values(c.start, c.days, c.lat, c.lon, c.tz, observer,
+                                           grid=t.sunrise_grid, precision=name)
+            tiers[name] = rise
+        sunrise = max(sunrise, float(np.abs(tiers[tier] - tiers["reference"]).max()) * 86400.0)
+
+        at = TS.tt_jd(tiers["reference"])
+        got = sun_moon_longitudes(at, observer, precision=tier)
+        want = sun_moon_longitudes(at, observer, precision="reference")
+        for k in ("sid_sun", "sid_moon"):
+            diff = (got[k] - want[k] + 180.0) % 360.0 - 180.0
+            longitude = max(longitude, float(np.abs(diff).max()) * 3600.0)
+
+        t0, t1 = tiers["reference"][0] - PHASE_LOOKBACK_DAYS, tiers["reference"][-1]
+        got_ph, want_ph = moon_phase_series(t0, t1, tier), moon_phase_series(t0, t1, "reference")
+        for ph in (0, 2):
+            if len(got_ph[ph]) != len(want_ph[ph]):
+                phase = float("inf")
+            elif len(got_ph[ph]):
+                phase = max(phase, float(np.abs(got_ph[ph] - want_ph[ph]).max()) * 86400.0)
+    return {"sunrise_error_s": round(sunrise, 3), "longitude_error_arcsec": round(longitude, 3),
+            "phase_error_s": round(phase, 3)}
+
+# the cold request of a case: this much later, this far away (degrees), so
+# neither its location context nor its grid cell is cached yet
+COLD_OFFSET_DAYS = 1000
+COLD_OFFSET_DEG = (0.0537, 0.0611)
+
+def _latency_ms(cases, tier: str, repeat: int = 3) -> Dict[str, float]:
+    import datetime as _dt
+    import sungrid
+    from panchang_range import get_panchang_range
+    warm, cold = [], []
+    for c in cases:
+        day = c.start + _dt.timedelta(days=COLD_OFFSET_DAYS)
+        lat, lon = c.lat + COLD_OFFSET_DEG[0], c.lon + COLD_OFFSET_DEG[1]
+        call = lambda: get_panchang_range(day, day, lat, lon, tz=c.tz, precision=tier)
+        t0 = time.perf_counter()
+        call()
+        cold.append((time.perf_counter() - t0) * 1000.0)
+        # the cell warms in the background after a cold request; let it finish before timing
+        sungrid.wait_warm()
+        call()  # warm: node caches, index and tables, not a result cache
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            call()
+        warm.append((time.perf_counter() - t0) / repeat * 1000.0)
+    return {"latency_ms": round(statistics.median(warm), 2),
+            "cold_latency_ms": round(statistics.median(cold), 2)}
+
+def run(tiers: Sequence[str], golden: str = GOLDEN_PATH, latency_cases: int = 40,
+        latency_scale: float = 1.0, max_cases: Optional[int] = None) -> Dict:
+    """max_cases: check an evenly spaced slice of the corpus instead of all of it."""
+    import events
+    import precision
+    events.get_index()
+    cases, _ = read_golden(golden)
+    if max_cases:
+        cases = cases[::max(1, len(cases) // max_cases)][:max_cases]
+    step = max(1, len(cases) // latency_cases)
+    report = {"cases": len(cases), "tiers": {}, "failed": []}
+    for name in tiers:
+        tier = precision.tier(name)
+        measured = _errors(cases, name) if name != "reference" else \
+            {"sunrise_error_s": 0.0, "longitude_error_arcsec": 0.0, "phase_error_s": 0.0}
+        measured.update(_latency_ms(cases[::step], name))
+        budget = {k: getattr(tier, k) for k in measured}
+        for k in ("latency_ms", "cold_latency_ms"):
+            budget[k] = round(budget[k] * latency_scale, 2)
+        over = [k for k in measured if measured[k] > budget[k]]
+        report["tiers"][name] = {"measured": measured, "budget": budget, "over_budget": over}
+        if over:
+            report["failed"].append(name)
+    return report
+
+# -------------------------
+# CLI
+# -------------------------
+def main(argv: Optional[List[str]] = None) -> int:
+    import precision
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--tiers", default=",".join(precision.names()))
+    ap.add_argument("--golden", default=GOLDEN_PATH)
+    ap.add_argument("--latency-cases", type=int, default=40, help="corpus windows timed per tier")
+    ap.add_argument("--latency-scale", type=float, default=1.0, help="multiply the latency budgets")
+    ap.add_argument("--cases", type=int, help="check an evenly spaced slice of this many corpus windows")
+    ap.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = ap.parse_args(argv)
+    tiers = [t.strip() for t in args.tiers.split(",") if t.strip()]
+    unknown = [t for t in tiers if t not in precision.TIERS]
+    if unknown:
+        ap.error(f"unknown tiers: {', '.join(unknown)}")
+
+    report = run(tiers, args.golden, args.latency_cases, args.latency_scale, args.cases)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    return 1 if report["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
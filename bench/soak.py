@@ -0,0 +1,247 @@
+# bench/soak.py
+"""
+Soak test: replay a traffic mix against a local server for a long run and
+fail when its resident memory keeps growing.
+
+The server is started with the memory diagnostics on (PANCHANG_DIAGNOSTICS=1)
+and with small caches, so that every cache fills up and starts evicting early
+in the run: from then on a healthy server's memory is flat, and what still
+grows is a leak. The mix covers the main routes (/panchang with and without
+"_debug", fields=all and precision=fast, /month, /now, /next, /calendar.ics,
+/eclipses) over a fixed-seed pool of random coordinates, so new locations,
+contexts and instant blocks keep being created and evicted.
+
+After the warm-up (by default the first quarter of --duration) the RSS of the
+server and its workers is sampled after every batch of requests. RSS swings
+by tens of MB within a batch, so growth is the median of the last fifth of the
+samples (at least three) minus the median of the first fifth; the run fails
+(exit code 1) when it exceeds --max-growth-mb or when more than
+--max-error-rate of the requests failed. The report ends with the server's
+own /diagnostics/memory (cache sizes, object counts) and, with
+--tracemalloc N, the allocation sites that grew since the warm-up.
+
+    python -m bench.soak --duration 1800
+    python -m bench.soak --duration 600 --prefork --workers 4 --out soak.json
+    python -m bench.soak --duration 900 --tracemalloc 5 --max-growth-mb 10
+"""
+
+import argparse
+import datetime as _dt
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import urllib.parse
+import urllib.request
+from typing import Dict, List, Optional
+
+from bench.loadtest import SYNTHETIC_LOCATIONS, replay, start_server, stop_server, summarize
+from bench.memory import memory_kb, process_tree
+
+# small caches: they fill up (and evict) within the warm-up
+SERVER_ENV = {
+    "PANCHANG_DIAGNOSTICS": "1",
+    "PANCHANG_DIAGNOSTICS_INTERVAL": "5",
+    "PANCHANG_RESULT_CACHE_SIZE": "512",
+    "PANCHANG_LOCATION_POOL": "64",
+    "PANCHANG_INSTANT_BLOCKS": "128",
+    "PANCHANG_SUNRISE_GRID_CACHE": "2000",
+    "PANCHANG_JOB_WORKERS": "1",
+}
+
+# route variant -> relative weight
+MIX = {
+    "panchang": 40, "panchang_all": 10, "panchang_fast": 10, "month": 4, "now": 12,
+    "now_at": 12, "next": 6, "calendar": 1, "eclipses": 5,
+}
+NEXT_EVENTS = ("new_moon", "full_moon", "ekadashi", "purnima", "rohini", "makara_sankranti")
+
+# -------------------------
+# Traffic
+# -------------------------
+class Traffic:
+    """Endless request paths over a fixed pool of coordinates."""
+
+    def __init__(self, seed: int = 0, locations: int = 300, years=(2000, 2040)):
+        self.rng = random.Random(seed)
+        self.locations = [(name, lat, lon) for name, lat, lon in SYNTHETIC_LOCATIONS]
+        while len(self.locations) < locations:
+            self.locations.append(("", round(self.rng.uniform(-55.0, 60.0), 3),
+                                   round(self.rng.uniform(-180.0, 180.0), 3)))
+        self.first = _dt.date(years[0], 1, 1).toordinal()
+        self.last = _dt.date(years[1], 12, 31).toordinal()
+        self.variants = list(MIX)
+        self.weights = [MIX[v] for v in self.variants]
+
+    def path(self) -> str:
+        rng = self.rng
+        variant = rng.choices(self.variants, self.weights)[0]
+        _, lat, lon = rng.choice(self.locations)
+        day = _dt.date.fromordinal(rng.randint(self.first, self.last))
+        where = {"lat": lat, "lon": lon}
+        if variant.startswith("panchang"):
+            params = {"date": day.isoformat(), **where}
+            if variant == "panchang_all":
+                params["fields"] = "all"
+            elif variant == "panchang_fast":
+                params["precision"] = "fast"
+            return "/panchang?" + urllib.parse.urlencode(params)
+        if variant == "month":
+            return "/month?" + urllib.parse.urlencode({"year": day.year, "month": day.month, **where})
+        if variant == "now":
+            return "/now?" + urllib.parse.urlencode(where)
+        if variant == "now_at":
+            at = f"{day.isoformat()}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00Z"
+            return "/now?" + urllib.parse.urlencode({"at": at, **where})
+        if variant == "next":
+            return "/next?" + urllib.parse.urlencode({"event": rng.choice(NEXT_EVENTS),
+                                                      "after": day.isoformat(), "count": 3})
+        if variant == "calendar":
+            # a few known locations only: a feed is a year of festivals
+            _, lat, lon = rng.choice(SYNTHETIC_LOCATIONS)
+            return "/calendar.ics?" + urllib.parse.urlencode({"lat": lat, "lon": lon, "start": day.year})
+        end = day + _dt.timedelta(days=rng.randint(30, 730))
+        return "/eclipses?" + urllib.parse.urlencode({"start": day.isoformat(), "end": end.isoformat(),
+                                                      **where})
+
+    def paths(self, n: int) -> List[str]:
+        return [self.path() for _ in range(n)]
+
+# -------------------------
+# Sampling
+# -------------------------
+def rss_mb(pid: int) -> float:
+    """Summed RSS of the server and its worker processes."""
+    total = 0
+    for p in process_tree(pid):
+        try:
+            total += memory_kb(p)["rss"]
+        except OSError:
+            pass
+    return round(total / 1024.0, 2)
+
+def _call(url: str, path: str, method: str = "GET", timeout: float = 120.0):
+    req = urllib.request.Request(url + path, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read())
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        return {"error": str(e)}
+
+def growth(samples: List[Dict]) -> Dict:
+    """Median of the last fifth of the RSS samples minus the first fifth's, and the fitted slope."""
+    rss = [s["rss_mb"] for s in samples]
+    if len(rss) < 6:
+        return {"samples": len(rss), "growth_mb": None, "slope_mb_per_hour": None}
+    k = max(3, len(rss) // 5)
+    first, last = statistics.median(rss[:k]), statistics.median(rss[-k:])
+    t = [s["t"] for s in samples]
+    mt, mr = statistics.fmean(t), statistics.fmean(rss)
+    var = sum((x - mt) ** 2 for x in t)
+    slope = sum((x - mt) * (y - mr) for x, y in zip(t, rss)) / var if var else 0.0
+    return {
+        "samples": len(rss),
+        "first_mb": first,
+        "last_mb": last,
+        "growth_mb": round(last - first, 2),
+        "slope_mb_per_hour": round(slope * 3600.0, 2),
+    }
+
+# -------------------------
+# Run
+# -------------------------
+def run(duration: float = 1800.0, warmup: Optional[float] = None, batch: int = 200,
+        concurrency: int = 8, workers: int = 1, prefork: bool = False, seed: int = 0,
+        tracemalloc_frames: int = 0, env: Optional[Dict[str, str]] = None) -> Dict:
+    warmup = duration * 0.25 if warmup is None else warmup
+    server_env = {**SERVER_ENV, **(env or {})}
+    if tracemalloc_frames > 0:
+        server_env["PANCHANG_TRACEMALLOC_FRAMES"] = str(tracemalloc_frames)
+    traffic = Traffic(seed)
+    proc, url = start_server(workers=workers, prefork=prefork, env=server_env, timeout=180.0)
+    results, samples = [], []
+    try:
+        t0 = time.time()
+        while time.time() - t0 < warmup:
+            replay(url, traffic.paths(batch), concurrency=concurrency)
+        baseline = _call(url, "/diagnostics/tracemalloc/baseline", "POST") if tracemalloc_frames > 0 else None
+        samples.append({"t": round(time.time() - t0, 1), "rss_mb": rss_mb(proc.pid)})
+        t1 = time.time()
+        while time.time() - t0 < duration:
+            results.extend(replay(url, traffic.paths(batch), concurrency=concurrency))
+            samples.append({"t": round(time.time() - t0, 1), "rss_mb": rss_mb(proc.pid)})
+        traffic_report = summarize(results, time.time() - t1)
+        # under the pre-fork server these come from whichever worker answers
+        diagnostics = _call(url, "/diagnostics/memory")
+        allocations = _call(url, "/diagnostics/tracemalloc?top=15") if baseline is not None else None
+    finally:
+        stop_server(proc)
+    return {
+        "duration_s": duration,
+        "warmup_s": warmup,
+        "workers": workers,
+        "server": "prefork" if prefork else "uvicorn",
+        "env": server_env,
+        "memory": growth(samples),
+        "rss_samples": samples,
+        "traffic": traffic_report,
+        "diagnostics": diagnostics,
+        "tracemalloc": allocations,
+    }
+
+# -------------------------
+# CLI
+# -------------------------
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--duration", type=float, default=1800.0, help="seconds, warm-up included")
+    ap.add_argument("--warmup", type=float, help="seconds before the first sample (default: duration / 4)")
+    ap.add_argument("--batch", type=int, default=200, help="requests between RSS samples")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--prefork", action="store_true", help="run the pre-fork server (server.py)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--tracemalloc", type=int, default=0, metavar="FRAMES",
+                    help="trace allocations with this many frames and report growth since the warm-up")
+    ap.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                    help="extra server environment, e.g. PANCHANG_RESULT_CACHE_SIZE=4096")
+    ap.add_argument("--max-growth-mb", type=float, default=20.0)
+    ap.add_argument("--max-error-rate", type=float, default=0.01)
+    ap.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = ap.parse_args(argv)
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        ap.error("needs Linux /proc/<pid>/smaps_rollup")
+    env = {}
+    for item in args.env:
+        key, sep, value = item.partition("=")
+        if not sep:
+            ap.error(f"--env expects KEY=VALUE, got {item!r}")
+        env[key] = value
+
+    report = run(args.duration, args.warmup, args.batch, args.concurrency, args.workers, args.prefork,
+                 args.seed, args.tracemalloc, env)
+    grown = report["memory"]["growth_mb"]
+    error_rate = report["traffic"]["total"]["error_rate"]
+    failures = []
+    if grown is None:
+        failures.append("too few RSS samples: increase --duration or lower --batch")
+    elif grown > args.max_growth_mb:
+        failures.append(f"RSS grew {grown} MB (limit {args.max_growth_mb} MB)")
+    if error_rate > args.max_error_rate:
+        failures.append(f"error rate {error_rate} (limit {args.max_error_rate})")
+    report["passed"] = not failures
+    report["failures"] = failures
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+# cache.py
+"""
+In-process cache of API results.
+
+Keys start with the canonical location key (cities.Location.key), followed by
+the normalized request options, so equivalent requests (same city by name or
+slug, field lists in any order, default vs explicit ayanamsa) share an entry.
+Cached values are shared between requests and must not be mutated.
+
+Under the pre-fork server (server.py) the per-process LRU is backed by a
+SharedCache: a direct-mapped table in an anonymous shared mapping created
+before the fork, so a day computed by one worker is served by all of them.
+"""
+
+import hashlib
+import json
+import mmap
+import multiprocessing
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Union
+
+import config
+
+# -------------------------
+# Shared-memory tier
+# -------------------------
+# slot header: sequence number (odd while a write is in progress), payload length, key digest
+_HEADER = struct.Struct("<II16s")
+
+def _digest(key: Hashable) -> bytes:
+    return hashlib.blake2b(repr(key).encode(), digest_size=16).digest()
+
+class SharedCache:
+    """
+    Direct-mapped cache of JSON-serializable values in an anonymous shared
+    mapping. Create it before forking; children inherit the mapping and lock.
+    Each key hashes to one fixed-size slot (a newer entry evicts the older
+    one); values are stored zlib-compressed and skipped if they do not fit.
+    Readers take no lock: a per-slot sequence number detects torn reads.
+    """
+
+    def __init__(self, size_bytes: int, slot_bytes: int):
+        self.slot_bytes = max(slot_bytes, _HEADER.size + 1)
+        self.slots = max(1, size_bytes // self.slot_bytes)
+        self._buf = mmap.mmap(-1, self.slots * self.slot_bytes)
+        self._lock = multiprocessing.get_context("fork").Lock()
+        self.hits = self.misses = self.stores = self.too_large = 0
+
+    def _offset(self, digest: bytes) -> int:
+        return (int.from_bytes(digest[:8], "little") % self.slots) * self.slot_bytes
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        digest = _digest(key)
+        off = self._offset(digest)
+        seq, length, stored = _HEADER.unpack_from(self._buf, off)
+        if seq % 2 or stored != digest or length == 0:
+            self.misses += 1
+            return None
+        payload = self._buf[off + _HEADER.size:off + _HEADER.size + length]
+        if _HEADER.unpack_from(self._buf, off)[0] != seq:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(zlib.decompress(payload))
+
+    def put(self, key: Hashable, value: Any) -> None:
+        payload = zlib.compress(json.dumps(value, separators=(",", ":")).encode(), 1)
+        if len(payload) > self.slot_bytes - _HEADER.size:
+            self.too_large += 1
+            return
+        digest = _digest(key)
+        off = self._offset(digest)
+        with self._lock:
+            seq = _HEADER.unpack_from(self._buf, off)[0]
+            _HEADER.pack_into(self._buf, off, seq + 1, 0, b"\0" * 16)
+            self._buf[off + _HEADER.size:off + _HEADER.size + len(payload)] = payload
+            _HEADER.pack_into(self._buf, off, seq + 2, len(payload), digest)
+        self.stores += 1
+
+    def stats(self) -> Dict[str, int]:
+        # counters are per process; the table itself is shared
+        return {"slots": self.slots, "slot_bytes": self.slot_bytes, "hits": self.hits,
+                "misses": self.misses, "stores": self.stores, "too_large": self.too_large}
+
+# -------------------------
+# Per-process LRU
+# -------------------------
+class LRUCache:
+    """Bounded, thread-safe LRU map with hit/miss counters and an optional shared tier."""
+
+    def __init__(self, max_entries: int, shared: Optional[SharedCache] = None):
+        self.max_entries = max(0, max_entries)
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        # concurrent misses may compute twice; results are deterministic, so last write wins
+        value = self.get(key)
+        if value is None:
+            value = self.shared.get(key) if self.shared is not None else None
+            if value is None:
+                value = compute()
+                if self.shared is not None:
+                    self.shared.put(key, value)
+            self.put(key, value)
+        return value
+
+    def __contains__(self, key: Hashable) -> bool:
+        # a peek: no LRU reordering, no hit/miss counting
+        with self._lock:
+            return key in self._data
+
+    def warm(self, key: Hashable, value: Any) -> None:
+        """Store a precomputed value in this process and in the shared tier."""
+        if self.shared is not None:
+            self.shared.put(key, value)
+        self.put(key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def values(self) -> List[Any]:
+        """Snapshot of the cached values (this process), least recently used first."""
+        with self._lock:
+            return list(self._data.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = {"entries": len(self._data), "max_entries": self.max_entries,
+                   "hits": self.hits, "misses": self.misses}
+        if self.shared is not None:
+            out["shared"] = self.shared.stats()
+        return out
+
+RESULTS = LRUCache(config.RESULT_CACHE_SIZE)
+
+def enable_shared(size_mb: int = config.SHARED_CACHE_MB,
+                  slot_kb: int = config.SHARED_CACHE_SLOT_KB) -> Optional[SharedCache]:
+    """Back RESULTS with a shared-memory tier; call in the parent before forking workers."""
+    if size_mb <= 0:
+        return None
+    RESULTS.shared = SharedCache(size_mb * 1024 * 1024, slot_kb * 1024)
+    return RESULTS.shared
+
+def fields_key(fields: Union[None, str, Iterable[str]]) -> str:
+    from panchang3 import resolve_fields
+    return ",".join(sorted(resolve_fields(fields)))
+
+def result_key(kind: str, location, *parts) -> tuple:
+    """(kind, location key, *parts): the cache key of one API result."""
+    return (kind, location.key) + tuple(parts)
+
+def panchang_key(location, day_iso: str, fields_key_: str, ayanamsa: str, precision: str) -> tuple:
+    """Key of one /panchang result (fields_key_ as returned by fields_key)."""
+    return result_key("panchang", location, day_iso, fields_key_, ayanamsa, precision)
@@ -0,0 +1,177 @@
+# calendar_feed.py
+"""
+iCalendar (RFC 5545) feeds of festivals and tithis for calendar subscriptions.
+
+A feed is generated year by year and streamed as it is produced, so a
+multi-year feed holds one year of events at a time:
+
+- festivals: all-day events on the local dates the range engine observes
+  them (udaya tithi, kshaya/vriddhi aware), computed once per (location,
+  year, ayanamsa) and kept in the result cache as (date, name) pairs;
+- tithis: timed events for selected tithis (default Ekadashi, Purnima and
+  Amavasya), read from the event index (events.py). Like every index time
+  they are geocentric and shared by all locations.
+
+Every event has a UID derived from the feed's location and the event itself,
+so a refreshed feed updates events in place instead of duplicating them.
+The content depends only on the request, FEED_VERSION (the feed's own
+format and event set; bumping it makes every subscriber refetch), the
+engine version (yearpack.PACK_VERSION, bumped whenever the engine's output
+changes) and the event index version, so the ETag is computed from those
+without generating anything and a revalidation costs no computation.
+"""
+
+import datetime as _dt
+import hashlib
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import cache
+import events
+from ayanamsa import DEFAULT_AYANAMSA, validate as validate_ayanamsa
+from cities import Location
+
+FEED_VERSION = 2
+# fixed DTSTAMP: events are regenerated, not edited, so a wall-clock stamp would only defeat caching
+FEED_STAMP = "20250101T000000Z"
+MAX_YEARS = 10
+MIN_YEAR, MAX_YEAR = events.INDEX_START.year, events.INDEX_END.year - 1
+DEFAULT_TITHIS = ("ekadashi", "purnima", "amavasya")
+REFRESH = "PT1H"
+
+def _slug(text: str) -> str:
+    return "".join(c if c.isalnum() else "-" for c in text.lower()).strip("-")
+
+def validate(first: int, years: int, tithis: Sequence[str]) -> List[str]:
+    """Check the feed span and tithi names (index event names); raises ValueError."""
+    if not 1 <= years <= MAX_YEARS:
+        raise ValueError(f"years must be in 1..{MAX_YEARS}")
+    if not (MIN_YEAR <= first and first + years - 1 <= MAX_YEAR):
+        raise ValueError(f"years must lie within {MIN_YEAR}..{MAX_YEAR}")
+    names = [events._slug(t) for t in tithis if t.strip()]
+    bad = [t for t in names if t not in events.EVENTS or events.EVENTS[t].series != "tithi"]
+    if bad:
+        raise ValueError(f"unknown tithis: {', '.join(bad)}")
+    return names
+
+def etag(loc: Location, first: int, years: int, ayanamsa: str, tithis: Sequence[str]) -> str:
+    from yearpack import PACK_VERSION
+    ident = repr((FEED_VERSION, PACK_VERSION, events.INDEX_VERSION, loc.key, first, years, ayanamsa,
+                  tuple(tithis)))
+    return '"%s"' % hashlib.sha256(ident.encode("utf-8")).hexdigest()[:32]
+
+# -------------------------
+# Events
+# -------------------------
+def year_festivals(loc: Location, year: int, ayanamsa: str = DEFAULT_AYANAMSA) -> List[Tuple[str, str]]:
+    """(local date ISO, festival) pairs of one year, cached per location."""
+    from panchang_range import get_panchang_range
+
+    def compute():
+        rows = get_panchang_range(_dt.date(year, 1, 1), _dt.date(year, 12, 31), loc.lat, loc.lon,
+                                  fields="lunar_month,festivals", ayanamsa=ayanamsa, tz=loc.tz)
+        return [(r["date"], name) for r in rows for name in r["festivals"]]
+    key = cache.result_key("ics-festivals", loc, year, ayanamsa)
+    return [tuple(f) for f in cache.RESULTS.get_or_compute(key, compute)]
+
+def year_tithis(year: int, tithis: Sequence[str]) -> List[Tuple[str, str, Optional[str], int]]:
+    """(event, UTC start, UTC end or None, 1..30 tithi) of periods starting in the year, by start."""
+    from panchang3 import TS
+    index = events.get_index()
+    t0, t1 = TS.utc(year, 1, 1).tt, TS.utc(year + 1, 1, 1).tt
+    fmt = "%Y%m%dT%H%M%SZ"
+    out = []
+    for event in tithis:
+        start, end, idx = index.between(event, t0, t1)
+        if not len(start):
+            continue
+        start_s = TS.tt_jd(start).utc_strftime(fmt)
+        has_end = ~np.isnan(end)
+        end_s = iter(TS.tt_jd(end[has_end]).utc_strftime(fmt)) if has_end.any() else iter(())
+        for j in range(len(start)):
+            out.append((event, start_s[j], next(end_s) if has_end[j] else None, int(idx[j]) + 1))
+    out.sort(key=lambda e: e[1])
+    return out
+
+# -------------------------
+# Rendering
+# -------------------------
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def _fold(line: str) -> str:
+    """Content line folded at 75 octets, CRLF terminated."""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line + "\r\n"
+    parts, cur, size = [], [], 0
+    for ch in line:
+        n = len(ch.encode("utf-8"))
+        if size + n > (75 if not parts else 74):
+            parts.append("".join(cur))
+            cur, size = [], 0
+        cur.append(ch)
+        size += n
+    parts.append("".join(cur))
+    return "\r\n ".join(parts) + "\r\n"
+
+def _event(lines: Sequence[str]) -> str:
+    return "".join(_fold(l) for l in ("BEGIN:VEVENT", f"DTSTAMP:{FEED_STAMP}", *lines, "END:VEVENT"))
+
+def festival_event(day_iso: str, name: str, feed_id: str) -> str:
+    day = _dt.date.fromisoformat(day_iso)
+    return _event([
+        f"UID:{day:%Y%m%d}-{_slug(name)}-{feed_id}@panchang",
+        f"DTSTART;VALUE=DATE:{day:%Y%m%d}",
+        f"DTEND;VALUE=DATE:{day + _dt.timedelta(days=1):%Y%m%d}",
+        f"SUMMARY:{_escape(name)}",
+        "CATEGORIES:Festival",
+        "TRANSP:TRANSPARENT",
+    ])
+
+def tithi_event(event: str, start: str, end: Optional[str], tithi: int, feed_id: str) -> str:
+    from panchang3 import tithi_label
+    lines = [f"UID:{start[:8]}-{event}-{feed_id}@panchang", f"DTSTART:{start}"]
+    if end is not None:
+        lines.append(f"DTEND:{end}")
+    return _event(lines + [
+        f"SUMMARY:{_escape(tithi_label(tithi))}",
+        "DESCRIPTION:Tithi period (geocentric)",
+        "CATEGORIES:Tithi",
+        "TRANSP:TRANSPARENT",
+    ])
+
+def feed(loc: Location, first: int, years: int, ayanamsa: str = DEFAULT_AYANAMSA,
+         tithis: Sequence[str] = DEFAULT_TITHIS, name: Optional[str] = None) -> Iterator[str]:
+    """The VCALENDAR as a stream of chunks: header, one chunk per event, footer."""
+    ayanamsa = validate_ayanamsa(ayanamsa)
+    tithis = validate(first, years, tithis)
+    feed_id = hashlib.sha256(f"{loc.key}|{ayanamsa}".encode("utf-8")).hexdigest()[:12]
+    title = name or f"Panchang - {loc.city or f'{loc.lat:.2f},{loc.lon:.2f}'}"
+    yield "".join(_fold(l) for l in (
+        "BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//Panchang//Festival and tithi feed//EN",
+        "CALSCALE:GREGORIAN", "METHOD:PUBLISH", f"X-WR-CALNAME:{_escape(title)}",
+        f"X-WR-TIMEZONE:{loc.tz}", f"REFRESH-INTERVAL;VALUE=DURATION:{REFRESH}",
+        f"X-PUBLISHED-TTL:{REFRESH}"))
+    for year in range(first, first + years):
+        for day_iso, festival in year_festivals(loc, year, ayanamsa):
+            yield festival_event(day_iso, festival, feed_id)
+        for event, start, end, tithi in year_tithis(year, tithis):
+            yield tithi_event(event, start, end, tithi, feed_id)
+    yield _fold("END:VCALENDAR")
+
+# -------------------------
+# CLI
+# -------------------------
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from cities import resolve_location
+    ap = argparse.ArgumentParser(description="Write an iCalendar feed to stdout.")
+    ap.add_argument("--city", default="delhi")
+    ap.add_argument("--start", type=int, default=_dt.date.today().year)
+    ap.add_argument("--years", type=int, default=1)
+    args = ap.parse_args()
+    for chunk in feed(resolve_location(args.city, None, None), args.start, args.years):
+        sys.stdout.write(chunk)
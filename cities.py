@@ -0,0 +1,161 @@
+# cities.py
+"""
+Offline city database, nearest-city index and location resolution.
+
+- data/cities.csv is bundled with the server: slug, name, country,
+  coordinates and IANA timezone of every known city.
+- A k-d tree over unit vectors (3-D, so chord length orders cities by
+  great-circle distance and the antimeridian needs no special case) answers
+  nearest-city queries in microseconds.
+- resolve_location() turns ?city= or ?lat=&lon= into a Location: the
+  coordinates and timezone the engines use, plus a canonical key for caches.
+"""
+
+import csv
+import math
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import config
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cities.csv")
+EARTH_RADIUS_KM = 6371.0
+# beyond this distance the nearest city says little about the timezone
+TZ_MAX_CITY_KM = 1000.0
+
+class City(NamedTuple):
+    slug: str
+    name: str
+    country: str
+    lat: float
+    lon: float
+    tz: str
+
+class Location(NamedTuple):
+    lat: float
+    lon: float
+    tz: str
+    city: Optional[str] = None      # slug when resolved to a known city
+
+    @property
+    def key(self) -> str:
+        """Canonical cache key: the city, or coordinates at 4 decimals (~10 m)."""
+        if self.city is not None:
+            return f"city:{self.city}"
+        return f"{self.lat:.4f},{self.lon:.4f},{self.tz}"
+
+    def info(self) -> Dict:
+        """The location block of API responses."""
+        return {"city": self.city, "lat": self.lat, "lon": self.lon, "tz": self.tz}
+
+def _load(path: str) -> List[City]:
+    with open(path, newline="", encoding="utf-8") as fh:
+        return [City(r["slug"], r["name"], r["country"], float(r["lat"]), float(r["lon"]), r["tz"])
+                for r in csv.DictReader(fh)]
+
+CITIES: List[City] = _load(DATA_FILE)
+
+# cities year packs are published for (see yearpack.py)
+PACK_CITIES = [
+    "delhi", "mumbai", "kolkata", "chennai", "bengaluru", "hyderabad", "ahmedabad", "pune",
+    "jaipur", "lucknow", "varanasi", "ujjain", "patna", "bhopal", "thiruvananthapuram",
+    "guwahati", "kathmandu", "colombo", "dubai", "singapore", "london", "new-york",
+    "toronto", "san-francisco", "sydney",
+]
+
+def _norm(text: str) -> str:
+    return "-".join(text.strip().lower().replace(",", " ").replace(".", "").split())
+
+_BY_SLUG: Dict[str, City] = {}
+for _c in CITIES:
+    _BY_SLUG.setdefault(_c.slug, _c)
+    _BY_SLUG.setdefault(_norm(_c.name), _c)
+    _BY_SLUG.setdefault(_norm(f"{_c.name} {_c.country}"), _c)
+
+def get_city(name: str) -> City:
+    """City by slug or name ('san-francisco', 'San Francisco', 'San Francisco, US')."""
+    try:
+        return _BY_SLUG[_norm(name)]
+    except KeyError:
+        raise ValueError(f"unknown city: {name!r}") from None
+
+# -------------------------
+# Nearest-city k-d tree
+# -------------------------
+def _unit(lat: float, lon: float) -> Tuple[float, float, float]:
+    phi, lam = math.radians(lat), math.radians(lon)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+class KDTree:
+    """Static 3-D k-d tree; nodes are (point index, axis, left, right) tuples."""
+
+    def __init__(self, points: List[Tuple[float, float, float]]):
+        self.points = points
+        self.root = self._build(list(range(len(points))), 0)
+
+    def _build(self, idx: List[int], depth: int):
+        if not idx:
+            return None
+        axis = depth % 3
+        idx.sort(key=lambda i: self.points[i][axis])
+        mid = len(idx) // 2
+        return (idx[mid], axis, self._build(idx[:mid], depth + 1), self._build(idx[mid + 1:], depth + 1))
+
+    def nearest(self, q: Tuple[float, float, float]) -> Tuple[int, float]:
+        """(index, squared chord distance) of the point closest to q."""
+        best = [-1, float("inf")]
+        points = self.points
+
+        def visit(node):
+            if node is None:
+                return
+            i, axis, left, right = node
+            p = points[i]
+            d = (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 + (p[2] - q[2]) ** 2
+            if d < best[1]:
+                best[0], best[1] = i, d
+            diff = q[axis] - p[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            if diff * diff < best[1]:
+                visit(far)
+
+        visit(self.root)
+        return best[0], best[1]
+
+_TREE = KDTree([_unit(c.lat, c.lon) for c in CITIES])
+
+def nearest_city(lat: float, lon: float) -> Tuple[City, float]:
+    """Nearest known city and its great-circle distance in km."""
+    i, d2 = _TREE.nearest(_unit(lat, lon))
+    chord = math.sqrt(d2)
+    return CITIES[i], 2.0 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2.0))
+
+def _solar_tz(lon: float) -> str:
+    # POSIX-style Etc zones have inverted signs: Etc/GMT-5 is UTC+5
+    hours = int(round(lon / 15.0))
+    return "Etc/GMT" if hours == 0 else f"Etc/GMT{-hours:+d}"
+
+# -------------------------
+# Resolution
+# -------------------------
+def resolve_location(city: Optional[str] = None, lat: Optional[float] = None,
+                     lon: Optional[float] = None) -> Location:
+    """
+    ?city= wins; otherwise the coordinates are kept (rounded to the cache key
+    precision) and take the timezone of the nearest city. Within
+    config.LOCATION_SNAP_KM of a city they snap to that city, so nearby users
+    share cache entries.
+    """
+    if city:
+        c = get_city(city)
+        return Location(c.lat, c.lon, c.tz, c.slug)
+    if lat is None or lon is None:
+        raise ValueError("either city or lat and lon are required")
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+        raise ValueError("lat must be in -90..90 and lon in -180..180")
+    c, km = nearest_city(lat, lon)
+    if km <= config.LOCATION_SNAP_KM:
+        return Location(c.lat, c.lon, c.tz, c.slug)
+    tz = c.tz if km <= TZ_MAX_CITY_KM else _solar_tz(lon)
+    return Location(round(lat, 4), round(lon, 4), tz)
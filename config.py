@@ -0,0 +1,141 @@
+# config.py
+"""
+Runtime settings, read once from environment variables.
+
+    PANCHANG_PROFILING=1        allow ?profile=1 on the API (off by default)
+    PANCHANG_PROFILE_TOP_N=25   hot functions listed in a profile report
+    PANCHANG_DIAGNOSTICS=1      expose the /diagnostics memory endpoints (off by default)
+    PANCHANG_DIAGNOSTICS_INTERVAL=60 RSS sampling period (seconds) while diagnostics are on
+    PANCHANG_DIAGNOSTICS_HISTORY=1440 RSS samples kept
+    PANCHANG_TRACEMALLOC_FRAMES=0 trace allocations with this many frames from startup (0: off)
+    PANCHANG_JOBS_DIR=.jobs     job queue database and chunked job output
+    PANCHANG_JOB_WORKERS=1      background threads running bulk jobs
+    PANCHANG_JOB_MAX_DAYS=36600 largest accepted job (days)
+    PANCHANG_JOB_MAX_WAIT=5     longest a job chunk waits for interactive requests (seconds)
+    PANCHANG_EXPORT_WORKERS=0   processes computing an export.py export (0: one per CPU)
+    PANCHANG_EXPORT_MAX_DAYS=36600 largest /export response (location-days)
+    PANCHANG_PACKS_DIR=.packs   published offline year packs and their manifest
+    PANCHANG_PACK_ON_DEMAND=1   build a missing pack when it is first requested
+    PANCHANG_EVENTS_DIR=.index  persisted event index (next-event queries)
+    PANCHANG_INSTANT_BLOCKS=1024 cached 8-day transition blocks answering /now (instant.py)
+    PANCHANG_LOCATION_SNAP_KM=0 snap coordinates to a city closer than this
+    PANCHANG_RESULT_CACHE_SIZE=4096 cached /panchang and /month results
+    PANCHANG_LOCATION_POOL=1024 pooled per-location contexts (location_context.py)
+    PANCHANG_LOCATION_SUNRISES=32 sunrises cached per pooled location
+    PANCHANG_BATCH_WINDOW_MS=2  collect concurrent /panchang misses this long (0 disables)
+    PANCHANG_BATCH_MAX=64       largest batch; a full batch starts at once
+    PANCHANG_WORKERS=1          worker processes of the pre-fork server (server.py)
+    PANCHANG_SHARED_CACHE_MB=64 result cache shared by those workers (0 disables)
+    PANCHANG_SHARED_CACHE_SLOT_KB=16 largest result the shared cache holds (compressed)
+    PANCHANG_PREWARM=1          pre-compute upcoming days for popular locations
+    PANCHANG_PREWARM_TOP_K=50   locations (with their fields/ayanamsa) pre-warmed
+    PANCHANG_PREWARM_DAYS=2     days pre-warmed, starting with the next local date
+    PANCHANG_PREWARM_LEAD_MINUTES=60  how long before local midnight
+    PANCHANG_PREWARM_INTERVAL=300     scheduler period (seconds)
+    PANCHANG_PREWARM_WINDOW_HOURS=24  traffic window used to rank locations
+    PANCHANG_SUNRISE_GRID_DEG=0 interpolate sunrise/sunset from a grid this fine (0: exact)
+    PANCHANG_SUNRISE_GRID_MAX_ERROR_S=2 larger estimated interpolation errors use the exact search
+    PANCHANG_SUNRISE_GRID_CACHE=20000 cached grid node series
+"""
+
+import os
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    val = os.environ.get(name)
+    if val is None:
+        return default
+    return val.strip().lower() in ("1", "true", "yes", "on")
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+# -------------------------
+# Profiling
+# -------------------------
+ALLOW_PROFILING = _env_bool("PANCHANG_PROFILING")
+PROFILE_TOP_N = _env_int("PANCHANG_PROFILE_TOP_N", 25)
+
+# -------------------------
+# Memory diagnostics
+# -------------------------
+DIAGNOSTICS = _env_bool("PANCHANG_DIAGNOSTICS")
+DIAGNOSTICS_INTERVAL = _env_float("PANCHANG_DIAGNOSTICS_INTERVAL", 60.0)
+DIAGNOSTICS_HISTORY = _env_int("PANCHANG_DIAGNOSTICS_HISTORY", 1440)
+TRACEMALLOC_FRAMES = _env_int("PANCHANG_TRACEMALLOC_FRAMES", 0)
+
+# -------------------------
+# Bulk jobs
+# -------------------------
+JOBS_DIR = os.environ.get("PANCHANG_JOBS_DIR", ".jobs")
+JOB_WORKERS = _env_int("PANCHANG_JOB_WORKERS", 1)
+JOB_MAX_DAYS = _env_int("PANCHANG_JOB_MAX_DAYS", 36600)
+JOB_MAX_WAIT = _env_float("PANCHANG_JOB_MAX_WAIT", 5.0)
+
+# -------------------------
+# Columnar exports
+# -------------------------
+EXPORT_WORKERS = _env_int("PANCHANG_EXPORT_WORKERS", 0)
+EXPORT_MAX_DAYS = _env_int("PANCHANG_EXPORT_MAX_DAYS", 36600)
+
+# -------------------------
+# Offline year packs
+# -------------------------
+PACKS_DIR = os.environ.get("PANCHANG_PACKS_DIR", ".packs")
+PACK_ON_DEMAND = _env_bool("PANCHANG_PACK_ON_DEMAND", True)
+
+# -------------------------
+# Event index
+# -------------------------
+EVENTS_DIR = os.environ.get("PANCHANG_EVENTS_DIR", ".index")
+
+# -------------------------
+# Instant panchang
+# -------------------------
+INSTANT_BLOCKS = _env_int("PANCHANG_INSTANT_BLOCKS", 1024)
+
+# -------------------------
+# Locations and result cache
+# -------------------------
+LOCATION_SNAP_KM = _env_float("PANCHANG_LOCATION_SNAP_KM", 0.0)
+RESULT_CACHE_SIZE = _env_int("PANCHANG_RESULT_CACHE_SIZE", 4096)
+LOCATION_POOL = _env_int("PANCHANG_LOCATION_POOL", 1024)
+LOCATION_SUNRISES = _env_int("PANCHANG_LOCATION_SUNRISES", 32)
+
+# -------------------------
+# Micro-batching
+# -------------------------
+BATCH_WINDOW_MS = _env_float("PANCHANG_BATCH_WINDOW_MS", 2.0)
+BATCH_MAX = _env_int("PANCHANG_BATCH_MAX", 64)
+
+# -------------------------
+# Pre-fork server
+# -------------------------
+WORKERS = _env_int("PANCHANG_WORKERS", 1)
+SHARED_CACHE_MB = _env_int("PANCHANG_SHARED_CACHE_MB", 64)
+SHARED_CACHE_SLOT_KB = _env_int("PANCHANG_SHARED_CACHE_SLOT_KB", 16)
+
+# -------------------------
+# Cache pre-warming
+# -------------------------
+PREWARM = _env_bool("PANCHANG_PREWARM", True)
+PREWARM_TOP_K = _env_int("PANCHANG_PREWARM_TOP_K", 50)
+PREWARM_DAYS = _env_int("PANCHANG_PREWARM_DAYS", 2)
+PREWARM_LEAD_MINUTES = _env_int("PANCHANG_PREWARM_LEAD_MINUTES", 60)
+PREWARM_INTERVAL = _env_int("PANCHANG_PREWARM_INTERVAL", 300)
+PREWARM_WINDOW_HOURS = _env_int("PANCHANG_PREWARM_WINDOW_HOURS", 24)
+
+# -------------------------
+# Sunrise grid
+# -------------------------
+SUNRISE_GRID_DEG = _env_float("PANCHANG_SUNRISE_GRID_DEG", 0.0)
+SUNRISE_GRID_MAX_ERROR_S = _env_float("PANCHANG_SUNRISE_GRID_MAX_ERROR_S", 2.0)
+SUNRISE_GRID_CACHE = _env_int("PANCHANG_SUNRISE_GRID_CACHE", 20000)
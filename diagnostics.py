@@ -0,0 +1,316 @@
+# diagnostics.py
+"""
+Opt-in memory diagnostics for long-running workers (PANCHANG_DIAGNOSTICS=1).
+
+- RSS history: a background thread samples the resident set size (and the
+  tracemalloc total, when tracing) every PANCHANG_DIAGNOSTICS_INTERVAL
+  seconds and keeps the last PANCHANG_DIAGNOSTICS_HISTORY samples.
+- tracemalloc: started at startup with PANCHANG_TRACEMALLOC_FRAMES frames per
+  allocation (0 leaves it off: tracing makes every allocation slower), or
+  later through the API. A report lists the top allocation sites and, once
+  a baseline snapshot was taken, what grew since the baseline.
+- object counts: live gc-tracked objects of the types suspected of piling up
+  (Skyfield Time, futures, location contexts, ...) plus the most common types.
+- cache sizes: entries and estimated bytes of every process-wide cache; for
+  the result cache also how much of it is "_debug" sections.
+
+Everything is per process; under the pre-fork server each worker answers
+for itself (the report carries its pid).
+"""
+
+import gc
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+import config
+
+# type (module.qualname) -> label of the object counts always reported
+KEY_TYPES = {
+    "skyfield.timelib.Time": "skyfield_time",
+    "concurrent.futures._base.Future": "future",
+    "location_context.LocationContext": "location_context",
+    "cities.Location": "location",
+    "numpy.ndarray": "ndarray",
+    "dict": "dict",
+    "list": "list",
+}
+# modules whose objects are sized through their attributes (others: shallow)
+_OWN_MODULES = {"cache", "location_context", "instant", "events", "eclipses", "sungrid", "cities",
+                "batcher", "prewarm"}
+_MB = 1024.0 * 1024.0
+
+_started = time.time()
+
+# -------------------------
+# Resident memory
+# -------------------------
+def rss_bytes() -> int:
+    """Current resident set size (Linux), else the peak reported by getrusage."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+class RssSampler:
+    """Samples RSS on a daemon thread into a bounded history."""
+
+    def __init__(self, interval: float = config.DIAGNOSTICS_INTERVAL,
+                 history: int = config.DIAGNOSTICS_HISTORY):
+        self.interval = max(1.0, interval)
+        self.history: Deque[Dict] = deque(maxlen=max(1, history))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sample(self) -> Dict:
+        row = {"t": round(time.time(), 1), "rss_mb": round(rss_bytes() / _MB, 2)}
+        if tracemalloc.is_tracing():
+            row["traced_mb"] = round(tracemalloc.get_traced_memory()[0] / _MB, 2)
+        self.history.append(row)
+        return row
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="rss-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+SAMPLER = RssSampler()
+
+def start() -> None:
+    """Start the RSS sampler and, if configured, tracemalloc (call once per process)."""
+    if config.TRACEMALLOC_FRAMES > 0 and not tracemalloc.is_tracing():
+        tracemalloc.start(config.TRACEMALLOC_FRAMES)
+    SAMPLER.start()
+
+def stop() -> None:
+    SAMPLER.stop()
+
+# -------------------------
+# Sizes
+# -------------------------
+def _own(obj: Any) -> bool:
+    return type(obj).__module__ in _OWN_MODULES
+
+def deep_size(obj: Any, seen: Optional[set] = None) -> int:
+    """
+    Estimated bytes reachable from obj: containers and this repo's objects
+    are followed, ndarray buffers counted once, other objects (Skyfield's)
+    counted with the arrays and scalars directly in their __dict__.
+    Objects already in `seen` are not counted again.
+    """
+    seen = set() if seen is None else seen
+    total = 0
+    todo = [obj]
+    while todo:
+        o = todo.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        if isinstance(o, np.ndarray):
+            # getsizeof includes the buffer only when the array owns it; views count their base
+            total += sys.getsizeof(o)
+            if isinstance(o.base, np.ndarray):
+                todo.append(o.base)
+            if o.dtype == object:
+                todo.extend(o.ravel().tolist())
+            continue
+        total += sys.getsizeof(o)
+        if isinstance(o, (str, bytes, int, float, bool, type(None))):
+            continue
+        if isinstance(o, dict):
+            todo.extend(o.keys())
+            todo.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset, deque)):
+            todo.extend(o)
+        elif _own(o):
+            if hasattr(o, "__dict__"):
+                todo.append(o.__dict__)
+            for name in getattr(type(o), "__slots__", ()):
+                if hasattr(o, name):
+                    todo.append(getattr(o, name))
+        elif isinstance(getattr(o, "__dict__", None), dict):
+            # foreign objects (Skyfield Time, positions): their cached arrays and scalars only
+            attrs = o.__dict__
+            seen.add(id(attrs))
+            total += sys.getsizeof(attrs)
+            todo.extend(v for v in attrs.values() if isinstance(v, (np.ndarray, float, int, str)))
+    return total
+
+def _sized(entries: Optional[int], values: List[Any], seen: set) -> Dict:
+    return {"entries": entries, "bytes": sum(deep_size(v, seen) for v in values)}
+
+def _debug_bytes(rows: List[Any], seen: set) -> Dict:
+    """Result-cache entries carrying "_debug" sections, and those sections' size."""
+    entries = size = 0
+    for value in rows:
+        found = [r["_debug"] for r in (value if isinstance(value, list) else [value])
+                 if isinstance(r, dict) and "_debug" in r]
+        if found:
+            entries += 1
+            size += sum(deep_size(d, seen) for d in found)
+    return {"entries": entries, "bytes": size}
+
+def cache_sizes() -> Dict[str, Dict]:
+    """Entries and estimated bytes of the process-wide caches (shared objects counted once)."""
+    import ayanamsa
+    import cache
+    import eclipses
+    import events
+    import instant
+    import location_context
+    import prewarm
+    import solar
+    import sungrid
+    from batcher import BATCHER
+    seen: set = set()
+    results = cache.RESULTS.values()
+    # the _debug sections are sized first; the result cache's bytes include them
+    out = {"results_debug": _debug_bytes(results, seen)}
+    out["results"] = _sized(len(results), results, seen)
+    out["results"]["bytes"] += out["results_debug"]["bytes"]
+    for name, lru in (("locations", location_context.POOL), ("instant_blocks", instant.BLOCKS),
+                      ("sunrise_grid", sungrid.NODES)):
+        values = lru.values()
+        out[name] = _sized(len(values), values, seen)
+    for name, tables in (("event_index", events._indexes), ("eclipse_tables", eclipses._tables),
+                         ("ayanamsa_tables", ayanamsa._tables)):
+        out[name] = _sized(len(tables), list(tables.values()), seen)
+    out["solar_ingress"] = {"entries": solar._ingress_day.cache_info().currsize, "bytes": None}
+    out["prewarm_tracker"] = _sized(None, [prewarm.TRACKER.__dict__], seen)
+    out["batcher"] = _sized(None, [BATCHER._pending, BATCHER._inflight], seen)
+    total = sum(v["bytes"] or 0 for k, v in out.items() if k != "results_debug")
+    out["total"] = {"entries": None, "bytes": total}
+    if cache.RESULTS.shared is not None:
+        # the pre-fork server's fixed mapping, shared by all workers (not in the total)
+        shared = cache.RESULTS.shared
+        out["results_shared"] = {"entries": shared.slots, "bytes": shared.slots * shared.slot_bytes}
+    return out
+
+# -------------------------
+# Objects
+# -------------------------
+def object_counts(top: int = 15) -> Dict[str, Any]:
+    """Live gc-tracked objects of KEY_TYPES and the `top` most common types."""
+    counts: Counter = Counter()
+    for o in gc.get_objects():
+        t = type(o)
+        counts[t.__qualname__ if t.__module__ == "builtins" else f"{t.__module__}.{t.__qualname__}"] += 1
+    return {
+        "key_types": {label: counts.get(name, 0) for name, label in KEY_TYPES.items()},
+        "most_common": dict(counts.most_common(top)),
+        "gc_tracked": sum(counts.values()),
+    }
+
+# -------------------------
+# tracemalloc
+# -------------------------
+_baseline: Optional[tracemalloc.Snapshot] = None
+_baseline_at: Optional[float] = None
+_lock = threading.Lock()
+
+TRACING_OFF = "tracemalloc is not running (set PANCHANG_TRACEMALLOC_FRAMES or POST /diagnostics/tracemalloc/start)"
+
+def start_tracing(frames: int = 1) -> None:
+    global _baseline, _baseline_at
+    with _lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(max(1, frames))
+            _baseline = _baseline_at = None
+
+def stop_tracing() -> None:
+    global _baseline, _baseline_at
+    with _lock:
+        tracemalloc.stop()
+        _baseline = _baseline_at = None
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+
+def take_baseline() -> Dict:
+    """Keep a snapshot for later diffs; raises RuntimeError when not tracing."""
+    global _baseline, _baseline_at
+    if not tracemalloc.is_tracing():
+        raise RuntimeError(TRACING_OFF)
+    snap = _snapshot()
+    with _lock:
+        _baseline, _baseline_at = snap, time.time()
+    return {"baseline_at": round(_baseline_at, 1),
+            "traced_mb": round(tracemalloc.get_traced_memory()[0] / _MB, 2)}
+
+def _site(stat) -> str:
+    frame = stat.traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+def tracemalloc_report(top: int = 25, group_by: str = "lineno") -> Dict:
+    """Top allocation sites now and, with a baseline, their growth since it; raises RuntimeError when not tracing."""
+    if group_by not in ("lineno", "filename", "traceback"):
+        raise ValueError("group_by must be lineno, filename or traceback")
+    if not tracemalloc.is_tracing():
+        raise RuntimeError(TRACING_OFF)
+    snap = _snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    out: Dict[str, Any] = {
+        "frames": tracemalloc.get_traceback_limit(),
+        "traced_mb": round(current / _MB, 2),
+        "peak_mb": round(peak / _MB, 2),
+        "top": [{"site": _site(s), "size_kb": round(s.size / 1024.0, 1), "count": s.count}
+                for s in snap.statistics(group_by)[:top]],
+    }
+    with _lock:
+        baseline, baseline_at = _baseline, _baseline_at
+    if baseline is not None:
+        out["baseline_age_s"] = round(time.time() - baseline_at, 1)
+        out["growth"] = [{"site": _site(s), "size_diff_kb": round(s.size_diff / 1024.0, 1),
+                          "count_diff": s.count_diff, "size_kb": round(s.size / 1024.0, 1)}
+                         for s in snap.compare_to(baseline, group_by)[:top]]
+    return out
+
+# -------------------------
+# Report
+# -------------------------
+def memory_report(objects: bool = True) -> Dict:
+    """RSS now and over time, gc state, cache sizes and (optionally) object counts."""
+    out: Dict[str, Any] = {
+        "pid": os.getpid(),
+        "uptime_s": round(time.time() - _started, 1),
+        "rss_mb": round(rss_bytes() / _MB, 2),
+        "rss_history": list(SAMPLER.history),
+        "gc": {"counts": gc.get_count(), "collections": [s["collections"] for s in gc.get_stats()],
+               "uncollectable": len(gc.garbage)},
+        "caches": {k: {"entries": v["entries"],
+                       "mb": None if v["bytes"] is None else round(v["bytes"] / _MB, 3)}
+                   for k, v in cache_sizes().items()},
+        "tracemalloc": {"tracing": tracemalloc.is_tracing()},
+    }
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        out["tracemalloc"].update(traced_mb=round(current / _MB, 2), peak_mb=round(peak / _MB, 2))
+    if objects:
+        out["objects"] = object_counts()
+    return out
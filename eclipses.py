@@ -0,0 +1,440 @@
+# eclipses.py
+"""
+Solar and lunar eclipses (grahan) from the new/full moon series.
+
+1. Syzygies come from the tithi series of the event index (new moon = start
+   of Shukla Pratipada, full moon = start of Krishna Pratipada).
+2. Screening: an eclipse needs the Moon near a lunar node at the syzygy. The
+   angular distance of the Moon from the node line (true node, grahas.py) is
+   tested for all syzygies at once; about one in five survives.
+3. Refinement: each candidate is sampled on a 10-minute grid over +-4 hours
+   (one vectorized ephemeris call for all candidates), greatest eclipse is
+   located by a parabola through the closest samples and contacts are refined
+   by regula falsi like the limb transitions.
+
+Lunar eclipses use Danjon's shadow radii (1.01 x lunar parallax). Solar
+eclipses are classified on the fundamental plane (Besselian style); local
+circumstances (visibility, magnitude, contacts) are computed per location on
+request. Tables are built per century, cached in memory and saved to
+PANCHANG_EVENTS_DIR next to the event index.
+"""
+
+import datetime as _dt
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from ayanamsa import DEFAULT_AYANAMSA
+from grahas import true_node_deg
+from location_context import get_context
+from panchang3 import EPH, TS, observer_at, sun_moon_longitudes
+
+TABLE_VERSION = 1
+
+R_EARTH_KM = 6378.137
+R_SUN_KM = 696000.0
+R_MOON_KM = 1737.4
+# mean Earth radius seen along the shadow axis, in equatorial radii (Meeus ch. 54)
+EARTH_FACTOR = 0.9972
+
+# node distance limits at the syzygy, a little wider than the true ecliptic limits
+SOLAR_NODE_LIMIT = 18.8
+LUNAR_NODE_LIMIT = 18.0
+
+GRID_HALF_HOURS = 4.0
+GRID_STEP_MINUTES = 10.0
+REFINE_ITERATIONS = 4
+
+KINDS = ("solar", "lunar")
+TYPES = ("partial", "annular", "total", "hybrid", "penumbral")
+# lunar contacts: penumbral, umbral (partial), umbral (total) begin/end
+CONTACTS = ("p1", "u1", "u2", "u3", "u4", "p4")
+
+# -------------------------
+# Geometry (vectorized over TT Julian dates)
+# -------------------------
+def _unit(v: np.ndarray) -> np.ndarray:
+    return v / np.linalg.norm(v, axis=0)
+
+def _angle(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.degrees(np.arccos(np.clip(np.sum(_unit(a) * _unit(b), axis=0), -1.0, 1.0)))
+
+def _positions(jd: np.ndarray, observer=None) -> Tuple[np.ndarray, np.ndarray]:
+    """Apparent sun and moon position vectors (km, shape (3, n))."""
+    obs = observer_at(observer, TS.tt_jd(jd))
+    return obs.observe(EPH["sun"]).apparent().position.km, obs.observe(EPH["moon"]).apparent().position.km
+
+def _lunar_geometry(jd: np.ndarray) -> Dict[str, np.ndarray]:
+    """Moon-to-shadow-axis distance and Danjon shadow radii, degrees."""
+    s, m = _positions(jd)
+    ds, dm = np.linalg.norm(s, axis=0), np.linalg.norm(m, axis=0)
+    pi_m = np.degrees(np.arcsin(R_EARTH_KM / dm))
+    pi_s = np.degrees(np.arcsin(R_EARTH_KM / ds))
+    s_s = np.degrees(np.arcsin(R_SUN_KM / ds))
+    return {
+        "sep": _angle(m, -s),
+        "moon_radius": np.degrees(np.arcsin(R_MOON_KM / dm)),
+        "penumbra": 1.01 * pi_m + pi_s + s_s,
+        "umbra": 1.01 * pi_m + pi_s - s_s,
+    }
+
+def _lunar_contact_values(jd: np.ndarray) -> np.ndarray:
+    """(3, n): negative while in the penumbra / partly in the umbra / wholly in the umbra."""
+    g = _lunar_geometry(jd)
+    return np.stack([g["sep"] - (g["penumbra"] + g["moon_radius"]),
+                     g["sep"] - (g["umbra"] + g["moon_radius"]),
+                     g["sep"] - (g["umbra"] - g["moon_radius"])])
+
+def _solar_geometry(jd: np.ndarray) -> Dict[str, np.ndarray]:
+    """Shadow axis distance from the Earth's centre and shadow radii on the fundamental plane, Earth radii."""
+    s, m = _positions(jd)
+    axis = m - s
+    d_sm = np.linalg.norm(axis, axis=0)
+    u = axis / d_sm
+    z = -np.sum(m * u, axis=0)                      # moon -> fundamental plane along the axis
+    gamma = np.linalg.norm(m + z * u, axis=0) / R_EARTH_KM
+    umbra = (R_MOON_KM - z * (R_SUN_KM - R_MOON_KM) / d_sm) / R_EARTH_KM
+    penumbra = (R_MOON_KM + z * (R_SUN_KM + R_MOON_KM) / d_sm) / R_EARTH_KM
+    # umbra radius where the axis meets the surface (hybrid eclipses change sign between the two)
+    depth = R_EARTH_KM * np.sqrt(np.clip(1.0 - gamma**2, 0.0, None))
+    umbra_surface = (R_MOON_KM - (z - depth) * (R_SUN_KM - R_MOON_KM) / d_sm) / R_EARTH_KM
+    # apparent diameter ratio seen from that surface point
+    ratio = (R_MOON_KM / (z - depth)) / (R_SUN_KM / (z - depth + d_sm))
+    return {"gamma": gamma, "umbra": umbra, "penumbra": penumbra,
+            "umbra_surface": umbra_surface, "ratio": ratio}
+
+# -------------------------
+# Grid helpers
+# -------------------------
+def _grid(centers: np.ndarray, half_hours: float = GRID_HALF_HOURS,
+          step_minutes: float = GRID_STEP_MINUTES) -> np.ndarray:
+    offsets = np.arange(-half_hours * 60.0, half_hours * 60.0 + step_minutes / 2, step_minutes) / 1440.0
+    return centers[:, None] + offsets[None, :]
+
+def _parabola_min(grid: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Time of the minimum per row: vertex of the parabola through the lowest sample and its neighbours."""
+    rows = np.arange(len(grid))
+    k = np.clip(np.argmin(values, axis=1), 1, grid.shape[1] - 2)
+    y0, y1, y2 = values[rows, k - 1], values[rows, k], values[rows, k + 1]
+    denom = y0 - 2.0 * y1 + y2
+    shift = np.where(denom > 0, 0.5 * (y0 - y2) / np.where(denom > 0, denom, 1.0), 0.0)
+    step = grid[0, 1] - grid[0, 0]
+    return grid[rows, k] + np.clip(shift, -1.0, 1.0) * step
+
+def _crossings(grid: np.ndarray, values: np.ndarray, fn, row: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    First entry into and last exit from values < 0 per grid row (NaN when the
+    row never goes negative), refined by regula falsi on fn(jd)[row].
+    """
+    n, m = grid.shape
+    neg = values < 0
+    has = neg.any(axis=1)
+    first = np.argmax(neg, axis=1)
+    last = m - 1 - np.argmax(neg[:, ::-1], axis=1)
+    out = []
+    for idx_lo, idx_hi in ((first - 1, first), (last, last + 1)):
+        ok = has & (idx_lo >= 0) & (idx_hi < m)
+        rows = np.nonzero(ok)[0]
+        t = np.full(n, np.nan)
+        if len(rows):
+            lo_jd, hi_jd = grid[rows, idx_lo[rows]], grid[rows, idx_hi[rows]]
+            lo_f, hi_f = values[rows, idx_lo[rows]], values[rows, idx_hi[rows]]
+            for _ in range(REFINE_ITERATIONS):
+                mid_jd = lo_jd + (hi_jd - lo_jd) * (-lo_f) / (hi_f - lo_f)
+                mid_f = fn(mid_jd)[row]
+                same = np.sign(mid_f) == np.sign(lo_f)
+                lo_jd, lo_f = np.where(same, mid_jd, lo_jd), np.where(same, mid_f, lo_f)
+                hi_jd, hi_f = np.where(same, hi_jd, mid_jd), np.where(same, hi_f, mid_f)
+            t[rows] = lo_jd + (hi_jd - lo_jd) * (-lo_f) / (hi_f - lo_f)
+        out.append(t)
+    return out[0], out[1]
+
+# -------------------------
+# Search
+# -------------------------
+def _syzygies(t0_jd: float, t1_jd: float) -> Dict[str, np.ndarray]:
+    from events import get_index
+    # tithis are sun-moon elongations, the same for every ayanamsa
+    jd, idx = get_index(DEFAULT_AYANAMSA).series["tithi"]
+    sel = (jd >= t0_jd) & (jd < t1_jd)
+    return {"solar": jd[sel & (idx == 0)], "lunar": jd[sel & (idx == 15)]}
+
+def _near_node(jd: np.ndarray, limit: float) -> np.ndarray:
+    moon = sun_moon_longitudes(TS.tt_jd(jd))["moon_lon"]
+    dist = (moon - true_node_deg(jd) + 90.0) % 180.0 - 90.0
+    return jd[np.abs(dist) < limit]
+
+def _moon_latitude_sign(jd: np.ndarray) -> np.ndarray:
+    moon = EPH["earth"].at(TS.tt_jd(jd)).observe(EPH["moon"]).apparent()
+    return np.sign(moon.ecliptic_latlon()[0].degrees)
+
+def _search_lunar(candidates: np.ndarray) -> Dict[str, np.ndarray]:
+    grid = _grid(candidates)
+    values = _lunar_contact_values(grid.ravel()).reshape(3, *grid.shape)
+    keep = (values[0] < 0).any(axis=1)
+    grid, values = grid[keep], values[:, keep]
+
+    t_max = _parabola_min(grid, _lunar_geometry(grid.ravel())["sep"].reshape(grid.shape))
+    g = _lunar_geometry(t_max)
+    umbral = (g["umbra"] + g["moon_radius"] - g["sep"]) / (2.0 * g["moon_radius"])
+    penumbral = (g["penumbra"] + g["moon_radius"] - g["sep"]) / (2.0 * g["moon_radius"])
+    contacts = np.full((len(t_max), len(CONTACTS)), np.nan)
+    for k, (a, b) in enumerate(((0, 5), (1, 4), (2, 3))):
+        contacts[:, a], contacts[:, b] = _crossings(grid, values[k], _lunar_contact_values, k)
+    etype = np.where(umbral >= 1.0, TYPES.index("total"),
+                     np.where(umbral > 0.0, TYPES.index("partial"), TYPES.index("penumbral")))
+    # gamma: moon's distance from the shadow axis in Earth radii, signed north/south
+    dm = np.linalg.norm(_positions(t_max)[1], axis=0)
+    gamma = _moon_latitude_sign(t_max) * dm * np.sin(np.radians(g["sep"])) / R_EARTH_KM
+    return {"jd": t_max, "type": etype, "magnitude": umbral, "penumbral_magnitude": penumbral,
+            "gamma": gamma, "contacts": contacts}
+
+def _search_solar(candidates: np.ndarray) -> Dict[str, np.ndarray]:
+    grid = _grid(candidates)
+    g = _solar_geometry(grid.ravel())
+    gamma = g["gamma"].reshape(grid.shape)
+    reach = (EARTH_FACTOR + g["penumbra"]).reshape(grid.shape)
+    keep = (gamma < reach).any(axis=1)
+    grid, gamma = grid[keep], gamma[keep]
+
+    t_max = _parabola_min(grid, gamma)
+    g = _solar_geometry(t_max)
+    central = g["gamma"] < EARTH_FACTOR
+    umbral = g["gamma"] < EARTH_FACTOR + np.abs(g["umbra"])
+    etype = np.where(g["umbra"] > 0, TYPES.index("total"),
+                     np.where(central & (g["umbra_surface"] > 0), TYPES.index("hybrid"), TYPES.index("annular")))
+    etype = np.where(umbral, etype, TYPES.index("partial"))
+    # Meeus 54 with its u = -umbra: 0 at the penumbra's edge, 1 at the umbra's
+    partial_mag = (EARTH_FACTOR + g["penumbra"] - g["gamma"]) / (g["penumbra"] - g["umbra"])
+    magnitude = np.where(central, g["ratio"], partial_mag)
+    return {"jd": t_max, "type": etype, "magnitude": magnitude,
+            "penumbral_magnitude": np.full(len(t_max), np.nan),
+            "gamma": _moon_latitude_sign(t_max) * g["gamma"],
+            "contacts": np.full((len(t_max), len(CONTACTS)), np.nan)}
+
+# -------------------------
+# Century tables
+# -------------------------
+class EclipseTable:
+    """Eclipses sorted by time of greatest eclipse, as parallel arrays."""
+
+    FIELDS = ("jd", "kind", "type", "magnitude", "penumbral_magnitude", "gamma", "contacts")
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+
+    def __len__(self) -> int:
+        return len(self.arrays["jd"])
+
+    def between(self, t0_jd: float, t1_jd: float) -> np.ndarray:
+        """Row indices with greatest eclipse in [t0, t1)."""
+        jd = self.arrays["jd"]
+        return np.arange(np.searchsorted(jd, t0_jd, side="left"), np.searchsorted(jd, t1_jd, side="left"))
+
+def _century_span(century: int) -> Tuple[_dt.date, _dt.date]:
+    from events import INDEX_START, INDEX_END
+    first = max(_dt.date(century * 100, 1, 1), INDEX_START)
+    last = min(_dt.date(century * 100 + 99, 12, 31), INDEX_END)
+    if first > last:
+        raise ValueError(f"no eclipse data for {century * 100}-{century * 100 + 99} "
+                         f"(ephemeris covers {INDEX_START.year}-{INDEX_END.year})")
+    return first, last
+
+def build_table(century: int) -> EclipseTable:
+    first, last = _century_span(century)
+    t0 = TS.utc(first.year, first.month, first.day).tt
+    t1 = TS.utc(last.year, last.month, last.day + 1).tt
+    syz = _syzygies(t0, t1)
+    parts = [(_search_solar(_near_node(syz["solar"], SOLAR_NODE_LIMIT)), 0),
+             (_search_lunar(_near_node(syz["lunar"], LUNAR_NODE_LIMIT)), 1)]
+    arrays = {}
+    for name in EclipseTable.FIELDS:
+        if name == "kind":
+            arrays[name] = np.concatenate([np.full(len(p["jd"]), k) for p, k in parts])
+        else:
+            arrays[name] = np.concatenate([p[name] for p, _ in parts])
+    order = np.argsort(arrays["jd"])
+    return EclipseTable({k: v[order] for k, v in arrays.items()})
+
+def table_path(century: int) -> str:
+    return os.path.join(config.EVENTS_DIR, f"eclipses-v{TABLE_VERSION}-{century * 100}.npz")
+
+_tables: Dict[int, EclipseTable] = {}
+_table_lock = threading.Lock()
+
+def get_table(century: int) -> EclipseTable:
+    """Process-wide table per century: loaded from EVENTS_DIR, or built and saved there once."""
+    table = _tables.get(century)
+    if table is None:
+        with _table_lock:
+            table = _tables.get(century)
+            if table is None:
+                path = table_path(century)
+                try:
+                    with np.load(path) as data:
+                        table = EclipseTable({k: data[k] for k in EclipseTable.FIELDS})
+                except (OSError, KeyError, ValueError):
+                    table = build_table(century)
+                    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                    tmp = path + ".tmp.npz"
+                    np.savez_compressed(tmp, **table.arrays)
+                    os.replace(tmp, path)
+                _tables[century] = table
+    return table
+
+# -------------------------
+# Local circumstances
+# -------------------------
+LOCAL_STEP_MINUTES = 2.0
+# upper limb on the horizon, with refraction
+HORIZON_DEG = -0.833
+
+def _local_solar(jd: np.ndarray, observer) -> List[Dict]:
+    grid = _grid(jd, 3.0, LOCAL_STEP_MINUTES)
+    flat = grid.ravel()
+    t = TS.tt_jd(flat)
+    obs = observer_at(observer, t)
+    sun, moon = obs.observe(EPH["sun"]).apparent(), obs.observe(EPH["moon"]).apparent()
+    s, m = sun.position.km, moon.position.km
+    rs = np.degrees(np.arcsin(R_SUN_KM / np.linalg.norm(s, axis=0)))
+    rm = np.degrees(np.arcsin(R_MOON_KM / np.linalg.norm(m, axis=0)))
+    sep = _angle(s, m)
+    alt = sun.altaz()[0].degrees
+    overlap = (sep - (rs + rm)).reshape(grid.shape)
+    seen = (overlap < 0) & (alt.reshape(grid.shape) > HORIZON_DEG)
+
+    out = []
+    for i in range(len(jd)):
+        if not seen[i].any():
+            out.append({"visible": False})
+            continue
+        seps = sep.reshape(grid.shape)[i]
+        k = np.nonzero(seen[i])[0][np.argmin(seps[seen[i]])]
+        j = i * grid.shape[1] + k
+        t_max = grid[i, k]
+        if 0 < k < len(seps) - 1:
+            t_max = _parabola_min(grid[i:i + 1, k - 1:k + 2], seps[None, k - 1:k + 2])[0]
+        mag = (rs[j] + rm[j] - sep[j]) / (2.0 * rs[j])
+        local_type = "total" if sep[j] <= rm[j] - rs[j] else "annular" if sep[j] <= rs[j] - rm[j] else "partial"
+        row = overlap[i]
+        neg = np.nonzero(row < 0)[0]
+        a, b = neg[0], neg[-1]
+        start = grid[i, a] if a == 0 else grid[i, a - 1] + (grid[i, a] - grid[i, a - 1]) * row[a - 1] / (row[a - 1] - row[a])
+        end = grid[i, b] if b == len(row) - 1 else grid[i, b] + (grid[i, b + 1] - grid[i, b]) * row[b] / (row[b] - row[b + 1])
+        out.append({"visible": True, "type": local_type, "magnitude": round(float(mag), 4),
+                    "maximum": TS.tt_jd(t_max).utc_iso(), "start": TS.tt_jd(start).utc_iso(),
+                    "end": TS.tt_jd(end).utc_iso(), "sun_altitude": round(float(alt[j]), 2)})
+    return out
+
+def _local_lunar(jd: np.ndarray, start: np.ndarray, end: np.ndarray, observer) -> List[Dict]:
+    samples = np.linspace(0.0, 1.0, 25)
+    grid = start[:, None] + (end - start)[:, None] * samples[None, :]
+    t = TS.tt_jd(np.concatenate([grid.ravel(), jd]))
+    alt = observer_at(observer, t).observe(EPH["moon"]).apparent().altaz()[0].degrees
+    at_max = alt[grid.size:]
+    up = (alt[:grid.size].reshape(grid.shape) > HORIZON_DEG).any(axis=1)
+    return [{"visible": bool(up[i]), "moon_altitude_at_maximum": round(float(at_max[i]), 2)}
+            for i in range(len(jd))]
+
+def local_circumstances(table: EclipseTable, rows: np.ndarray, lat: float, lon: float) -> List[Dict]:
+    """Visibility at one location for the given table rows (same order)."""
+    observer = get_context(lat, lon)
+    a = table.arrays
+    out: List[Optional[Dict]] = [None] * len(rows)
+    solar = [i for i, r in enumerate(rows) if a["kind"][r] == 0]
+    lunar = [i for i, r in enumerate(rows) if a["kind"][r] == 1]
+    if solar:
+        for i, res in zip(solar, _local_solar(a["jd"][rows[solar]], observer)):
+            out[i] = res
+    if lunar:
+        r = rows[lunar]
+        c = a["contacts"][r]
+        # the umbral phase when there is one, else the penumbral phase
+        start = np.where(np.isnan(c[:, 1]), c[:, 0], c[:, 1])
+        end = np.where(np.isnan(c[:, 4]), c[:, 5], c[:, 4])
+        for i, res in zip(lunar, _local_lunar(a["jd"][r], start, end, observer)):
+            out[i] = res
+    return out
+
+# -------------------------
+# Queries
+# -------------------------
+def _iso(jd: float) -> Optional[str]:
+    return None if np.isnan(jd) else TS.tt_jd(jd).utc_iso()
+
+def _row(table: EclipseTable, r: int) -> Dict:
+    a = table.arrays
+    kind = KINDS[int(a["kind"][r])]
+    row = {"kind": kind, "type": TYPES[int(a["type"][r])], "maximum": _iso(a["jd"][r]),
+           "magnitude": round(float(a["magnitude"][r]), 4), "gamma": round(float(a["gamma"][r]), 4)}
+    if kind == "lunar":
+        row["penumbral_magnitude"] = round(float(a["penumbral_magnitude"][r]), 4)
+        row["contacts"] = {name: _iso(a["contacts"][r, k]) for k, name in enumerate(CONTACTS)}
+    return row
+
+def eclipses_between(t0_jd: float, t1_jd: float, lat: Optional[float] = None,
+                     lon: Optional[float] = None, kind: Optional[str] = None) -> List[Dict]:
+    """Eclipses with greatest eclipse in [t0, t1), optionally with local circumstances."""
+    if kind is not None and kind not in KINDS:
+        raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+    out = []
+    y0 = TS.tt_jd(t0_jd).utc_datetime().year
+    y1 = TS.tt_jd(t1_jd).utc_datetime().year
+    for century in range(y0 // 100, y1 // 100 + 1):
+        table = get_table(century)
+        rows = table.between(t0_jd, t1_jd)
+        if kind is not None:
+            rows = rows[table.arrays["kind"][rows] == KINDS.index(kind)]
+        found = [_row(table, r) for r in rows]
+        if lat is not None and lon is not None and len(rows):
+            for row, local in zip(found, local_circumstances(table, rows, lat, lon)):
+                row["local"] = local
+        out.extend(found)
+    return out
+
+def eclipses_by_day(day_starts_jd: np.ndarray, lat: float, lon: float) -> List[List[Dict]]:
+    """
+    Eclipses per local day, with local circumstances. day_starts_jd: n + 1
+    TT JDs of consecutive local midnights; an eclipse belongs to the day of
+    its greatest eclipse.
+    """
+    days: List[List[Dict]] = [[] for _ in range(len(day_starts_jd) - 1)]
+    t0, t1 = float(day_starts_jd[0]), float(day_starts_jd[-1])
+    y0 = TS.tt_jd(t0).utc_datetime().year
+    y1 = TS.tt_jd(t1).utc_datetime().year
+    for century in range(y0 // 100, y1 // 100 + 1):
+        table = get_table(century)
+        rows = table.between(t0, t1)
+        if not len(rows):
+            continue
+        day = np.searchsorted(day_starts_jd, table.arrays["jd"][rows], side="right") - 1
+        for d, r, local in zip(day, rows, local_circumstances(table, rows, lat, lon)):
+            days[d].append({**_row(table, r), "local": local})
+    return days
+
+def eclipses(start, end, lat: Optional[float] = None, lon: Optional[float] = None,
+             kind: Optional[str] = None) -> List[Dict]:
+    """Eclipses from start to end (dates, inclusive, UTC days)."""
+    from panchang3 import parse_date
+    d0, d1 = parse_date(start), parse_date(end)
+    if d1 < d0:
+        raise ValueError("end must not be before start")
+    t0 = TS.utc(d0.year, d0.month, d0.day).tt
+    t1 = TS.utc(d1.year, d1.month, d1.day + 1).tt
+    return eclipses_between(t0, t1, lat, lon, kind)
+
+# -------------------------
+# CLI
+# -------------------------
+if __name__ == "__main__":
+    import sys
+    import time
+    t = time.perf_counter()
+    table = build_table(20)
+    print(f"2000-2050 table: {len(table)} eclipses in {time.perf_counter() - t:.2f}s")
+    for row in eclipses(sys.argv[1] if len(sys.argv) > 1 else "2025-01-01",
+                        sys.argv[2] if len(sys.argv) > 2 else "2026-12-31", 28.61, 77.23):
+        print(row)
@@ -0,0 +1,252 @@
+# events.py
+"""
+Sorted event indexes for "when is the next ...?" queries.
+
+The index holds every tithi transition, nakshatra ingress and sidereal solar
+ingress (sankranti) over the ephemeris span, computed once with the range
+engine's transition search and stored as TT Julian date arrays. New and full
+moons are the tithi transitions into Shukla Pratipada and Krishna Pratipada.
+A query is a binary search into the (cached) sub-array of the requested event.
+Nakshatras and sankrantis depend on the ayanamsa, so there is one index per
+ayanamsa model, each built the first time that model is queried.
+
+Times are geocentric, like the transition times printed in almanacs, so the
+index is shared by all locations. The topocentric end times in /panchang
+"transitions" can differ from them by a few minutes to about two hours for
+the moon-based limbs.
+"""
+
+import datetime as _dt
+import os
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+import config
+from ayanamsa import DEFAULT_AYANAMSA, validate as validate_ayanamsa
+from panchang3 import (TS, TITHI_SPAN, NAKSHATRA_SPAN, TITHI_SHUKLA, TITHI_KRISHNA,
+                       NAKSHATRA, RASHIS, limb_values, tithi_label)
+
+INDEX_VERSION = 2
+INDEX_START = _dt.date(1900, 1, 1)
+INDEX_END = _dt.date(2050, 12, 31)
+MAX_COUNT = 100
+
+SERIES_SPANS = {
+    "tithi": TITHI_SPAN,
+    "nakshatra": NAKSHATRA_SPAN,
+    "sankranti": 30.0,
+}
+
+def _series_values(vals: Dict) -> Dict:
+    lv = limb_values(vals)
+    return {"tithi": lv["tithi"], "nakshatra": lv["nakshatra"], "sankranti": vals["sid_sun"]}
+
+# -------------------------
+# Event names
+# -------------------------
+class EventSpec(NamedTuple):
+    series: str
+    indices: Optional[Tuple[int, ...]]   # 0-based new index; None = every transition
+    period: bool                         # True: the event lasts until the next transition
+    label: Optional[str] = None          # fixed display name (else the limb name)
+
+def _slug(name: str) -> str:
+    return name.strip().lower().replace(" ", "_")
+
+def _event_specs() -> Dict[str, EventSpec]:
+    specs = {
+        "tithi": EventSpec("tithi", None, True),
+        "nakshatra": EventSpec("nakshatra", None, True),
+        "sankranti": EventSpec("sankranti", None, False),
+        "new_moon": EventSpec("tithi", (0,), False, "New Moon"),
+        "full_moon": EventSpec("tithi", (15,), False, "Full Moon"),
+    }
+    by_name: Dict[str, List[int]] = {}
+    for i, name in enumerate(TITHI_SHUKLA):
+        specs[f"shukla_{_slug(name)}"] = EventSpec("tithi", (i,), True)
+        by_name.setdefault(_slug(name), []).append(i)
+    for i, name in enumerate(TITHI_KRISHNA):
+        specs[f"krishna_{_slug(name)}"] = EventSpec("tithi", (15 + i,), True)
+        by_name.setdefault(_slug(name), []).append(15 + i)
+    for name, idx in by_name.items():
+        specs[name] = EventSpec("tithi", tuple(idx), True)
+    for i, name in enumerate(NAKSHATRA):
+        specs[_slug(name)] = EventSpec("nakshatra", (i,), True)
+    for i, name in enumerate(RASHIS):
+        specs[f"{_slug(name)}_sankranti"] = EventSpec("sankranti", (i,), False)
+    return specs
+
+EVENTS = _event_specs()
+
+def event_names() -> List[str]:
+    return sorted(EVENTS)
+
+def _label(series: str, index: int) -> str:
+    if series == "tithi":
+        return tithi_label(index + 1)
+    if series == "nakshatra":
+        return NAKSHATRA[index]
+    return RASHIS[index]
+
+# -------------------------
+# Index
+# -------------------------
+class EventIndex:
+    """Transition arrays per series plus lazily filtered per-event arrays."""
+
+    def __init__(self, series: Dict[str, Tuple[np.ndarray, np.ndarray]]):
+        self.series = series
+        self._events: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def event_array(self, event: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(start JDs, position of each start in its series) for one event name."""
+        cached = self._events.get(event)
+        if cached is None:
+            spec = EVENTS[event]
+            jd, idx = self.series[spec.series]
+            pos = np.arange(len(jd)) if spec.indices is None else np.nonzero(np.isin(idx, spec.indices))[0]
+            cached = self._events[event] = (jd[pos], pos)
+        return cached
+
+    def next(self, event: str, after_jd: float, count: int = 1) -> List[Dict]:
+        """The first `count` occurrences of event starting strictly after after_jd."""
+        spec = EVENTS[event]
+        starts, pos = self.event_array(event)
+        k = int(np.searchsorted(starts, after_jd, side="right"))
+        pos = pos[k:k + count]
+        if len(pos) == 0:
+            return []
+        jd, idx = self.series[spec.series]
+        out = []
+        start_iso = TS.tt_jd(jd[pos]).utc_iso()
+        if spec.period:
+            ends = pos + 1
+            has_end = ends < len(jd)
+            end_iso = TS.tt_jd(jd[ends[has_end]]).utc_iso() if has_end.any() else []
+        for j, p in enumerate(pos):
+            row = {"event": event, "name": spec.label or _label(spec.series, int(idx[p])),
+                   "start": start_iso[j]}
+            if spec.period:
+                row["end"] = end_iso[j] if has_end[j] else None
+            out.append(row)
+        return out
+
+    def between(self, event: str, t0_jd: float, t1_jd: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(start JDs, end JDs or NaN, 0-based series index) of occurrences starting in [t0, t1)."""
+        spec = EVENTS[event]
+        starts, pos = self.event_array(event)
+        lo, hi = np.searchsorted(starts, [t0_jd, t1_jd])
+        pos = pos[lo:hi]
+        jd, idx = self.series[spec.series]
+        ends = np.full(len(pos), np.nan)
+        if spec.period:
+            has_end = pos + 1 < len(jd)
+            ends[has_end] = jd[pos[has_end] + 1]
+        return jd[pos], ends, idx[pos]
+
+def build_index(start: _dt.date = INDEX_START, end: _dt.date = INDEX_END,
+                ayanamsa: str = DEFAULT_AYANAMSA) -> EventIndex:
+    """Full transition search over [start, end] (a few seconds for 150 years)."""
+    from panchang_range import limb_transition_series
+    t0 = TS.utc(start.year, start.month, start.day).tt
+    t1 = TS.utc(end.year, end.month, end.day + 1).tt
+    # the shortest tithi/nakshatra is ~0.8 days, so half-day grid cells hold at most one boundary
+    series = limb_transition_series(SERIES_SPANS, t0, t1, step_days=0.5,
+                                    spans=SERIES_SPANS, values=_series_values, ayanamsa=ayanamsa)
+    return EventIndex(series)
+
+def index_path(ayanamsa: str = DEFAULT_AYANAMSA) -> str:
+    return os.path.join(config.EVENTS_DIR,
+                        f"events-v{INDEX_VERSION}-{ayanamsa}-{INDEX_START.year}-{INDEX_END.year}.npz")
+
+def save_index(index: EventIndex, path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    arrays = {}
+    for name, (jd, idx) in index.series.items():
+        arrays[f"{name}_jd"] = jd
+        arrays[f"{name}_idx"] = idx.astype(np.int16)
+    tmp = path + ".tmp.npz"
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, path)
+
+def load_index(path: str) -> EventIndex:
+    with np.load(path) as data:
+        return EventIndex({name: (data[f"{name}_jd"], data[f"{name}_idx"].astype(int))
+                           for name in SERIES_SPANS})
+
+_indexes: Dict[str, EventIndex] = {}
+_index_lock = threading.Lock()
+
+def get_index(ayanamsa: str = DEFAULT_AYANAMSA) -> EventIndex:
+    """Process-wide index per ayanamsa: loaded from EVENTS_DIR, or built and saved there once."""
+    index = _indexes.get(ayanamsa)
+    if index is None:
+        with _index_lock:
+            index = _indexes.get(ayanamsa)
+            if index is None:
+                path = index_path(ayanamsa)
+                try:
+                    index = load_index(path)
+                except (OSError, KeyError, ValueError):
+                    index = build_index(ayanamsa=ayanamsa)
+                    save_index(index, path)
+                _indexes[ayanamsa] = index
+    return index
+
+# -------------------------
+# Queries
+# -------------------------
+def _after_jd(after: Union[None, str, _dt.date, _dt.datetime]) -> float:
+    """Instant as TT JD; dates mean 00:00 UTC, naive datetimes are UTC."""
+    if after is None:
+        dt = _dt.datetime.now(_dt.timezone.utc)
+    elif isinstance(after, _dt.datetime):
+        dt = after
+    elif isinstance(after, _dt.date):
+        dt = _dt.datetime(after.year, after.month, after.day)
+    else:
+        text = str(after).strip().replace("Z", "+00:00")
+        dt = _dt.datetime.fromisoformat(text) if "T" in text or " " in text else \
+            _dt.datetime.combine(_dt.date.fromisoformat(text), _dt.time())
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=_dt.timezone.utc)
+    if not INDEX_START <= dt.astimezone(_dt.timezone.utc).date() <= INDEX_END:
+        raise ValueError(f"after must be within {INDEX_START}..{INDEX_END}")
+    return TS.from_datetime(dt).tt
+
+def next_events(event: str, after: Union[None, str, _dt.date, _dt.datetime] = None,
+                count: int = 1, ayanamsa: str = DEFAULT_AYANAMSA) -> List[Dict]:
+    """
+    Next occurrences of an event, e.g. next_events("ekadashi", "2025-08-01", 3).
+
+    Events: tithi names ("ekadashi", "shukla_ekadashi", "purnima", ...),
+    nakshatra names ("pushya", ...), "<rashi>_sankranti", "new_moon",
+    "full_moon", and "tithi"/"nakshatra"/"sankranti" for any transition.
+    Tithi and nakshatra results carry the end of the period.
+    """
+    ayanamsa = validate_ayanamsa(ayanamsa)
+    event = _slug(event)
+    if event not in EVENTS:
+        raise ValueError(f"unknown event: {event!r}")
+    if not 1 <= count <= MAX_COUNT:
+        raise ValueError(f"count must be in 1..{MAX_COUNT}")
+    return get_index(ayanamsa).next(event, _after_jd(after), count)
+
+# -------------------------
+# CLI
+# -------------------------
+if __name__ == "__main__":
+    import sys
+    import time
+    t = time.perf_counter()
+    idx = get_index()
+    print(f"index ready in {time.perf_counter() - t:.2f}s: "
+          + ", ".join(f"{k}={len(v[0])}" for k, v in idx.series.items()))
+    event = sys.argv[1] if len(sys.argv) > 1 else "ekadashi"
+    t = time.perf_counter()
+    rows = next_events(event, sys.argv[2] if len(sys.argv) > 2 else None, 5)
+    print(f"query: {(time.perf_counter() - t) * 1000:.3f} ms")
+    for r in rows:
+        print(r)
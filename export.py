@@ -0,0 +1,437 @@
+# export.py
+"""
+Columnar bulk export of panchang datasets: Parquet, Feather or an Arrow stream.
+
+A dataset is every date of [start, end] at every requested location, one row
+per (location, date). It is computed in tasks of one location and one
+calendar year (one range-engine call each) and written as Arrow record
+batches while the export runs:
+
+- tasks run on a pool of worker processes, so locations are computed in
+  parallel; results are written in task order (location by location, year
+  by year) and at most a few tasks per worker are in flight, so memory stays
+  bounded whatever the size of the export;
+- the geocentric new/full moon search is shared by every location of a
+  year: each worker keeps the phase series of the years it has seen;
+- limbs are dictionary-encoded with fixed dictionaries: the integer index is
+  the limb's number (tithi 0..29, nakshatra 0..26, ...) and the dictionary
+  holds the names, identical in every batch and every file. The location
+  column is dictionary-encoded over the export's location list;
+- Parquet row groups and Feather batches hold ROW_GROUP_ROWS rows.
+
+Dates are limited to MIN_DATE..MAX_DATE (1900-2049), the span of the de421
+ephemeris, so the longest export is 150 years per location.
+
+pyarrow is an optional dependency (pip install pyarrow); it is imported when
+an export starts.
+
+    python export.py --cities all --start 1900-01-01 --end 2049-12-31 --out panchang.parquet
+    python export.py --cities delhi,mumbai --start 2025-01-01 --end 2025-12-31 --format feather --out 2025.feather
+"""
+
+import datetime as _dt
+import io
+import os
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+import config
+from ayanamsa import DEFAULT_AYANAMSA, validate as validate_ayanamsa
+from cities import CITIES, Location, resolve_location
+from precision import DEFAULT_PRECISION, validate as validate_precision
+
+# file metadata; bumped whenever the columns or the engine's values change
+EXPORT_VERSION = 2
+FORMATS = {
+    # format: (file extension, media type)
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "feather": ("feather", "application/vnd.apache.arrow.file"),
+    "arrow": ("arrows", "application/vnd.apache.arrow.stream"),
+}
+EXPORT_FIELDS = ("core", "lunar_month", "festivals", "transitions")
+DEFAULT_FIELDS = "core,lunar_month,festivals"
+# de421 covers 1900-2050 (150 years); the range engine also reads a few days either side
+MIN_DATE, MAX_DATE = _dt.date(1900, 1, 1), _dt.date(2049, 12, 31)
+ROW_GROUP_ROWS = 128 * 1024
+# tasks queued per worker process beyond the one it is computing
+TASKS_AHEAD = 2
+
+class Task(NamedTuple):
+    code: int                  # index of the location in the export's location list
+    loc: Location
+    first: _dt.date
+    last: _dt.date
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise RuntimeError("columnar export needs pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+# -------------------------
+# Requests
+# -------------------------
+def location_label(loc: Location) -> str:
+    return loc.city or f"{loc.lat:.4f},{loc.lon:.4f}"
+
+def resolve_locations(names: Sequence[str]) -> List[Location]:
+    """City slugs/names, "all" for every known city, or "lat:lon" pairs."""
+    out: List[Location] = []
+    for name in names:
+        name = name.strip()
+        if not name:
+            continue
+        if name.lower() == "all":
+            out.extend(Location(c.lat, c.lon, c.tz, c.slug) for c in CITIES)
+        elif ":" in name:
+            lat, lon = name.split(":", 1)
+            try:
+                out.append(resolve_location(None, float(lat), float(lon)))
+            except ValueError:
+                raise ValueError(f"bad lat:lon pair: {name!r}") from None
+        else:
+            out.append(resolve_location(name))
+    if not out:
+        raise ValueError("no locations")
+    seen = set()
+    return [loc for loc in out if not (loc.key in seen or seen.add(loc.key))]
+
+def validate(start, end, fields: str, fmt: str,
+             month_system: str = "purnimanta") -> Tuple[_dt.date, _dt.date, Tuple[str, ...]]:
+    """Check an export request; raises ValueError."""
+    from panchang3 import parse_date, resolve_fields
+    first, last = parse_date(start), parse_date(end)
+    if last < first:
+        raise ValueError("end must not be before start")
+    if first < MIN_DATE or last > MAX_DATE:
+        raise ValueError(f"dates must lie within {MIN_DATE}..{MAX_DATE}")
+    wanted = resolve_fields(fields)
+    unsupported = sorted(wanted - set(EXPORT_FIELDS))
+    if unsupported:
+        raise ValueError(f"fields not available in columnar exports: {', '.join(unsupported)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    if month_system not in ("amanta", "purnimanta"):
+        raise ValueError("month_system must be 'amanta' or 'purnimanta'")
+    return first, last, tuple(f for f in EXPORT_FIELDS if f in wanted)
+
+def tasks(locations: Sequence[Location], first: _dt.date, last: _dt.date) -> Iterator[Task]:
+    """One task per location and calendar year, location by location."""
+    for code, loc in enumerate(locations):
+        for year in range(first.year, last.year + 1):
+            yield Task(code, loc, max(first, _dt.date(year, 1, 1)), min(last, _dt.date(year, 12, 31)))
+
+# -------------------------
+# Schema
+# -------------------------
+def _names() -> Dict[str, List[str]]:
+    from festivals3 import FESTIVAL_NAMES
+    from panchang3 import KARANA_CORE, KARANA_LAST4, LUNAR_MONTHS, NAKSHATRA, RASHIS, YOGA, tithi_label
+    return {
+        "tithi": [tithi_label(i) for i in range(1, 31)],
+        "paksha": ["Shukla", "Krishna"],
+        "nakshatra": list(NAKSHATRA),
+        "yoga": list(YOGA),
+        "karana": KARANA_CORE + KARANA_LAST4,
+        "vara": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"],
+        "rashi": list(RASHIS),
+        "lunar_month": list(LUNAR_MONTHS),
+        "festival": list(FESTIVAL_NAMES),
+    }
+
+# column -> dictionary of its names
+DICTIONARY_COLUMNS = {
+    "tithi": "tithi", "paksha": "paksha", "nakshatra": "nakshatra", "yoga": "yoga",
+    "karana": "karana", "vara": "vara", "moon_rashi": "rashi", "sun_rashi": "rashi",
+    "lunar_month_amanta": "lunar_month", "lunar_month_purnimanta": "lunar_month",
+    "lunar_month": "lunar_month", "kshaya_tithi": "tithi",
+}
+TIME_COLUMNS = ("sunrise", "sunset", "tithi_end", "nakshatra_end", "yoga_end", "karana_end")
+
+def columns(fields: Sequence[str]) -> List[str]:
+    out = ["location", "lat", "lon", "date", "sunrise", "sunset", "tithi", "paksha",
+           "nakshatra", "nakshatra_pada", "yoga", "karana", "vara", "moon_rashi", "sun_rashi"]
+    if "lunar_month" in fields:
+        out += ["lunar_month_amanta", "lunar_month_purnimanta", "lunar_month"]
+    if "festivals" in fields:
+        out += ["festivals"]
+    if "transitions" in fields:
+        out += ["tithi_end", "nakshatra_end", "yoga_end", "karana_end", "tithi_vriddhi", "kshaya_tithi"]
+    return out
+
+def schema(fields: Sequence[str], locations: Sequence[Location]):
+    pa = _pyarrow()
+    label = pa.dictionary(pa.int8(), pa.string())
+    types = {
+        "location": pa.dictionary(pa.int32(), pa.string()),
+        "lat": pa.float64(), "lon": pa.float64(), "date": pa.date32(),
+        "nakshatra_pada": pa.int8(), "tithi_vriddhi": pa.bool_(),
+        "festivals": pa.list_(label),
+    }
+    types.update((c, label) for c in DICTIONARY_COLUMNS)
+    types.update((c, pa.timestamp("s", tz="UTC")) for c in TIME_COLUMNS)
+    meta = {"format": "panchang-columnar", "version": str(EXPORT_VERSION), "fields": ",".join(fields),
+            "locations": ";".join(f"{location_label(l)}|{l.lat}|{l.lon}|{l.tz}" for l in locations)}
+    return pa.schema([(c, types[c]) for c in columns(fields)], metadata=meta)
+
+# -------------------------
+# Record batches
+# -------------------------
+_PHASES: Dict[Tuple, Dict[int, np.ndarray]] = {}
+
+def _year_phases(first: _dt.date, last: _dt.date, precision: str) -> Dict[int, np.ndarray]:
+    """New/full moons of a task's dates, searched once per year in each process."""
+    from panchang_range import moon_phase_series_for_dates
+    key = (first.year, precision)
+    phases = _PHASES.get(key)
+    if phases is None:
+        if len(_PHASES) >= 512:
+            _PHASES.clear()
+        phases = _PHASES[key] = moon_phase_series_for_dates(
+            _dt.date(first.year, 1, 1), _dt.date(first.year, 12, 31), precision)
+    return phases
+
+def _times(values: List[Optional[str]]) -> np.ndarray:
+    return np.array([v[:-1] if v else "NaT" for v in values], dtype="datetime64[s]")
+
+def compute_batch(task: Task, fields: Sequence[str], locations: Sequence[Location], month_system: str,
+                  ayanamsa: str, precision: str):
+    """Record batch of one task: a range-engine call turned into columns."""
+    from panchang_range import get_panchang_range
+    pa = _pyarrow()
+    loc = task.loc
+    phases = _year_phases(task.first, task.last, precision) if "lunar_month" in fields else None
+    rows = get_panchang_range(task.first, task.last, loc.lat, loc.lon, month_system=month_system,
+                              fields=",".join(fields), ayanamsa=ayanamsa, tz=loc.tz,
+                              precision=precision, phases=phases)
+    names = _names()
+    codes = {d: {name: i for i, name in enumerate(values)} for d, values in names.items()}
+    n = len(rows)
+    sch = schema(fields, locations)
+    arrays: List[Any] = []
+    for col in sch.names:
+        if col == "location":
+            arrays.append(pa.DictionaryArray.from_arrays(
+                pa.array(np.full(n, task.code, dtype=np.int32)),
+                pa.array([location_label(l) for l in locations])))
+        elif col in ("lat", "lon"):
+            arrays.append(pa.array(np.full(n, getattr(loc, col))))
+        elif col == "date":
+            arrays.append(pa.array([_dt.date.fromisoformat(r["date"]) for r in rows], pa.date32()))
+        elif col == "nakshatra_pada":
+            arrays.append(pa.array([r["nakshatra_pada"] for r in rows], pa.int8()))
+        elif col == "vara":
+            arrays.append(_labels([r["var"] for r in rows], codes["vara"], names["vara"]))
+        elif col in ("tithi_vriddhi", "kshaya_tithi") or col.endswith("_end"):
+            values = [r["transitions"][col] for r in rows]
+            if col == "tithi_vriddhi":
+                arrays.append(pa.array(values, pa.bool_()))
+            elif col == "kshaya_tithi":
+                arrays.append(_labels(values, codes["tithi"], names["tithi"]))
+            else:
+                arrays.append(pa.array(_times(values), sch.field(col).type))
+        elif col in TIME_COLUMNS:
+            arrays.append(pa.array(_times([r[col] for r in rows]), sch.field(col).type))
+        elif col == "lunar_month":
+            arrays.append(_labels([r["lunar_month_chosen"] for r in rows],
+                                  codes["lunar_month"], names["lunar_month"]))
+        elif col == "festivals":
+            lookup = codes["festival"]
+            offsets = np.zeros(n + 1, dtype=np.int32)
+            np.cumsum([len(r["festivals"]) for r in rows], out=offsets[1:])
+            flat = [lookup[f] for r in rows for f in r["festivals"]]
+            arrays.append(pa.ListArray.from_arrays(
+                pa.array(offsets), pa.DictionaryArray.from_arrays(pa.array(flat, pa.int8()),
+                                                                  pa.array(names["festival"]))))
+        else:
+            d = DICTIONARY_COLUMNS[col]
+            arrays.append(_labels([r[col] for r in rows], codes[d], names[d]))
+    return pa.RecordBatch.from_arrays(arrays, schema=sch)
+
+def _labels(values: List[Optional[str]], lookup: Dict[str, int], dictionary: List[str]):
+    pa = _pyarrow()
+    return pa.DictionaryArray.from_arrays(
+        pa.array([None if v is None else lookup[v] for v in values], pa.int8()), pa.array(dictionary))
+
+def _run_task(args):
+    return compute_batch(*args)
+
+def batches(locations: Sequence[Location], first: _dt.date, last: _dt.date, fields: Sequence[str],
+            month_system: str = "purnimanta", ayanamsa: str = DEFAULT_AYANAMSA,
+            precision: str = DEFAULT_PRECISION, workers: int = 1) -> Iterator[Any]:
+    """Record batches of every task in order, computed on `workers` processes (1: in this one)."""
+    jobs = ((t, tuple(fields), locations, month_system, ayanamsa, precision)
+            for t in tasks(locations, first, last))
+    workers = min(workers, len(locations) * (last.year - first.year + 1))
+    if workers <= 1:
+        for job in jobs:
+            yield _run_task(job)
+        return
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    # spawn: forking a threaded server process is unsafe
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    pending: Deque = deque()
+    try:
+        for job in jobs:
+            pending.append(pool.submit(_run_task, job))
+            if len(pending) >= workers * (1 + TASKS_AHEAD):
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+# -------------------------
+# Writing
+# -------------------------
+class _Sink(io.RawIOBase):
+    """Write-only file object whose bytes are collected by the streaming response."""
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.size
+
+    def take(self) -> bytes:
+        out, self.parts = b"".join(self.parts), []
+        return out
+
+def _writer(sink, fmt: str, sch):
+    pa = _pyarrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(sink, sch, compression="zstd")
+    options = pa.ipc.IpcWriteOptions(compression="zstd")
+    if fmt == "feather":
+        return pa.ipc.new_file(sink, sch, options=options)
+    return pa.ipc.new_stream(sink, sch, options=options)
+
+def row_groups(source: Iterator[Any], sch) -> Iterator[Any]:
+    """Batches combined into tables of about ROW_GROUP_ROWS rows."""
+    pa = _pyarrow()
+    buffered: List[Any] = []
+    size = 0
+    for batch in source:
+        buffered.append(batch)
+        size += batch.num_rows
+        if size >= ROW_GROUP_ROWS:
+            yield pa.Table.from_batches(buffered, sch).combine_chunks()
+            buffered, size = [], 0
+    if buffered:
+        yield pa.Table.from_batches(buffered, sch).combine_chunks()
+
+def export(path: str, locations: Sequence[Location], start, end, fields: str = DEFAULT_FIELDS,
+           fmt: str = "parquet", month_system: str = "purnimanta", ayanamsa: str = DEFAULT_AYANAMSA,
+           precision: str = DEFAULT_PRECISION, workers: int = 1, progress=None) -> int:
+    """Write a dataset file (written to path + ".tmp", then renamed). Returns the rows written."""
+    first, last, wanted = validate(start, end, fields, fmt, month_system)
+    ayanamsa, precision = validate_ayanamsa(ayanamsa), validate_precision(precision)
+    sch = schema(wanted, locations)
+    source = batches(locations, first, last, wanted, month_system, ayanamsa, precision, workers)
+    if progress is not None:
+        source = progress(source)
+    tmp = path + ".tmp"
+    rows = 0
+    try:
+        with open(tmp, "wb") as fh:
+            writer = _writer(fh, fmt, sch)
+            try:
+                for table in row_groups(source, sch):
+                    writer.write_table(table)
+                    rows += table.num_rows
+            finally:
+                writer.close()
+    except BaseException:
+        os.remove(tmp)
+        raise
+    os.replace(tmp, path)
+    return rows
+
+def stream(locations: Sequence[Location], first: _dt.date, last: _dt.date, fields: Sequence[str],
+           fmt: str, month_system: str = "purnimanta", ayanamsa: str = DEFAULT_AYANAMSA,
+           precision: str = DEFAULT_PRECISION, workers: int = 1) -> Iterator[bytes]:
+    """The encoded dataset as byte chunks (one per row group), for streaming responses."""
+    sink = _Sink()
+    sch = schema(fields, locations)
+    writer = _writer(sink, fmt, sch)
+    yield sink.take()
+    for table in row_groups(batches(locations, first, last, fields, month_system, ayanamsa,
+                                    precision, workers), sch):
+        writer.write_table(table)
+        yield sink.take()
+    writer.close()
+    yield sink.take()
+
+# -------------------------
+# CLI
+# -------------------------
+def _read_points(path: str) -> List[Location]:
+    """CSV of name,lat,lon[,tz] rows (a header row is skipped)."""
+    import csv
+    out = []
+    with open(path, newline="", encoding="utf-8") as fh:
+        for row in csv.reader(fh):
+            if not row or row[0].strip().lower() in ("name", "city"):
+                continue
+            loc = resolve_location(None, float(row[1]), float(row[2]))
+            tz = row[3].strip() if len(row) > 3 and row[3].strip() else loc.tz
+            out.append(Location(loc.lat, loc.lon, tz, row[0].strip()))
+    return out
+
+if __name__ == "__main__":
+    import argparse
+    import resource
+    import sys
+    import time
+
+    ap = argparse.ArgumentParser(description="Export a panchang dataset to Parquet, Feather or an Arrow stream.")
+    ap.add_argument("--cities", default="all", help='comma separated city names or lat:lon pairs, "all", or "" with --points')
+    ap.add_argument("--points", help="CSV file of name,lat,lon[,tz] locations")
+    ap.add_argument("--start", required=True, help=f"first date, {MIN_DATE} or later (de421 span)")
+    ap.add_argument("--end", required=True, help=f"last date, {MAX_DATE} or earlier (de421 span)")
+    ap.add_argument("--fields", default=DEFAULT_FIELDS)
+    ap.add_argument("--format", default="parquet", choices=list(FORMATS))
+    ap.add_argument("--month-system", default="purnimanta", choices=["amanta", "purnimanta"])
+    ap.add_argument("--ayanamsa", default=DEFAULT_AYANAMSA)
+    ap.add_argument("--precision", default=DEFAULT_PRECISION)
+    ap.add_argument("--workers", type=int, default=config.EXPORT_WORKERS or os.cpu_count() or 1)
+    ap.add_argument("--out", required=True)
+    args = ap.parse_args()
+
+    locs = (resolve_locations(args.cities.split(",")) if args.cities else []) \
+        + (_read_points(args.points) if args.points else [])
+    started = time.perf_counter()
+
+    def report(source):
+        rows = 0
+        for n, batch in enumerate(source, 1):
+            rows += batch.num_rows
+            if n % 100 == 0:
+                elapsed = time.perf_counter() - started
+                print(f"{rows} rows, {rows / elapsed:.0f} rows/s, "
+                      f"max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024} MB",
+                      file=sys.stderr)
+            yield batch
+
+    if not locs:
+        ap.error("no locations")
+    total = export(args.out, locs, args.start, args.end,
+                   args.fields, args.format, args.month_system, args.ayanamsa, args.precision,
+                   args.workers, progress=report)
+    elapsed = time.perf_counter() - started
+    print(f"{total} rows ({len(locs)} locations) in {elapsed:.1f}s "
+          f"({total / elapsed:.0f} rows/s) -> {args.out}", file=sys.stderr)
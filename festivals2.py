@@ -2,9 +2,9 @@
 
 from datetime import datetime, timedelta
 from panchang2 import get_panchang, get_sun_moon_longitudes, _ts, _eph
-from skyfield import almanac
+from panchang2 import get_sunrise_time as _context_sunrise
 from skyfield.almanac import find_discrete
-from skyfield.api import Topos
+from location_context import get_context
 
 '''def _get_hindu_month(date, lat, lon):
     """Hindu month calculation with seasonal adjustment"""
@@ -36,14 +36,13 @@ from skyfield.api import Topos
     
     return hindu_months[zodiac_sign]'''
 
-def _find_previous_new_moon(t, lat, lon):
+def _find_previous_new_moon(t, lat, lon, ctx=None):
     """Find the time of the previous New Moon (Amavasya) using astronomical calculations"""
     from skyfield.almanac import find_discrete
     
-    earth = _eph['earth']
     sun = _eph['sun']
     moon = _eph['moon']
-    observer = earth + Topos(latitude_degrees=lat, longitude_degrees=lon)
+    observer = (ctx or get_context(lat, lon)).observer
     
     # Search backwards 35 days to find the last New Moon
     search_start = t.utc_datetime() - timedelta(days=35)
@@ -51,8 +50,9 @@ def _find_previous_new_moon(t, lat, lon):
     
     # Function to detect New Moon (Sun and Moon conjunction)
     def is_new_moon(t):
-        sun_app = observer.at(t).observe(sun).apparent()
-        moon_app = observer.at(t).observe(moon).apparent()
+        here = observer.at(t)
+        sun_app = here.observe(sun).apparent()
+        moon_app = here.observe(moon).apparent()
         sun_lon = sun_app.ecliptic_latlon()[1].degrees
         moon_lon = moon_app.ecliptic_latlon()[1].degrees
         separation = abs((moon_lon - sun_lon) % 360)
@@ -91,11 +91,12 @@ def _find_new_moon_fallback(t):
     # Ultimate fallback: approximate 29.5 days cycle
     return _ts.utc(t.utc_datetime() - timedelta(days=15))
     
-def _get_hindu_month(date, lat, lon):
+def _get_hindu_month(date, lat, lon, ctx=None):
     """Simplified but more reliable Hindu month calculation"""
     dt_date = datetime.strptime(date, "%Y-%m-%d").date()
-    t = get_sunrise_time(dt_date, lat, lon)
-    sun_lon, _ = get_sun_moon_longitudes(t, lat, lon)
+    ctx = ctx or get_context(lat, lon)
+    t = get_sunrise_time(dt_date, lat, lon, ctx)
+    sun_lon, _ = get_sun_moon_longitudes(t, lat, lon, ctx)
     
     # Use the traditional mapping that actually works
     # Based on your testing, this mapping gives correct results:
@@ -136,13 +137,13 @@ def _is_shukla_chaturthi(tithi_data):
     return (tithi_data["name"] == "Chaturthi" and 
             tithi_data["paksha"] == "Shukla")
 
-def get_festivals(date, panchang, lat=28.61, lon=77.23):
+def get_festivals(date, panchang, lat=28.61, lon=77.23, ctx=None):
     """Get Hindu festivals for the given date and panchang data"""
     festivals = []
     
     tithi = panchang["tithi"]
     nakshatra = panchang["nakshatra"]["name"]
-    hindu_month = _get_hindu_month(date, lat, lon)
+    hindu_month = _get_hindu_month(date, lat, lon, ctx)
     
     # DEBUG: Print all values
     print(f"DEBUG: Date={date}, Tithi={tithi['name']} {tithi['paksha']}, "
@@ -217,20 +218,6 @@ def get_festivals(date, panchang, lat=28.61, lon=77.23):
     return festivals
 
 # Helper function to get sunrise time (needed for Hindu month calculation)
-def get_sunrise_time(dt_date, lat, lon):
-    """Get sunrise time for a date"""
-    from skyfield.api import Topos
-    
-    topos = Topos(latitude_degrees=lat, longitude_degrees=lon)
-    t0 = _ts.utc(dt_date.year, dt_date.month, dt_date.day, 0, 0)
-    t1 = _ts.utc(dt_date.year, dt_date.month, dt_date.day, 23, 59)
-    
-    f = almanac.sunrise_sunset(_eph, topos)
-    times, events = find_discrete(t0, t1, f)
-    
-    for t, e in zip(times, events):
-        if e:  # True indicates sunrise
-            return t
-    
-    # Fallback for polar regions
-    return _ts.utc(dt_date.year, dt_date.month, dt_date.day, 6, 0)
\ No newline at end of file
+def get_sunrise_time(dt_date, lat, lon, ctx=None):
+    """Get sunrise time for a date (same UTC-day search as panchang2, shared through the context)"""
+    return _context_sunrise(dt_date, lat, lon, ctx)
\ No newline at end of file
@@ -0,0 +1,92 @@
+# festivals3.py
+"""
+Festival detection for panchang3 results.
+
+Rules are written in the purnimanta month convention (Kartika Amavasya,
+Bhadrapada Krishna Ashtami, ...), the same one festivals2.py uses, and are
+matched against the tithi at sunrise plus the resolved lunar month instead of
+re-deriving the month from a second sunrise search. Makar Sankranti follows
+the sidereal Makara ingress (solar.py) rather than a lunar rule.
+"""
+
+from typing import Dict, List, Optional, Set
+import datetime as _dt
+
+# (festival, purnimanta month, paksha, tithi number within the paksha, required nakshatra)
+FESTIVAL_RULES = [
+    ("Diwali", "Kartika", "Krishna", 15, None),                          # 🪔
+    ("Krishna Janmashtami", "Bhadrapada", "Krishna", 8, "Rohini"),       # 🌌
+    ("Holi", "Phalguna", "Shukla", 15, None),                            # 🌈
+    ("Karva Chauth", "Kartika", "Krishna", 4, None),                     # 🪔
+    ("Raksha Bandhan", "Shravana", "Shukla", 15, None),                  # 🎇
+    ("Ganesh Chaturthi", "Bhadrapada", "Shukla", 4, None),               # 🙏
+    ("Maha Shivratri", "Phalguna", "Krishna", 14, None),                 # 🕉️
+    ("Sharadiya Navratri Begins", "Ashwin", "Shukla", 1, None),          # 🪔
+    ("Dussehra / Vijayadashami", "Ashwin", "Shukla", 10, None),          # 🌺
+    ("Ram Navami", "Chaitra", "Shukla", 9, None),                        # 🌼
+    ("Chhath Puja", "Kartika", "Shukla", 6, None),                       # 🪔
+]
+
+# every name get_festivals() can return
+FESTIVAL_NAMES = [rule[0] for rule in FESTIVAL_RULES] + ["Makar Sankranti"]
+
+def tithi_in_paksha(tithi_index: int) -> int:
+    """1..30 tithi index -> 1..15 within its paksha."""
+    return tithi_index if tithi_index <= 15 else tithi_index - 15
+
+def match_rules(tithi_index: int, purnimanta_month: str,
+                nakshatra: Optional[str] = None) -> List[str]:
+    """Festival names whose (month, paksha, tithi[, nakshatra]) rule matches."""
+    paksha = "Shukla" if tithi_index <= 15 else "Krishna"
+    num = tithi_in_paksha(tithi_index)
+    out = []
+    for name, month, rule_paksha, rule_num, rule_nak in FESTIVAL_RULES:
+        if month != purnimanta_month or rule_paksha != paksha or rule_num != num:
+            continue
+        if rule_nak is not None and rule_nak != nakshatra:
+            continue
+        out.append(name)
+    return out
+
+def makar_sankranti_days(first: _dt.date, last: _dt.date, lat: float, lon: float,
+                         tz: Optional[str] = None, ayanamsa: str = "lahiri") -> Set[_dt.date]:
+    """Local dates in [first, last] observed as Makar Sankranti."""
+    from solar import MAKARA, sankranti_day
+    out = set()
+    for year in range(first.year, last.year + 1):
+        # the ingress falls on Jan 13-16 throughout 1900-2049; skip years the range misses
+        if first <= _dt.date(year, 1, 20) and last >= _dt.date(year, 1, 10):
+            day = sankranti_day(MAKARA, year, lat, lon, tz, ayanamsa)
+            if day is not None and first <= day <= last:
+                out.add(day)
+    return out
+
+def get_festivals(panchang: Dict, purnimanta_month: str,
+                  kshaya_tithi: Optional[int] = None, repeated: bool = False,
+                  makar_sankranti: bool = False) -> List[str]:
+    """
+    Festivals for a panchang3 result dict (needs the core section).
+
+    With the udaya scan of the range engine:
+    - kshaya_tithi: index of a tithi that starts and ends inside this day; it
+      never touches a sunrise, so its festivals are observed on this day.
+    - repeated: the sunrise tithi already prevailed at yesterday's sunrise
+      (vriddhi); its festivals went to yesterday and are not repeated here.
+    makar_sankranti: this day is in makar_sankranti_days().
+    """
+    tithi_index = panchang["tithi_index"]
+    festivals = []
+    if not repeated:
+        festivals += match_rules(tithi_index, purnimanta_month, panchang["nakshatra"])
+    if kshaya_tithi is not None:
+        month = purnimanta_month
+        # a kshaya Krishna Pratipada after a Shukla sunrise already belongs to the next purnimanta month
+        if tithi_index <= 15 < kshaya_tithi:
+            from panchang3 import next_lunar_month
+            month = next_lunar_month(month)
+        festivals += match_rules(kshaya_tithi, month, panchang["nakshatra"])
+
+    # 🎆 Makar Sankranti - Sun enters sidereal Capricorn
+    if makar_sankranti:
+        festivals.append("Makar Sankranti")
+    return festivals
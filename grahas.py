@@ -0,0 +1,108 @@
+# grahas.py
+"""
+Sidereal positions of the nine grahas over arrays of instants.
+
+All bodies are observed from one observer position per call (one vectorized
+observe() per body over the whole time array), Rahu is computed analytically
+(mean or true lunar node, Meeus ch. 47) and Ketu is Rahu + 180. Longitudes use
+the same frame (mean ecliptic of date) and ayanamsa models as
+panchang3.sun_moon_longitudes, so Surya and Chandra agree with the panchang limbs.
+"""
+
+from typing import Dict, List, Union
+
+import numpy as np
+
+from ayanamsa import DEFAULT_AYANAMSA, ayanamsa_deg, tropical_of_date
+from panchang3 import EPH, TS, NAKSHATRA, NAKSHATRA_SPAN, RASHIS, observer_at
+
+GRAHAS = ["Surya", "Chandra", "Mangala", "Budha", "Guru", "Shukra", "Shani", "Rahu", "Ketu"]
+
+# ephemeris targets for the seven visible grahas, in GRAHAS order
+_BODIES = ["sun", "moon", "mars barycenter", "mercury", "jupiter barycenter", "venus", "saturn barycenter"]
+
+NODE_MODES = ("mean", "true")
+
+# -------------------------
+# Lunar node (analytic)
+# -------------------------
+def _centuries(jd_tt: np.ndarray) -> np.ndarray:
+    return (jd_tt - 2451545.0) / 36525.0
+
+def mean_node_deg(jd_tt: np.ndarray) -> np.ndarray:
+    """Mean ascending node of the Moon, mean equinox of date (Meeus 47.7)."""
+    t = _centuries(jd_tt)
+    return (125.0445479 - 1934.1362891 * t + 0.0020754 * t**2
+            + t**3 / 467441.0 - t**4 / 60616000.0) % 360.0
+
+def true_node_deg(jd_tt: np.ndarray) -> np.ndarray:
+    """Mean node plus the main periodic terms (Meeus ch. 47), equinox of date."""
+    t = _centuries(jd_tt)
+    d = np.radians(297.8501921 + 445267.1114034 * t - 0.0018819 * t**2 + t**3 / 545868.0)
+    m = np.radians(357.5291092 + 35999.0502909 * t - 0.0001536 * t**2)
+    mp = np.radians(134.9633964 + 477198.8675055 * t + 0.0087414 * t**2 + t**3 / 69699.0)
+    f = np.radians(93.2720950 + 483202.0175233 * t - 0.0036539 * t**2 - t**3 / 3526000.0)
+    corr = (-1.4979 * np.sin(2 * (d - f)) - 0.1500 * np.sin(m) - 0.1226 * np.sin(2 * d)
+            + 0.1176 * np.sin(2 * f) - 0.0801 * np.sin(2 * (mp - f)))
+    return (mean_node_deg(jd_tt) + corr) % 360.0
+
+# -------------------------
+# Positions
+# -------------------------
+def graha_longitudes(time_obj, observer=None, node: str = "true",
+                     ayanamsa: str = DEFAULT_AYANAMSA) -> np.ndarray:
+    """
+    Sidereal longitudes (degrees) as an (n_times, 9) array, columns in GRAHAS
+    order. time_obj: a Skyfield Time (scalar or array) or TT Julian dates.
+    """
+    if node not in NODE_MODES:
+        raise ValueError(f"node must be one of {', '.join(NODE_MODES)}")
+    if not hasattr(time_obj, "tt"):
+        time_obj = TS.tt_jd(np.asarray(time_obj, dtype=float))
+    jd = np.atleast_1d(time_obj.tt)
+    t = time_obj if np.ndim(time_obj.tt) else TS.tt_jd(jd)
+
+    obs = observer_at(observer, t)
+    ayan = ayanamsa_deg(jd, ayanamsa)
+
+    out = np.empty((len(jd), len(GRAHAS)))
+    for k, body in enumerate(_BODIES):
+        lon = obs.observe(EPH[body]).apparent().ecliptic_latlon()[1].degrees
+        out[:, k] = tropical_of_date(lon, jd) - ayan
+    rahu = true_node_deg(jd) if node == "true" else mean_node_deg(jd)
+    out[:, 7] = rahu - ayan
+    out[:, 8] = rahu + 180.0 - ayan
+    return out % 360.0
+
+def graha_lookup(lons: np.ndarray) -> Dict[str, np.ndarray]:
+    """Rashi index, nakshatra index and pada for an array of sidereal longitudes."""
+    lons = np.asarray(lons)
+    return {
+        "rashi": (lons // 30.0).astype(int) % 12,
+        "nakshatra": (lons // NAKSHATRA_SPAN).astype(int) % 27,
+        "pada": ((lons % NAKSHATRA_SPAN) // (NAKSHATRA_SPAN / 4)).astype(int) + 1,
+    }
+
+def graha_positions(row: np.ndarray) -> List[Dict[str, Union[str, float, int]]]:
+    """One row of graha_longitudes() as named positions."""
+    look = graha_lookup(row)
+    return [{
+        "graha": name,
+        "longitude": round(float(row[k]), 4),
+        "rashi": RASHIS[look["rashi"][k]],
+        "nakshatra": NAKSHATRA[look["nakshatra"][k]],
+        "pada": int(look["pada"][k]),
+    } for k, name in enumerate(GRAHAS)]
+
+# -------------------------
+# CLI test
+# -------------------------
+if __name__ == "__main__":
+    import time
+    t0 = TS.utc(2025, 1, 1).tt
+    jd = t0 + np.arange(3650)
+    t = time.perf_counter()
+    lons = graha_longitudes(jd)
+    print(f"10 years x 9 grahas: {time.perf_counter() - t:.3f}s, shape {lons.shape}")
+    for p in graha_positions(lons[0]):
+        print(p)
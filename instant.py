@@ -0,0 +1,151 @@
+# instant.py
+"""
+Panchang at any instant, answered from cached transition series.
+
+The engines evaluate the panchang at sunrise. panchang_at() instead gives
+the tithi, nakshatra (with pada), yoga, karana and moon rashi current at an
+arbitrary instant, with the time each began and ends, without evaluating the
+ephemeris per query:
+
+- the transitions of a location are computed for fixed BLOCK_DAYS blocks of
+  time (plus a margin on both sides longer than any of these limbs), with the
+  range engine's transition search, so the times are the same topocentric
+  ones as the /panchang "transitions" section;
+- blocks are kept in an LRU of PANCHANG_INSTANT_BLOCKS entries, keyed by
+  location, ayanamsa, precision and block number, together with their UTC
+  timestamps already formatted;
+- a query is one binary search per limb into the block holding the instant.
+
+A block costs one transition search (tens of ms) per location every
+BLOCK_DAYS days; every other query takes microseconds.
+"""
+
+import datetime as _dt
+from typing import Dict, List, NamedTuple, Tuple, Union
+
+import numpy as np
+
+import cache
+import config
+from ayanamsa import DEFAULT_AYANAMSA, validate as validate_ayanamsa
+from cities import Location
+from precision import DEFAULT_PRECISION, validate as validate_precision
+
+BLOCK_DAYS = 8.0
+# longer than the longest period of any limb below (moon rashi: ~2.7 days)
+MARGIN_DAYS = 3.0
+MIN_DATE, MAX_DATE = _dt.date(1900, 1, 1), _dt.date(2049, 12, 31)
+
+class Series(NamedTuple):
+    jd: np.ndarray          # TT Julian dates of the transitions
+    index: np.ndarray       # 0-based index of the limb starting there
+    iso: List[str]          # the same instants as UTC ISO strings
+
+BLOCKS = cache.LRUCache(config.INSTANT_BLOCKS)
+
+def _spans() -> Dict[str, float]:
+    from panchang3 import LIMB_SPANS, NAKSHATRA_SPAN
+    return {**LIMB_SPANS, "pada": NAKSHATRA_SPAN / 4.0, "moon_rashi": 30.0}
+
+def _values(vals: Dict) -> Dict:
+    from panchang3 import limb_values
+    return {**limb_values(vals), "pada": vals["sid_moon"], "moon_rashi": vals["sid_moon"]}
+
+def _block(loc: Location, n: int, ayanamsa: str, precision: str) -> Dict[str, Series]:
+    """Transition series of one block, computed on first use."""
+    def compute():
+        from panchang3 import TS
+        from panchang_range import limb_transition_series
+        from location_context import context_for
+        t0 = n * BLOCK_DAYS - MARGIN_DAYS
+        t1 = (n + 1) * BLOCK_DAYS + MARGIN_DAYS
+        spans = _spans()
+        found = limb_transition_series(spans, t0, t1, context_for(loc), spans=spans, values=_values,
+                                       ayanamsa=ayanamsa, precision=precision)
+        return {limb: Series(jd, idx, TS.tt_jd(jd).utc_iso() if len(jd) else [])
+                for limb, (jd, idx) in found.items()}
+    return BLOCKS.get_or_compute((loc.key, ayanamsa, precision, n), compute)
+
+# -------------------------
+# Queries
+# -------------------------
+def _instant(instant: Union[None, str, _dt.datetime]) -> _dt.datetime:
+    """Aware UTC datetime; None is now, naive values are UTC."""
+    if instant is None:
+        dt = _dt.datetime.now(_dt.timezone.utc)
+    elif isinstance(instant, _dt.datetime):
+        dt = instant
+    else:
+        dt = _dt.datetime.fromisoformat(str(instant).strip().replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=_dt.timezone.utc)
+    dt = dt.astimezone(_dt.timezone.utc)
+    if not MIN_DATE <= dt.date() <= MAX_DATE:
+        raise ValueError(f"instant must be within {MIN_DATE}..{MAX_DATE}")
+    return dt
+
+def _current(series: Series, jd: float) -> Tuple[int, str, str]:
+    """(0-based index, start ISO, end ISO) of the period containing jd."""
+    p = int(np.searchsorted(series.jd, jd, side="right"))
+    if not 0 < p < len(series.jd):
+        raise RuntimeError("instant outside its transition block")
+    return int(series.index[p - 1]), series.iso[p - 1], series.iso[p]
+
+def panchang_at(instant: Union[None, str, _dt.datetime], location: Location,
+                ayanamsa: str = DEFAULT_AYANAMSA, precision: str = DEFAULT_PRECISION) -> Dict:
+    """
+    Limbs current at an instant (ISO string or datetime, default now) at a
+    location, each with its start and end (UTC). valid_until is the first end.
+    """
+    from panchang3 import NAKSHATRA, RASHIS, TS, YOGA, karana_from_half_index, tithi_label
+    ayanamsa = validate_ayanamsa(ayanamsa)
+    precision = validate_precision(precision)
+    dt = _instant(instant)
+    jd = TS.from_datetime(dt).tt
+    block = _block(location, int(jd // BLOCK_DAYS), ayanamsa, precision)
+
+    tithi, t_start, t_end = _current(block["tithi"], jd)
+    nak, n_start, n_end = _current(block["nakshatra"], jd)
+    pada, _, p_end = _current(block["pada"], jd)
+    pada = pada % 4 + 1
+    yoga, y_start, y_end = _current(block["yoga"], jd)
+    karana, k_start, k_end = _current(block["karana"], jd)
+    rashi, r_start, r_end = _current(block["moon_rashi"], jd)
+    out = {
+        "at": dt.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "location": location.info(),
+        "tithi": {"name": tithi_label(tithi + 1), "index": tithi + 1,
+                  "paksha": "Shukla" if tithi < 15 else "Krishna", "start": t_start, "end": t_end},
+        "nakshatra": {"name": NAKSHATRA[nak], "index": nak + 1, "pada": pada,
+                      "start": n_start, "end": n_end},
+        "yoga": {"name": YOGA[yoga], "index": yoga + 1, "start": y_start, "end": y_end},
+        "karana": {"name": karana_from_half_index(karana + 1), "index": karana + 1,
+                   "start": k_start, "end": k_end},
+        "moon_rashi": {"name": RASHIS[rashi], "index": rashi + 1, "start": r_start, "end": r_end},
+        "ayanamsa": ayanamsa,
+        "precision": precision,
+    }
+    # ISO strings of the same format sort chronologically
+    out["valid_until"] = min(t_end, n_end, p_end, y_end, k_end, r_end)
+    return out
+
+def stats() -> Dict:
+    return BLOCKS.stats()
+
+# -------------------------
+# CLI
+# -------------------------
+if __name__ == "__main__":
+    import sys
+    import time
+    from cities import resolve_location
+    loc = resolve_location(sys.argv[1] if len(sys.argv) > 1 else "delhi")
+    at = sys.argv[2] if len(sys.argv) > 2 else None
+    t = time.perf_counter()
+    panchang_at(at, loc)
+    print(f"first query (block computed): {(time.perf_counter() - t) * 1000:.1f} ms")
+    t = time.perf_counter()
+    for _ in range(1000):
+        row = panchang_at(at, loc)
+    print(f"cached query: {(time.perf_counter() - t) / 1000 * 1e6:.1f} us")
+    print(row)
@@ -0,0 +1,348 @@
+# jobs.py
+"""
+Background bulk-export jobs, kept off the interactive path.
+
+- Jobs are persisted in a small SQLite queue under config.JOBS_DIR, so queued
+  and half-finished jobs survive a restart.
+- Output is written as one JSONL file per calendar month ("chunks"); progress is
+  recorded per chunk, so a resumed job continues from the first missing chunk.
+- A fixed pool of config.JOB_WORKERS threads runs jobs (bounded concurrency).
+  Each chunk is one range-engine call; before every chunk the worker waits
+  while interactive requests are in flight (see interactive_request()), so
+  bulk work mostly uses idle capacity. The wait is capped at
+  config.JOB_MAX_WAIT seconds, so under steady traffic a job still runs at
+  least one chunk per interval instead of starving. Under the pre-fork
+  server (server.py) only worker 0 runs jobs; enable_shared_gate() keeps
+  every worker's in-flight count in shared memory, so jobs also yield to
+  requests served by the other workers.
+"""
+
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import datetime as _dt
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import config
+
+# -------------------------
+# Interactive priority gate
+# -------------------------
+_gate = threading.Condition()
+_interactive_in_flight = 0
+# pre-fork server: in-flight count of every worker (one slot each), and this worker's slot
+_shared_in_flight = None
+_shared_slot = 0
+# other workers cannot notify _gate, so a shared gate is polled this often (seconds)
+SHARED_POLL = 0.05
+
+def enable_shared_gate(workers: int) -> None:
+    """Share in-flight counts between pre-fork workers; call in the parent before forking."""
+    global _shared_in_flight
+    _shared_in_flight = multiprocessing.get_context("fork").Array("i", max(1, workers), lock=False)
+
+def set_worker(index: int) -> None:
+    """Claim slot `index` of the shared gate in a (re)started worker."""
+    global _shared_slot
+    _shared_slot = index
+    if _shared_in_flight is not None:
+        # a replaced worker may have died with requests in flight
+        _shared_in_flight[index] = 0
+
+def _busy() -> bool:
+    if _shared_in_flight is not None:
+        return any(_shared_in_flight)
+    return _interactive_in_flight > 0
+
+@contextmanager
+def interactive_request() -> Iterator[None]:
+    """Mark an interactive request as in flight for the duration of the block."""
+    global _interactive_in_flight
+    with _gate:
+        _interactive_in_flight += 1
+        if _shared_in_flight is not None:
+            _shared_in_flight[_shared_slot] = _interactive_in_flight
+    try:
+        yield
+    finally:
+        with _gate:
+            _interactive_in_flight -= 1
+            if _shared_in_flight is not None:
+                _shared_in_flight[_shared_slot] = _interactive_in_flight
+            if _interactive_in_flight == 0:
+                _gate.notify_all()
+
+def wait_for_idle(stop: Optional[threading.Event] = None, max_wait: Optional[float] = None) -> bool:
+    """
+    Block while interactive requests are in flight, for at most max_wait
+    seconds (None: no limit). Returns False if it gave up waiting.
+    """
+    deadline = None if max_wait is None else time.monotonic() + max_wait
+    with _gate:
+        while _busy() and not (stop is not None and stop.is_set()):
+            timeout = 0.5 if _shared_in_flight is None else SHARED_POLL
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    return False
+            _gate.wait(timeout=timeout)
+    return True
+
+# -------------------------
+# Job specs
+# -------------------------
+def _parse_day(value) -> _dt.date:
+    if isinstance(value, _dt.date):
+        return value
+    return _dt.date.fromisoformat(str(value))
+
+def validate_spec(spec: Dict) -> Dict:
+    """Normalize a job request; raises ValueError on bad input."""
+    from panchang3 import resolve_fields, validate_ayanamsa
+    from cities import resolve_location
+    from precision import validate as validate_precision
+    try:
+        start = _parse_day(spec["start"])
+        end = _parse_day(spec["end"])
+    except KeyError as e:
+        raise ValueError(f"missing {e.args[0]!r}") from None
+    if end < start:
+        raise ValueError("end must not be before start")
+    days = (end - start).days + 1
+    if days > config.JOB_MAX_DAYS:
+        raise ValueError(f"at most {config.JOB_MAX_DAYS} days per job")
+    fields = spec.get("fields", "core,lunar_month,festivals")
+    resolve_fields(fields)
+    month_system = spec.get("month_system", "purnimanta")
+    if month_system not in ("amanta", "purnimanta"):
+        raise ValueError("month_system must be 'amanta' or 'purnimanta'")
+    loc = resolve_location(spec.get("city"), float(spec.get("lat", 28.61)), float(spec.get("lon", 77.23)))
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "city": loc.city,
+        "lat": loc.lat,
+        "lon": loc.lon,
+        "tz": loc.tz,
+        "fields": fields,
+        "month_system": month_system,
+        "ayanamsa": validate_ayanamsa(spec.get("ayanamsa")),
+        "precision": validate_precision(spec.get("precision")),
+    }
+
+def chunk_ranges(start: _dt.date, end: _dt.date) -> List[Tuple[_dt.date, _dt.date]]:
+    """Split [start, end] at calendar-month boundaries."""
+    out = []
+    cur = start
+    while cur <= end:
+        nxt = (cur.replace(day=1) + _dt.timedelta(days=32)).replace(day=1)
+        last = min(end, nxt - _dt.timedelta(days=1))
+        out.append((cur, last))
+        cur = last + _dt.timedelta(days=1)
+    return out
+
+# -------------------------
+# Persisted queue
+# -------------------------
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    spec TEXT NOT NULL,
+    status TEXT NOT NULL,          -- queued, running, done, failed
+    chunks_total INTEGER NOT NULL,
+    chunks_done INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+)
+"""
+
+class JobStore:
+    """SQLite-backed job table plus the chunk files of each job."""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "jobs.sqlite"), check_same_thread=False)
+        self._db.execute(_SCHEMA)
+        self._db.commit()
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.root, job_id)
+
+    def chunk_path(self, job_id: str, n: int) -> str:
+        return os.path.join(self.job_dir(job_id), f"chunk-{n:04d}.jsonl")
+
+    def create(self, spec: Dict) -> str:
+        job_id = uuid.uuid4().hex
+        start, end = _parse_day(spec["start"]), _parse_day(spec["end"])
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, spec, status, chunks_total, created, updated) VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(spec), len(chunk_ranges(start, end)), now, now))
+            self._db.commit()
+        os.makedirs(self.job_dir(job_id), exist_ok=True)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, spec, status, chunks_total, chunks_done, error, created, updated FROM jobs WHERE id = ?",
+                (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0], "spec": json.loads(row[1]), "status": row[2],
+            "chunks_total": row[3], "chunks_done": row[4], "error": row[5],
+            "created": row[6], "updated": row[7],
+        }
+
+    def claim_next(self) -> Optional[str]:
+        """Atomically move the oldest queued job to running."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1").fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE jobs SET status = 'running', updated = ? WHERE id = ?",
+                             (time.time(), row[0]))
+            self._db.commit()
+            return row[0]
+
+    def set_progress(self, job_id: str, chunks_done: int) -> None:
+        with self._lock:
+            self._db.execute("UPDATE jobs SET chunks_done = ?, updated = ? WHERE id = ?",
+                             (chunks_done, time.time(), job_id))
+            self._db.commit()
+
+    def finish(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._db.execute("UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?",
+                             (status, error, time.time(), job_id))
+            self._db.commit()
+
+    def requeue_interrupted(self) -> int:
+        """Jobs left 'running' by a previous process go back to the queue."""
+        with self._lock:
+            cur = self._db.execute("UPDATE jobs SET status = 'queued', updated = ? WHERE status = 'running'",
+                                   (time.time(),))
+            self._db.commit()
+            return cur.rowcount
+
+# -------------------------
+# Worker pool
+# -------------------------
+def _compute_chunk(first: _dt.date, last: _dt.date, spec: Dict) -> List[Dict]:
+    from panchang_range import get_panchang_range
+    return get_panchang_range(first, last, spec["lat"], spec["lon"],
+                              month_system=spec["month_system"], fields=spec["fields"],
+                              ayanamsa=spec.get("ayanamsa", "lahiri"), tz=spec.get("tz"),
+                              precision=spec.get("precision", "standard"))
+
+class JobRunner:
+    """Runs queued jobs on a fixed number of background threads."""
+
+    def __init__(self, store: JobStore, workers: int = 1, poll_seconds: float = 1.0):
+        self.store = store
+        self.workers = max(1, workers)
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        self.store.requeue_interrupted()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._loop, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            job_id = self.store.claim_next()
+            if job_id is None:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+                continue
+            try:
+                finished = self.run_job(job_id)
+            except Exception as e:
+                self.store.finish(job_id, "failed", str(e))
+            else:
+                if finished:
+                    self.store.finish(job_id, "done")
+
+    def run_job(self, job_id: str) -> bool:
+        """Compute the missing chunks of a job. Returns False if stopped midway."""
+        job = self.store.get(job_id)
+        spec = job["spec"]
+        chunks = chunk_ranges(_parse_day(spec["start"]), _parse_day(spec["end"]))
+        for n, (first, last) in enumerate(chunks):
+            path = self.store.chunk_path(job_id, n)
+            if n < job["chunks_done"] and os.path.exists(path):
+                continue
+            wait_for_idle(self._stop, config.JOB_MAX_WAIT)
+            if self._stop.is_set():
+                return False
+            rows = _compute_chunk(first, last, spec)
+            tmp = path + ".tmp"
+            with open(tmp, "w") as fh:
+                for row in rows:
+                    fh.write(json.dumps(row) + "\n")
+            os.replace(tmp, path)
+            self.store.set_progress(job_id, n + 1)
+        return True
+
+# -------------------------
+# Module-level runner used by the API
+# -------------------------
+_store: Optional[JobStore] = None
+_runner: Optional[JobRunner] = None
+
+def get_store() -> JobStore:
+    global _store
+    if _store is None:
+        _store = JobStore(config.JOBS_DIR)
+    return _store
+
+def start() -> None:
+    global _runner
+    if _runner is None:
+        _runner = JobRunner(get_store(), workers=config.JOB_WORKERS)
+        _runner.start()
+
+def stop() -> None:
+    global _runner
+    if _runner is not None:
+        _runner.stop()
+        _runner = None
+
+def submit(spec: Dict) -> str:
+    job_id = get_store().create(validate_spec(spec))
+    if _runner is not None:
+        _runner.notify()
+    return job_id
+
+def status(job_id: str) -> Optional[Dict]:
+    job = get_store().get(job_id)
+    if job is None:
+        return None
+    job["chunks"] = [f"/jobs/{job_id}/chunks/{n}" for n in range(job["chunks_done"])]
+    return job
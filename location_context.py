@@ -0,0 +1,88 @@
+# location_context.py
+"""
+Per-location context objects, pooled.
+
+Every engine call used to rebuild the same Skyfield objects for its
+coordinates: the geographic position (Topos / wgs84.latlon), the observer
+vector earth + position, and the almanac.sunrise_sunset callable. A
+LocationContext builds them once and keeps them together with small
+per-location caches:
+
+- sunrises: recent sunrise/sunset Time pairs by (convention, local date),
+  so the next-day sunrise of /panchang transitions, or the legacy engines'
+  repeated sunrise searches, are looked up instead of searched again;
+- the IANA zone and its UTC offsets by date.
+
+Contexts live in a bounded LRU pool (PANCHANG_LOCATION_POOL entries), keyed
+by (lat, lon, tz); get_context() returns the pooled one. Engine functions
+take a context wherever they took an observer, and still accept a plain
+Skyfield position (or lat/lon) and fetch the context themselves.
+"""
+
+import datetime as _dt
+from typing import Any, Callable, Hashable, Optional
+
+from skyfield import almanac
+from skyfield.api import wgs84
+
+import cache
+import config
+
+class LocationContext:
+    """Skyfield observer objects and caches of one (lat, lon, tz)."""
+
+    __slots__ = ("lat", "lon", "tz", "zone", "position", "observer", "sunrise_sunset",
+                 "sunrises", "_offsets")
+
+    def __init__(self, lat: float, lon: float, tz: Optional[str] = None):
+        from panchang3 import EPH
+        self.lat = float(lat)
+        self.lon = float(lon)
+        self.tz = tz or None
+        if self.tz:
+            from zoneinfo import ZoneInfo
+            self.zone = ZoneInfo(self.tz)
+        else:
+            self.zone = None
+        self.position = wgs84.latlon(latitude_degrees=self.lat, longitude_degrees=self.lon)
+        self.observer = EPH["earth"] + self.position
+        self.sunrise_sunset = almanac.sunrise_sunset(EPH, self.position)
+        self.sunrises = cache.LRUCache(config.LOCATION_SUNRISES)
+        self._offsets = cache.LRUCache(config.LOCATION_SUNRISES)
+
+    def at(self, t):
+        """Barycentric position of the observer at t (observer.at(t))."""
+        return self.observer.at(t)
+
+    def utc_offset_hours(self, date_obj: _dt.date) -> float:
+        """panchang3.utc_offset_hours for this location."""
+        if self.zone is None:
+            return self.lon / 15.0
+        key = date_obj.toordinal()
+        off = self._offsets.get(key)
+        if off is None:
+            midnight = _dt.datetime(date_obj.year, date_obj.month, date_obj.day, tzinfo=self.zone)
+            off = midnight.utcoffset().total_seconds() / 3600.0
+            self._offsets.put(key, off)
+        return off
+
+    def cached_sunrise(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """A sunrise result by (convention, date), computed on first use."""
+        return self.sunrises.get_or_compute(key, compute)
+
+    def __repr__(self) -> str:
+        return f"LocationContext({self.lat}, {self.lon}, {self.tz!r})"
+
+POOL = cache.LRUCache(config.LOCATION_POOL)
+
+def get_context(lat: float, lon: float, tz: Optional[str] = None) -> LocationContext:
+    """The pooled context of (lat, lon, tz), built on first use."""
+    key = (float(lat), float(lon), tz or None)
+    return POOL.get_or_compute(key, lambda: LocationContext(*key))
+
+def context_for(location) -> LocationContext:
+    """Context of a cities.Location."""
+    return get_context(location.lat, location.lon, location.tz)
+
+def pool_stats():
+    return POOL.stats()
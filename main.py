@@ -1,22 +1,162 @@
 # main.py (updated)
 
-from fastapi import FastAPI
-from panchang2 import get_panchang
-from festivals2 import get_festivals
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import Body, FastAPI, Request
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
+from panchang_range import get_panchang_range
+from panchang3 import parse_date
+from ayanamsa import validate as validate_ayanamsa
+from precision import DEFAULT_PRECISION, validate as validate_precision
+from cities import Location, nearest_city, resolve_location
+from batcher import BATCHER
+import cache
+import calendar_feed
+import config
+import diagnostics
+import eclipses
+import events
+import export
+import instant
+import jobs
+import location_context
+import prewarm
+import yearpack
 
-app = FastAPI()
+# the pre-fork server (server.py) runs the job queue and the cache pre-warmer in one worker only
+RUN_BACKGROUND = True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    scheduler = None
+    if RUN_BACKGROUND:
+        jobs.start()
+        if config.PREWARM:
+            scheduler = asyncio.create_task(prewarm.run_scheduler())
+    # the event index and eclipse table back /next, the solar calendars and the
+    # eclipse flags; load or build them off the request path
+    threading.Thread(target=_warm_indexes, daemon=True).start()
+    if config.DIAGNOSTICS:
+        diagnostics.start()
+    yield
+    if scheduler is not None:
+        scheduler.cancel()
+    jobs.stop()
+    diagnostics.stop()
+
+def _warm_indexes():
+    from datetime import date
+    events.get_index()
+    eclipses.get_table(date.today().year // 100)
+
+app = FastAPI(lifespan=lifespan)
+
+@app.middleware("http")
+async def interactive_priority(request: Request, call_next):
+    # bulk jobs pause while any non-job request is being served
+    if request.url.path.startswith(("/jobs", "/export")):
+        return await call_next(request)
+    with jobs.interactive_request():
+        return await call_next(request)
+
+PROFILING_DISABLED = "profiling is disabled on this server (set PANCHANG_PROFILING=1)"
+DIAGNOSTICS_DISABLED = "diagnostics are disabled on this server (set PANCHANG_DIAGNOSTICS=1)"
+
+def get_panchang(date, loc: Location, fields=None, ayanamsa="lahiri", precision=DEFAULT_PRECISION):
+    # a one-day range: same rows as /month, including kshaya/vriddhi-aware festivals
+    p = get_panchang_range(date, date, loc.lat, loc.lon, fields=fields, ayanamsa=ayanamsa, tz=loc.tz,
+                           precision=precision)[0]
+    p["location"] = loc.info()
+    return p
+
+def panchang_key(date, loc: Location, fields=None, ayanamsa="lahiri", precision=DEFAULT_PRECISION) -> tuple:
+    return cache.panchang_key(loc, parse_date(date).isoformat(), cache.fields_key(fields),
+                              validate_ayanamsa(ayanamsa), validate_precision(precision))
+
+def cached_panchang(date, loc: Location, fields=None, ayanamsa="lahiri", precision=DEFAULT_PRECISION):
+    ayanamsa = validate_ayanamsa(ayanamsa)
+    precision = validate_precision(precision)
+    fields_key = cache.fields_key(fields)
+    key = panchang_key(date, loc, fields, ayanamsa, precision)
+    prewarm.TRACKER.record(loc, fields_key, ayanamsa, precision, key)
+    if BATCHER.enabled:
+        # misses arriving together are computed together (batcher.py)
+        compute = lambda: BATCHER.submit(loc, parse_date(date), fields, fields_key, ayanamsa, precision)
+    else:
+        compute = lambda: get_panchang(date, loc, fields=fields, ayanamsa=ayanamsa, precision=precision)
+    return cache.RESULTS.get_or_compute(key, compute)
+
+def tagged_json(request: Request, value, precision: str, key: tuple) -> Response:
+    """
+    JSON response with an ETag carrying the precision tier; If-None-Match gets a 304.
+    The tag comes from the cache key and the engine version, not the body: rows
+    computed in different batches or workers can differ in the last digits of
+    their _debug floats, so it is a weak tag.
+    """
+    import hashlib
+    digest = hashlib.sha256(repr((yearpack.PACK_VERSION, key)).encode()).hexdigest()[:32]
+    etag = 'W/"%s-%s"' % (precision, digest)
+    headers = {"ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(JSONResponse(value).body, media_type="application/json", headers=headers)
 
 @app.get("/panchang")
-def daily_panchang(date: str, lat: float = 28.61, lon: float = 77.23):
+def daily_panchang(request: Request, date: str, lat: float = 28.61, lon: float = 77.23,
+                   city: Optional[str] = None, fields: Optional[str] = None, profile: bool = False,
+                   ayanamsa: str = "lahiri", precision: str = DEFAULT_PRECISION):
+    """
+    city: known city by slug or name (overrides lat/lon); the day runs from local
+        midnight to midnight in the city's (or nearest city's) timezone.
+    fields: comma separated sections (core, lunar_month, months, festivals, transitions, grahas,
+        eclipses, debug, all).
+    profile: return stage timings and hot functions in "_profile" (needs PANCHANG_PROFILING=1).
+    ayanamsa: lahiri (default), raman, kp or true_chitrapaksha.
+    precision: fast, standard (default) or reference; the ETag names the tier.
+    """
     try:
-        p = get_panchang(date, lat, lon)
+        loc = resolve_location(city, lat, lon)
+        precision = validate_precision(precision)
+        if profile:
+            if not config.ALLOW_PROFILING:
+                return {"error": PROFILING_DISABLED}
+            from profiling import profile_call
+            # profiled calls bypass the result cache
+            p, report = profile_call(get_panchang, date, loc, fields=fields, ayanamsa=ayanamsa,
+                                     precision=precision)
+            p["_profile"] = report
+            return p
+        p = cached_panchang(date, loc, fields=fields, ayanamsa=ayanamsa, precision=precision)
         if not isinstance(p, dict):
             return {"error": "get_panchang did not return a dict", "value": str(p)}
-        p["festivals"] = get_festivals(date, p, lat, lon)
-        return p
+        return tagged_json(request, p, precision, panchang_key(date, loc, fields, ayanamsa, precision))
     except Exception as e:
         return {"error": str(e)}
+
+@app.get("/locate")
+def locate(lat: Optional[float] = None, lon: Optional[float] = None, city: Optional[str] = None):
+    """Resolved location (coordinates, timezone, cache key) plus the nearest known city."""
+    try:
+        loc = resolve_location(city, lat, lon)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    c, km = nearest_city(loc.lat, loc.lon)
+    return {**loc.info(), "key": loc.key,
+            "nearest": {"city": c.slug, "name": c.name, "country": c.country, "km": round(km, 1)}}
+
+@app.get("/cache")
+def cache_stats():
+    """Result cache entries and hit rates, pre-warm coverage, pooled locations and /now blocks (this worker)."""
+    return {**cache.RESULTS.stats(), "prewarm": prewarm.TRACKER.stats(),
+            "locations": location_context.pool_stats(), "instant_blocks": instant.stats()}
     
+@app.get("/batching")
+def batching_stats():
+    """Micro-batching of /panchang misses: batch sizes, wait times and efficiency (this worker)."""
+    return BATCHER.stats()
+
 @app.get("/debug/hindu_month")
 def debug_hindu_month(date: str, lat: float = 28.61, lon: float = 77.23):
     from festivals import _get_hindu_month
@@ -76,14 +216,251 @@ def debug_sun_position(date: str, lat: float = 28.61, lon: float = 77.23):
         return {"error": str(e)}
 
 @app.get("/month")
-def monthly_panchang(year: int, month: int, lat: float = 28.61, lon: float = 77.23):
+def monthly_panchang(request: Request, year: int, month: int, lat: float = 28.61, lon: float = 77.23,
+                     city: Optional[str] = None, fields: Optional[str] = None, ayanamsa: str = "lahiri",
+                     precision: str = DEFAULT_PRECISION):
     from calendar import monthrange
-    days = monthrange(year, month)[1]
-
-    results = []
-    for d in range(1, days+1):
-        date_str = f"{year}-{month:02d}-{d:02d}"
-        p = get_panchang(date_str, lat, lon)
-        p["festivals"] = get_festivals(date_str, p, lat, lon)
-        results.append(p)
-    return results
\ No newline at end of file
+    try:
+        loc = resolve_location(city, lat, lon)
+        ayanamsa = validate_ayanamsa(ayanamsa)
+        precision = validate_precision(precision)
+        days = monthrange(year, month)[1]
+        key = cache.result_key("month", loc, year, month, cache.fields_key(fields), ayanamsa, precision)
+        rows = cache.RESULTS.get_or_compute(key, lambda: get_panchang_range(
+            f"{year}-{month:02d}-01", f"{year}-{month:02d}-{days:02d}",
+            loc.lat, loc.lon, fields=fields, ayanamsa=ayanamsa, tz=loc.tz, precision=precision))
+        return tagged_json(request, rows, precision, key)
+    except Exception as e:
+        return {"error": str(e)}
+
+@app.post("/jobs")
+def create_job(spec: dict = Body(...)):
+    """
+    Queue a bulk export: {"start": "YYYY-MM-DD", "end": "YYYY-MM-DD", "city" or "lat", "lon",
+    "fields", "month_system"}. Returns the job id; poll GET /jobs/{id}.
+    """
+    try:
+        job_id = jobs.submit(spec)
+    except (ValueError, TypeError) as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse({"id": job_id, "status_url": f"/jobs/{job_id}"}, status_code=202)
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = jobs.status(job_id)
+    if job is None:
+        return JSONResponse({"error": "unknown job"}, status_code=404)
+    return job
+
+@app.get("/jobs/{job_id}/chunks/{n}")
+def job_chunk(job_id: str, n: int):
+    job = jobs.status(job_id)
+    if job is None or not 0 <= n < job["chunks_done"]:
+        return JSONResponse({"error": "chunk not available"}, status_code=404)
+    return FileResponse(jobs.get_store().chunk_path(job_id, n), media_type="application/x-ndjson",
+                        filename=f"{job_id}-{n:04d}.jsonl")
+
+def _yield_to_interactive(chunks):
+    # the next row group is computed only once interactive requests are served
+    for chunk in chunks:
+        yield chunk
+        jobs.wait_for_idle(max_wait=config.JOB_MAX_WAIT)
+
+@app.get("/export")
+def export_dataset(start: str, end: str, cities: Optional[str] = None, lat: float = 28.61, lon: float = 77.23,
+                   fields: str = export.DEFAULT_FIELDS, format: str = "parquet", month_system: str = "purnimanta",
+                   ayanamsa: str = "lahiri", precision: str = DEFAULT_PRECISION):
+    """
+    Columnar dataset of [start, end] for the comma separated cities and
+    lat:lon pairs (or the lat/lon location), streamed as it is computed. format: parquet, feather or
+    arrow (Arrow IPC stream). Computed in this worker, one location-year at a time, pausing
+    between row groups for interactive requests like a job chunk. Larger datasets: python export.py.
+    """
+    try:
+        locs = export.resolve_locations(cities.split(",")) if cities else [resolve_location(None, lat, lon)]
+        first, last, wanted = export.validate(start, end, fields, format, month_system)
+        ayanamsa = validate_ayanamsa(ayanamsa)
+        precision = validate_precision(precision)
+        if len(locs) * ((last - first).days + 1) > config.EXPORT_MAX_DAYS:
+            raise ValueError(f"at most {config.EXPORT_MAX_DAYS} location-days per export; use export.py")
+        export.schema(wanted, locs)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except RuntimeError as e:
+        return JSONResponse({"error": str(e)}, status_code=501)
+    ext, media_type = export.FORMATS[format]
+    return StreamingResponse(
+        _yield_to_interactive(export.stream(locs, first, last, wanted, format, month_system,
+                                            ayanamsa, precision)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="panchang-{first}-{last}.{ext}"'})
+
+@app.get("/packs/manifest.json")
+def pack_manifest(request: Request):
+    """Published year packs with file names and sha256 hashes; revalidate with If-None-Match."""
+    import hashlib, json
+    body = json.dumps(yearpack.manifest(), sort_keys=True).encode("utf-8")
+    etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/packs/files/{file_name}")
+def pack_file(file_name: str, request: Request):
+    # names embed the content hash, so a published file never changes
+    if not yearpack.is_published(file_name):
+        return JSONResponse({"error": "unknown pack file"}, status_code=404)
+    etag = '"%s"' % file_name.rsplit(".", 3)[-3]
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(yearpack.pack_path(file_name), media_type="application/gzip", headers=headers)
+
+@app.get("/packs/{city}/{year}")
+def year_pack(city: str, year: int, month_system: str = "purnimanta"):
+    """Redirect to the current immutable file of a city-year pack, building it if allowed."""
+    try:
+        c = yearpack.validate(city, year, month_system)
+        entry = yearpack.find_pack(c.slug, year, month_system)
+        if entry is None:
+            if not config.PACK_ON_DEMAND:
+                return JSONResponse({"error": "pack not published"}, status_code=404)
+            entry = yearpack.ensure_pack(c.slug, year, month_system)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return RedirectResponse(f"/packs/files/{entry['file']}", status_code=307)
+
+@app.get("/next")
+def next_event(event: str, after: Optional[str] = None, count: int = 1, ayanamsa: str = "lahiri"):
+    """
+    Next occurrences of an event after a date or UTC instant (default: now), e.g.
+    /next?event=ekadashi&after=2025-08-01&count=3. Names: GET /next/events.
+    """
+    try:
+        results = events.next_events(event, after, count, ayanamsa)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return {"event": event, "after": after, "results": results}
+
+@app.get("/next/events")
+def next_event_names():
+    return events.event_names()
+
+@app.get("/now")
+def panchang_now(lat: float = 28.61, lon: float = 77.23, city: Optional[str] = None, at: Optional[str] = None,
+                 ayanamsa: str = "lahiri", precision: str = DEFAULT_PRECISION):
+    """
+    Tithi, nakshatra, yoga, karana and moon rashi current at `at` (ISO instant,
+    default now) with their start and end times, from cached transition series.
+    Without `at` the response may be cached until valid_until (at most a minute).
+    """
+    from datetime import datetime, timezone
+    try:
+        loc = resolve_location(city, lat, lon)
+        result = instant.panchang_at(at, loc, ayanamsa, precision)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    if at is None:
+        until = datetime.fromisoformat(result["valid_until"].replace("Z", "+00:00"))
+        max_age = int(min(60.0, max(0.0, (until - datetime.now(timezone.utc)).total_seconds())))
+    else:
+        max_age = 86400
+    return JSONResponse(result, headers={"Cache-Control": f"public, max-age={max_age}"})
+
+@app.get("/calendar.ics")
+def calendar_ics(request: Request, lat: float = 28.61, lon: float = 77.23, city: Optional[str] = None,
+                 years: int = 1, start: Optional[int] = None, ayanamsa: str = "lahiri",
+                 tithis: str = ",".join(calendar_feed.DEFAULT_TITHIS)):
+    """
+    iCalendar feed of festivals (all-day, local dates) and tithi periods for
+    `years` years from `start` (default: this year), streamed as generated.
+    tithis: comma separated tithi event names of /next (empty for festivals only).
+    """
+    from datetime import date
+    try:
+        loc = resolve_location(city, lat, lon)
+        ayanamsa = validate_ayanamsa(ayanamsa)
+        first = date.today().year if start is None else start
+        names = calendar_feed.validate(first, years, tithis.split(","))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    etag = calendar_feed.etag(loc, first, years, ayanamsa, names)
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return StreamingResponse(
+        (chunk.encode("utf-8") for chunk in calendar_feed.feed(loc, first, years, ayanamsa, names)),
+        media_type="text/calendar; charset=utf-8", headers=headers)
+
+@app.get("/eclipses")
+def eclipse_list(start: str, end: str, lat: float = 28.61, lon: float = 77.23, city: Optional[str] = None,
+                 kind: Optional[str] = None):
+    """
+    Solar and lunar eclipses with greatest eclipse between start and end
+    (YYYY-MM-DD, inclusive), with local visibility for the location.
+    kind: solar or lunar (default both).
+    """
+    try:
+        loc = resolve_location(city, lat, lon)
+        results = eclipses.eclipses(start, end, loc.lat, loc.lon, kind)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return {"start": start, "end": end, "location": loc.info(), "results": results}
+
+@app.get("/ayanamsas")
+def ayanamsa_models():
+    import ayanamsa
+    return ayanamsa.models()
+
+# -------------------------
+# Memory diagnostics (PANCHANG_DIAGNOSTICS=1; per worker process)
+# -------------------------
+def _diagnostics_off():
+    return JSONResponse({"error": DIAGNOSTICS_DISABLED}, status_code=403)
+
+@app.get("/diagnostics/memory")
+def diagnostics_memory(objects: bool = True):
+    """RSS now and over time, gc state, cache sizes in MB and (objects=true) live object counts."""
+    if not config.DIAGNOSTICS:
+        return _diagnostics_off()
+    return diagnostics.memory_report(objects=objects)
+
+@app.get("/diagnostics/tracemalloc")
+def diagnostics_tracemalloc(top: int = 25, group_by: str = "lineno"):
+    """
+    Top allocation sites (group_by: lineno, filename or traceback) and, after
+    POST /diagnostics/tracemalloc/baseline, the growth since the baseline.
+    """
+    if not config.DIAGNOSTICS:
+        return _diagnostics_off()
+    try:
+        return diagnostics.tracemalloc_report(max(1, min(top, 500)), group_by)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except RuntimeError as e:
+        return JSONResponse({"error": str(e)}, status_code=409)
+
+@app.post("/diagnostics/tracemalloc/baseline")
+def diagnostics_baseline():
+    if not config.DIAGNOSTICS:
+        return _diagnostics_off()
+    try:
+        return diagnostics.take_baseline()
+    except RuntimeError as e:
+        return JSONResponse({"error": str(e)}, status_code=409)
+
+@app.post("/diagnostics/tracemalloc/start")
+def diagnostics_start_tracing(frames: int = 1):
+    """Start tracing allocations (frames per traceback); every allocation gets slower while on."""
+    if not config.DIAGNOSTICS:
+        return _diagnostics_off()
+    diagnostics.start_tracing(max(1, min(frames, 50)))
+    return {"tracing": True}
+
+@app.post("/diagnostics/tracemalloc/stop")
+def diagnostics_stop_tracing():
+    if not config.DIAGNOSTICS:
+        return _diagnostics_off()
+    diagnostics.stop_tracing()
+    return {"tracing": False}
@@ -1,12 +1,13 @@
 # panchang.py
 
-from typing import Union, Dict, List, Tuple
-from skyfield.api import load, Topos
-from skyfield import almanac
+from typing import Union, Dict, List, Optional, Tuple
+from skyfield.api import load
 from skyfield.almanac import find_discrete
 import datetime as dt
 import math
 
+from location_context import LocationContext, get_context
+
 # Load ephemeris & timescale once
 _eph = load('de421.bsp')
 _ts = load.timescale()
@@ -65,15 +66,15 @@ def _parse_date(d: Union[str, dt.date, dt.datetime]) -> dt.date:
             raise ValueError("Date must be in 'YYYY-MM-DD' format")
     raise TypeError("Date must be string, datetime.date, or datetime.datetime")
 
-def _get_sun_moon_longitudes(t, lat: float, lon: float) -> Tuple[float, float]:
+def _get_sun_moon_longitudes(t, lat: float, lon: float,
+                             ctx: Optional[LocationContext] = None) -> Tuple[float, float]:
     """Get apparent longitudes of Sun and Moon"""
-    earth = _eph['earth']
     sun = _eph['sun']
     moon = _eph['moon']
-    observer = earth + Topos(latitude_degrees=lat, longitude_degrees=lon)
+    here = (ctx or get_context(lat, lon)).at(t)
     
-    sun_app = observer.at(t).observe(sun).apparent()
-    moon_app = observer.at(t).observe(moon).apparent()
+    sun_app = here.observe(sun).apparent()
+    moon_app = here.observe(moon).apparent()
     
     sun_lon = sun_app.ecliptic_latlon()[1].degrees % 360.0
     moon_lon = moon_app.ecliptic_latlon()[1].degrees % 360.0
@@ -137,14 +138,16 @@ def _calculate_karana(sun_lon: float, moon_lon: float) -> Tuple[int, str]:
     
     return karana_num, karana_name
 
-def get_sunrise_time(date: dt.date, lat: float, lon: float):
-    """Get precise sunrise time for given date and location"""
-    topos = Topos(latitude_degrees=lat, longitude_degrees=lon)
+def get_sunrise_time(date: dt.date, lat: float, lon: float, ctx: Optional[LocationContext] = None):
+    """Get precise sunrise time for given date and location (cached in the location's context)"""
+    ctx = ctx or get_context(lat, lon)
+    return ctx.cached_sunrise(("utc", date.toordinal()), lambda: _search_sunrise(date, ctx))
+
+def _search_sunrise(date: dt.date, ctx: LocationContext):
     t0 = _ts.utc(date.year, date.month, date.day, 0, 0)
     t1 = _ts.utc(date.year, date.month, date.day, 23, 59)
     
-    f = almanac.sunrise_sunset(_eph, topos)
-    times, events = find_discrete(t0, t1, f)
+    times, events = find_discrete(t0, t1, ctx.sunrise_sunset)
     
     for t, e in zip(times, events):
         if e:  # True indicates sunrise
@@ -155,12 +158,14 @@ def get_sunrise_time(date: dt.date, lat: float, lon: float):
 
 def get_panchang(date: Union[str, dt.date, dt.datetime],
                  lat: float = DEFAULT_LAT,
-                 lon: float = DEFAULT_LON) -> Dict:
+                 lon: float = DEFAULT_LON,
+                 ctx: Optional[LocationContext] = None) -> Dict:
     """Compute complete Panchang for the given date and location"""
     dt_date = _parse_date(date)
-    sunrise_time = get_sunrise_time(dt_date, lat, lon)
+    ctx = ctx or get_context(lat, lon)
+    sunrise_time = get_sunrise_time(dt_date, lat, lon, ctx)
     
-    sun_lon, moon_lon = _get_sun_moon_longitudes(sunrise_time, lat, lon)
+    sun_lon, moon_lon = _get_sun_moon_longitudes(sunrise_time, lat, lon, ctx)
     
     # Calculate all components
     tithi_num, tithi_name, paksha = _calculate_tithi(sun_lon, moon_lon)
@@ -228,20 +233,9 @@ def detect_festivals(panchang_data: Dict, date: dt.date) -> List[str]:
     return festivals
 
 # Make these functions available for festivals.py
-def get_sun_moon_longitudes(t, lat, lon):
+def get_sun_moon_longitudes(t, lat, lon, ctx=None):
     """Get apparent longitudes of Sun and Moon"""
-    earth = _eph['earth']
-    sun = _eph['sun']
-    moon = _eph['moon']
-    observer = earth + Topos(latitude_degrees=lat, longitude_degrees=lon)
-    
-    sun_app = observer.at(t).observe(sun).apparent()
-    moon_app = observer.at(t).observe(moon).apparent()
-    
-    sun_lon = sun_app.ecliptic_latlon()[1].degrees % 360.0
-    moon_lon = moon_app.ecliptic_latlon()[1].degrees % 360.0
-    
-    return sun_lon, moon_lon
+    return _get_sun_moon_longitudes(t, lat, lon, ctx)
 
 # Make the ephemeris available
 def get_eph():
@@ -6,6 +6,8 @@ Accurate Panchang generator using Skyfield.
 - Computes Amanta and Purnimanta lunar months using nearest new/full moon <= sunrise.
 - Robust handling of Skyfield Time ranges (avoids 'single Time' errors).
 - Returns debug info for verification.
+- Optional end times of the current limbs ('transitions').
+- Sections are selectable with fields=...; unused stages are skipped.
 
 Dependencies:
     pip install skyfield
@@ -14,12 +16,17 @@ Run:
     python panchang2.py
 """
 
-from typing import Union, Optional, Tuple, Dict
+from typing import Union, Optional, Tuple, Dict, Iterable, FrozenSet, List, Callable, NamedTuple
 import datetime as _dt
 from math import floor
-from skyfield.api import load, wgs84
+import numpy as np
+from skyfield.api import load
 from skyfield import almanac
 
+from ayanamsa import DEFAULT_AYANAMSA, ayanamsa_deg, lahiri, tropical_of_date, validate as validate_ayanamsa
+from precision import DEFAULT_PRECISION, tier as precision_tier
+from location_context import LocationContext, get_context
+
 # -------------------------
 # Setup ephemeris & timescale
 # -------------------------
@@ -75,19 +82,11 @@ YOGA_SPAN = 360.0 / 27.0
 TITHI_SPAN = 12.0               # 12°
 
 # -------------------------
-# Ayanamsa (Lahiri-style approx)
+# Ayanamsa (models live in ayanamsa.py)
 # -------------------------
 def lahiri_ayanamsa_deg(time_obj) -> float:
-    """
-    Practical Lahiri-style ayanamsa (degrees).
-    Good for panchang-level accuracy across modern dates.
-    """
-    jd_tt = time_obj.tt
-    # centuries from J2000
-    t = (jd_tt - 2451545.0) / 36525.0
-    # polynomial approximation (coefficients chosen to be practical)
-    # Based on earlier approximations; gives about 0.01-0.1 deg accuracy for 1900-2100.
-    return 23.8531 + 0.013969 * ((jd_tt - 2451545.0) / 365.2425)
+    """Lahiri ayanamsa of date (degrees) at a Skyfield Time (scalar or array)."""
+    return lahiri(time_obj.tt)
 
 # -------------------------
 # Utility: parse date input
@@ -110,17 +109,40 @@ def parse_date(d: Union[str, _dt.date, _dt.datetime]) -> _dt.date:
 # -------------------------
 # Sunrise / Sunset (robust)
 # -------------------------
-def sunrise_sunset_for_date(date_obj: _dt.date, lat: float, lon: float) -> Tuple[object, object]:
-    """Return (sunrise_time, sunset_time) Skyfield Time objects for the local date."""
-    loc = wgs84.latlon(latitude_degrees=lat, longitude_degrees=lon)
-    t0 = TS.utc(date_obj.year, date_obj.month, date_obj.day, 0, 0, 0)
-    t1 = TS.utc(date_obj.year, date_obj.month, date_obj.day, 23, 59, 59)
-    f = almanac.sunrise_sunset(EPH, loc)
+def utc_offset_hours(date_obj: _dt.date, lon: float, tz: Optional[str] = None) -> float:
+    """
+    Offset from UTC (hours) at local midnight starting date_obj: from the IANA
+    zone when known, else local mean solar time (lon / 15).
+    """
+    if tz:
+        from zoneinfo import ZoneInfo
+        midnight = _dt.datetime(date_obj.year, date_obj.month, date_obj.day, tzinfo=ZoneInfo(tz))
+        return midnight.utcoffset().total_seconds() / 3600.0
+    return lon / 15.0
+
+def sunrise_sunset_for_date(date_obj: _dt.date, lat: float, lon: float,
+                            tz: Optional[str] = None,
+                            ctx: Optional[LocationContext] = None) -> Tuple[object, object]:
+    """
+    Return (sunrise_time, sunset_time) Skyfield Time objects for the local date:
+    the search window runs from local midnight to local midnight (see utc_offset_hours),
+    so far from UTC the events still belong to the requested date.
+    ctx: the location's context (default: the pooled one); results are cached there.
+    """
+    ctx = ctx or get_context(lat, lon, tz)
+    return ctx.cached_sunrise(("local", date_obj.toordinal()), lambda: _sunrise_sunset_search(date_obj, ctx))
+
+def _sunrise_sunset_search(date_obj: _dt.date, ctx: LocationContext) -> Tuple[object, object]:
+    off = ctx.utc_offset_hours(date_obj)
+    y, m, d = date_obj.year, date_obj.month, date_obj.day
+    t0 = TS.utc(y, m, d, -off, 0, 0)
+    t1 = TS.utc(y, m, d, 24.0 - off, 0, -1)
+    f = ctx.sunrise_sunset
     try:
         times, events = almanac.find_discrete(t0, t1, f)
     except Exception:
         # fallback simple times
-        return TS.utc(date_obj.year, date_obj.month, date_obj.day, 6, 0, 0), TS.utc(date_obj.year, date_obj.month, date_obj.day, 18, 0, 0)
+        return TS.utc(y, m, d, 6.0 - off, 0, 0), TS.utc(y, m, d, 18.0 - off, 0, 0)
 
     sunrise = None
     sunset = None
@@ -131,35 +153,68 @@ def sunrise_sunset_for_date(date_obj: _dt.date, lat: float, lon: float) -> Tuple
             sunset = ti
 
     if sunrise is None:
-        sunrise = TS.utc(date_obj.year, date_obj.month, date_obj.day, 6, 0, 0)
+        sunrise = TS.utc(y, m, d, 6.0 - off, 0, 0)
     if sunset is None:
-        sunset = TS.utc(date_obj.year, date_obj.month, date_obj.day, 18, 0, 0)
+        sunset = TS.utc(y, m, d, 18.0 - off, 0, 0)
     return sunrise, sunset
 
 # -------------------------
 # Sun/Moon longitudes helpers
 # -------------------------
-def sun_moon_longitudes(time_obj, observer = None) -> Dict[str, float]:
+def observer_at(observer, time_obj):
+    """
+    Barycentric position at time_obj of an observer: None (geocentre), a
+    LocationContext, or a Skyfield geographic position.
     """
-    Return tropical and sidereal longitudes at time_obj.
+    if observer is None:
+        return EPH['earth'].at(time_obj)
+    if isinstance(observer, LocationContext):
+        return observer.at(time_obj)
+    return (EPH['earth'] + observer).at(time_obj)
+
+# constant of annual aberration (degrees): the apparent sun trails its
+# geometric direction by this much in longitude
+ABERRATION_DEG = 20.49552 / 3600.0
+
+def sun_moon_longitudes(time_obj, observer = None, ayanamsa: str = DEFAULT_AYANAMSA,
+                        precision: str = DEFAULT_PRECISION) -> Dict[str, float]:
+    """
+    Return tropical (mean equinox of date) and sidereal longitudes at time_obj.
     Keys: 'sun_lon', 'moon_lon', 'sid_sun', 'sid_moon', 'ayanamsa'
+    observer: see observer_at (None: geocentric)
+    ayanamsa: model name from ayanamsa.py
+    precision: tier from precision.py; selects how longitudes and the ayanamsa are computed
     """
-    earth = EPH['earth']
+    tier = precision_tier(precision)
     sun = EPH['sun']
     moon = EPH['moon']
-
-    if observer is None:
-        obs = earth.at(time_obj)
+    obs = observer_at(observer, time_obj)
+
+    if tier.longitudes == "astrometric":
+        # light-time only, plus the first-order annual aberration in longitude,
+        # -k cos(sun - lon) / cos(lat); deflection (milliarcseconds) is left out
+        _, sun_lon, _ = obs.observe(sun).ecliptic_latlon()
+        moon_lat, moon_lon, _ = obs.observe(moon).ecliptic_latlon()
+        sun_lon, moon_lon = sun_lon.degrees, moon_lon.degrees
+        moon_lon = moon_lon - ABERRATION_DEG * np.cos(np.radians(sun_lon - moon_lon)) / np.cos(moon_lat.radians)
+        sun_lon = sun_lon - ABERRATION_DEG
+        sun_lon = tropical_of_date(sun_lon, time_obj.tt)
+        moon_lon = tropical_of_date(moon_lon, time_obj.tt)
+    elif tier.longitudes == "rigorous":
+        # true ecliptic and equinox of date, minus the nutation in longitude
+        from skyfield.nutationlib import iau2000a_radians
+        dpsi = np.degrees(iau2000a_radians(time_obj)[0])
+        sun_lon = (obs.observe(sun).apparent().ecliptic_latlon(epoch=time_obj)[1].degrees - dpsi) % 360.0
+        moon_lon = (obs.observe(moon).apparent().ecliptic_latlon(epoch=time_obj)[1].degrees - dpsi) % 360.0
     else:
-        obs = (earth + observer).at(time_obj)
-
-    sun_app = obs.observe(sun).apparent()
-    moon_app = obs.observe(moon).apparent()
-
-    sun_lon = sun_app.ecliptic_latlon()[1].degrees % 360.0
-    moon_lon = moon_app.ecliptic_latlon()[1].degrees % 360.0
-
-    ayan = lahiri_ayanamsa_deg(time_obj)
+        sun_app = obs.observe(sun).apparent()
+        moon_app = obs.observe(moon).apparent()
+        # J2000 ecliptic plus precession: the ecliptic of date without a
+        # second nutation evaluation (epoch='date' would redo it per call)
+        sun_lon = tropical_of_date(sun_app.ecliptic_latlon()[1].degrees, time_obj.tt)
+        moon_lon = tropical_of_date(moon_app.ecliptic_latlon()[1].degrees, time_obj.tt)
+
+    ayan = ayanamsa_deg(time_obj.tt, ayanamsa, exact=tier.exact_ayanamsa)
     sid_sun = (sun_lon - ayan) % 360.0
     sid_moon = (moon_lon - ayan) % 360.0
 
@@ -244,123 +299,216 @@ def next_lunar_month(name:str) -> str:
 # -------------------------
 # Determine months (amanta & purnimanta)
 # -------------------------
-def determine_lunar_months(sunrise_time, observer) -> Tuple[str, str, Dict]:
+def determine_lunar_months(sunrise_time, observer, ayanamsa: str = DEFAULT_AYANAMSA,
+                           precision: str = DEFAULT_PRECISION) -> Tuple[str, str, Dict]:
     """
     Returns (amanta_month, purnimanta_month, debug_dict)
-    - amanta_month: month name by new-moon -> sidereal sun method (fallback to sidereal sun at sunrise)
-    - purnimanta_month: month determined for purnimanta (full-moon anchor + shift if in Krishna paksha)
+    - amanta_month: named after the sign the sun enters after the last new moon (label_lunar_months)
+    - purnimanta_month: the same base month; callers shift Krishna paksha days to the next month
     debug_dict contains data used.
     """
-    debug = {}
     # find most recent new moon <= sunrise
-    new_moon = find_last_moon_phase_before(sunrise_time, phase_value=0)
-    full_moon = find_last_moon_phase_before(sunrise_time, phase_value=2)
-
-    # Amanta: sidereal sun at most recent NEW MOON
-    if new_moon is not None:
-        s_new = sun_moon_longitudes(new_moon, observer=observer)
-        idx_amanta = int(s_new["sid_sun"] // 30.0) % 12
-        amanta = LUNAR_MONTHS[idx_amanta]
-        debug["new_moon_time_utc"] = new_moon.utc_iso()
+    if precision_tier(precision).phases == "index":
+        from panchang_range import PHASE_LOOKBACK_DAYS, moon_phase_series
+        phases = moon_phase_series(sunrise_time.tt - PHASE_LOOKBACK_DAYS, sunrise_time.tt, precision)
+        new_moon, full_moon = (TS.tt_jd(phases[ph][-1]) if len(phases[ph]) else None for ph in (0, 2))
+    else:
+        new_moon = find_last_moon_phase_before(sunrise_time, phase_value=0)
+        full_moon = find_last_moon_phase_before(sunrise_time, phase_value=2)
+
+    s_new = sun_moon_longitudes(new_moon, observer, ayanamsa, precision) if new_moon is not None else None
+    s_full = sun_moon_longitudes(full_moon, observer, ayanamsa, precision) if full_moon is not None else None
+    s_sunrise = None
+    if new_moon is None or full_moon is None:
+        s_sunrise = sun_moon_longitudes(sunrise_time, observer, ayanamsa, precision)
+
+    return label_lunar_months(
+        new_moon.utc_iso() if new_moon is not None else None, s_new,
+        full_moon.utc_iso() if full_moon is not None else None, s_full,
+        s_sunrise)
+
+def label_lunar_months(new_moon_iso: Optional[str], s_new: Optional[Dict],
+                       full_moon_iso: Optional[str], s_full: Optional[Dict],
+                       s_sunrise: Optional[Dict]) -> Tuple[str, str, Dict]:
+    """
+    Month names from the longitudes at the last new moon (s_new, None when
+    not found; s_sunrise is then used as fallback). Split from
+    determine_lunar_months so range callers can find the phases once.
+
+    The amanta month is named after the sign the sun enters during it: the
+    month beginning with the new moon while the sun is in Meena is Chaitra.
+    The purnimanta base is the same month; its Krishna paksha already belongs
+    to the next purnimanta month, which _purnimanta_view applies. The last
+    full moon (s_full) is only reported in the debug dict.
+    """
+    debug = {}
+    # Amanta: sidereal sun at most recent NEW MOON, plus the sign it enters next
+    if s_new is not None:
+        sign = int(s_new["sid_sun"] // 30.0) % 12
+        debug["new_moon_time_utc"] = new_moon_iso
         debug["sid_sun_at_newmoon"] = s_new["sid_sun"]
     else:
         # fallback to sidereal sun at sunrise
-        s_sunrise = sun_moon_longitudes(sunrise_time, observer=observer)
-        idx_amanta = int(s_sunrise["sid_sun"] // 30.0) % 12
-        amanta = LUNAR_MONTHS[idx_amanta]
+        sign = int(s_sunrise["sid_sun"] // 30.0) % 12
         debug["new_moon_time_utc"] = None
         debug["sid_sun_fallback_at_sunrise"] = s_sunrise["sid_sun"]
+    amanta = LUNAR_MONTHS[(sign + 1) % 12]
 
-    # Purnimanta: derive base from full-moon's nakshatra anchor (heuristic) then shift for Krishna paksha
-    purnimanta = None
     debug["full_moon_time_utc"] = None
     debug["full_moon_sid_sun"] = None
     debug["full_moon_sid_moon"] = None
     debug["full_moon_nakshatra_index"] = None
-
-    if full_moon is not None:
-        s_full = sun_moon_longitudes(full_moon, observer=observer)
-        debug["full_moon_time_utc"] = full_moon.utc_iso()
+    if s_full is not None:
+        debug["full_moon_time_utc"] = full_moon_iso
         debug["full_moon_sid_sun"] = s_full["sid_sun"]
         debug["full_moon_sid_moon"] = s_full["sid_moon"]
         nak_idx_full = int(s_full["sid_moon"] // NAKSHATRA_SPAN) % 27
         debug["full_moon_nakshatra_index"] = nak_idx_full
         debug["full_moon_nakshatra"] = NAKSHATRA[nak_idx_full]
 
-        # Map full-moon nakshatra to a month anchor.
-        # We'll choose a conservative, commonly used mapping (tweakable)
-        anchor_map = {
-            # anchor nakshatra -> month
-            "Chitra": "Ashwin",
-            "Vishakha": "Kartika",
-            "Jyeshtha": "Jyeshtha",
-            "Uttara Ashadha": "Magha",
-            "Shravana": "Shravana",
-            "Purva Bhadrapada": "Bhadrapada",
-            "Uttara Bhadrapada": "Chaitra",
-            "Rohini": "Vaishakha",
-            "Mrigashira": "Margashirsha",
-            "Pushya": "Pausha",
-            "Magha": "Magha",
-            "Uttara Phalguni": "Phalguna",
-            "Bharani": "Vaishakha",
-            "Revati": "Phalguna"
-            # This map can be extended/tuned.
-        }
-        full_nak = NAKSHATRA[nak_idx_full]
-        base_month = anchor_map.get(full_nak)
-        # fallback: use sidereal sun at full moon to pick month
-        if base_month is None:
-            idx = int(s_full["sid_sun"] // 30.0) % 12
-            base_month = LUNAR_MONTHS[idx]
-
-        # Now decide purnimanta label: if date at sunrise is in Krishna paksha, shift to next month
-        # But we can't know paksha here; caller will shift. Return base for now.
-        purnimanta = base_month
-    else:
-        # fallback to sidereal sun at sunrise
-        s_sunrise = sun_moon_longitudes(sunrise_time, observer=observer)
-        idx = int(s_sunrise["sid_sun"] // 30.0) % 12
-        purnimanta = LUNAR_MONTHS[idx]
-        debug["full_moon_time_utc"] = None
-        debug["full_moon_sid_sun_fallback"] = s_sunrise["sid_sun"]
+    return amanta, amanta, debug
+
+# -------------------------
+# Limb transitions (end times)
+# -------------------------
+LIMB_SPANS = {
+    "tithi": TITHI_SPAN,
+    "nakshatra": NAKSHATRA_SPAN,
+    "yoga": YOGA_SPAN,
+    "karana": TITHI_SPAN / 2.0,
+}
+
+def limb_values(vals: Dict) -> Dict:
+    """
+    Running (0..360) value of each limb from a sun_moon_longitudes() dict.
+    Works for scalars and for arrays of instants alike.
+    """
+    elong = (vals["moon_lon"] - vals["sun_lon"]) % 360.0
+    return {
+        "tithi": elong,
+        "nakshatra": vals["sid_moon"],
+        "yoga": (vals["sid_sun"] + vals["sid_moon"]) % 360.0,
+        "karana": elong,
+    }
+
+def limb_end_times(start_time, observer=None, window_days: float = 1.25,
+                   step_hours: float = 1.0, iterations: int = 4,
+                   ayanamsa: str = DEFAULT_AYANAMSA,
+                   precision: str = DEFAULT_PRECISION) -> Dict[str, Optional[object]]:
+    """
+    End time of each limb (tithi, nakshatra, yoga, karana) current at start_time.
 
-    return amanta, purnimanta, debug
+    One vectorized evaluation over an hourly grid brackets every boundary,
+    then all four brackets are refined together by regula falsi, so the whole
+    search costs a handful of array calls instead of one find_discrete per limb.
+    Returns {limb: Time or None}.
+    """
+    limbs = list(LIMB_SPANS)
+    spans = np.array([LIMB_SPANS[k] for k in limbs])
+
+    n = int(window_days * 24.0 / step_hours) + 1
+    grid = TS.tt_jd(start_time.tt + np.arange(n) * step_hours / 24.0)
+    lv = limb_values(sun_moon_longitudes(grid, observer, ayanamsa, precision))
+    # progress of each limb since start_time, unwrapped (limbs only move forward)
+    progress = np.array([np.unwrap(np.radians(lv[k])) for k in limbs])
+    progress = np.degrees(progress - progress[:, :1])
+    start_vals = np.array([lv[k][0] for k in limbs])
+    remaining = (np.floor(start_vals / spans) + 1.0) * spans - start_vals
+
+    result = {k: None for k in limbs}
+    crossed = progress >= remaining[:, None]
+    found = crossed.any(axis=1)
+    if not found.any():
+        return result
+
+    hi_idx = np.where(found, crossed.argmax(axis=1), 1)
+    lo_jd = grid.tt[hi_idx - 1]
+    hi_jd = grid.tt[hi_idx]
+    lo_f = progress[np.arange(len(limbs)), hi_idx - 1] - remaining
+    hi_f = progress[np.arange(len(limbs)), hi_idx] - remaining
+
+    for _ in range(iterations):
+        mid_jd = lo_jd + (hi_jd - lo_jd) * (-lo_f) / (hi_f - lo_f)
+        mv = limb_values(sun_moon_longitudes(TS.tt_jd(mid_jd), observer, ayanamsa, precision))
+        mid_prog = np.array([mv[k][i] for i, k in enumerate(limbs)]) - start_vals
+        mid_f = (mid_prog + 180.0) % 360.0 - 180.0 - remaining
+        below = mid_f < 0
+        lo_jd = np.where(below, mid_jd, lo_jd)
+        lo_f = np.where(below, mid_f, lo_f)
+        hi_jd = np.where(below, hi_jd, mid_jd)
+        hi_f = np.where(below, hi_f, mid_f)
+
+    end_jd = lo_jd + (hi_jd - lo_jd) * (-lo_f) / (hi_f - lo_f)
+    for i, k in enumerate(limbs):
+        if found[i]:
+            result[k] = TS.tt_jd(end_jd[i])
+    return result
 
 # -------------------------
-# Main get_panchang
+# Field selection
 # -------------------------
-def get_panchang(date_in: Union[str, _dt.date, _dt.datetime],
-                 lat: float = 28.6139,
-                 lon: float = 77.2090,
-                 month_system: str = "purnimanta") -> Dict:
+FIELDS = ("core", "lunar_month", "months", "festivals", "transitions", "grahas", "eclipses", "debug")
+DEFAULT_FIELDS = ("core", "lunar_month", "festivals", "eclipses", "debug")
+
+# section -> sections it needs computed first
+FIELD_DEPENDENCIES = {
+    "core": (),
+    "lunar_month": ("core",),           # purnimanta label needs the paksha
+    "months": ("core", "lunar_month"),  # every month view, from the same intermediates
+    "festivals": ("core", "lunar_month"),
+    "transitions": ("core",),
+    "grahas": ("core",),
+    "eclipses": ("core",),
+    "debug": ("core",),
+}
+
+def resolve_fields(fields: Union[None, str, Iterable[str]] = None) -> FrozenSet[str]:
     """
-    month_system: 'amanta' or 'purnimanta' (default 'purnimanta' for North-India style)
+    Expand requested sections with everything they depend on.
+    fields: None (defaults), 'all', a comma separated string or an iterable of names.
     """
-    dt_date = parse_date(date_in)
-    # get sunrise & sunset
-    sunrise, sunset = sunrise_sunset_for_date(dt_date, lat, lon)
+    if fields is None:
+        requested = list(DEFAULT_FIELDS)
+    elif isinstance(fields, str):
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+    else:
+        requested = list(fields)
+    if "all" in requested:
+        requested = list(FIELDS)
+    unknown = [f for f in requested if f not in FIELD_DEPENDENCIES]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)} (expected any of {', '.join(FIELDS)})")
+
+    wanted = set()
+    stack = list(requested)
+    while stack:
+        f = stack.pop()
+        if f not in wanted:
+            wanted.add(f)
+            stack.extend(FIELD_DEPENDENCIES[f])
+    return frozenset(wanted)
 
-    # observer for topocentric
-    observer = wgs84.latlon(latitude_degrees=lat, longitude_degrees=lon)
+# -------------------------
+# Sections
+# -------------------------
+def tithi_label(tithi_index: int) -> str:
+    """1..30 -> 'Ashtami (Krishna)'"""
+    if tithi_index <= 15:
+        return f"{TITHI_SHUKLA[tithi_index - 1]} (Shukla)"
+    return f"{TITHI_KRISHNA[tithi_index - 16]} (Krishna)"
 
-    # compute positions (use sunrise as epoch)
-    vals = sun_moon_longitudes(sunrise, observer=observer)
+def _core_section(dt_date: _dt.date, sunrise_iso: str, sunset_iso: str, vals: Dict) -> Dict:
+    """Tithi, nakshatra, yoga, karana, vara, rashis and sunrise/sunset."""
     sun_lon = vals["sun_lon"]
     moon_lon = vals["moon_lon"]
     sid_sun = vals["sid_sun"]
     sid_moon = vals["sid_moon"]
-    ayan = vals["ayanamsa"]
 
     # Tithi (using tropical/apparent longitudes; difference unaffected by adding same ayanamsa)
     diff = (moon_lon - sun_lon) % 360.0
     tithi_index = int(diff // TITHI_SPAN) + 1  # 1..30
-    if tithi_index <= 15:
-        paksha = "Shukla"
-        tithi_name = f"{TITHI_SHUKLA[tithi_index - 1]} ({paksha})"
-    else:
-        paksha = "Krishna"
-        tithi_name = f"{TITHI_KRISHNA[tithi_index - 16]} ({paksha})"
+    paksha = "Shukla" if tithi_index <= 15 else "Krishna"
+    tithi_name = tithi_label(tithi_index)
 
     # Nakshatra & pada (sidereal moon)
     nak_index = int(sid_moon // NAKSHATRA_SPAN) % 27
@@ -384,26 +532,9 @@ def get_panchang(date_in: Union[str, _dt.date, _dt.datetime],
     moon_rashi = RASHIS[int(sid_moon // 30.0) % 12]
     sun_rashi = RASHIS[int(sid_sun // 30.0) % 12]
 
-    # Determine lunar months
-    amanta_base, purnimanta_base, month_debug = determine_lunar_months(sunrise, observer)
-
-    # For purnimanta system, if current paksha == Krishna, the named month is NEXT month of base
-    if month_system == "purnimanta":
-        if paksha == "Krishna":
-            purnimanta_final = next_lunar_month(purnimanta_base)
-        else:
-            purnimanta_final = purnimanta_base
-        amanta_final = amanta_base
-        chosen_month = purnimanta_final
-    else:
-        # amanta system: use amanta_base directly
-        amanta_final = amanta_base
-        # for convenience provide amanta_chosen
-        chosen_month = amanta_final
-
-    result = {
-        "date": dt_date.isoformat(),
+    return {
         "tithi": tithi_name,
+        "tithi_index": tithi_index,
         "paksha": paksha,
         "nakshatra": nakshatra,
         "nakshatra_pada": nak_pada,
@@ -412,20 +543,204 @@ def get_panchang(date_in: Union[str, _dt.date, _dt.datetime],
         "var": dt_date.strftime("%A"),
         "moon_rashi": moon_rashi,
         "sun_rashi": sun_rashi,
-        "lunar_month_amanta": amanta_final,
-        "lunar_month_purnimanta": purnimanta_final if month_system=="purnimanta" else None,
+        "sunrise": sunrise_iso,
+        "sunset": sunset_iso,
+    }
+
+# -------------------------
+# Month views
+# -------------------------
+class MonthBasis(NamedTuple):
+    """Per-day intermediates every month view is derived from (see label_lunar_months)."""
+    amanta_base: str        # month begun by the last new moon
+    purnimanta_base: str    # the same month; Krishna paksha moves on to the next
+    paksha: str
+    sid_sun: float          # sidereal sun at sunrise
+
+def _amanta_view(b: MonthBasis) -> Dict:
+    return {"month": b.amanta_base, "paksha": b.paksha}
+
+def _purnimanta_view(b: MonthBasis) -> Dict:
+    # the purnimanta month turns at the full moon: Krishna paksha already belongs to the next month
+    month = next_lunar_month(b.purnimanta_base) if b.paksha == "Krishna" else b.purnimanta_base
+    return {"month": month, "paksha": b.paksha}
+
+def _solar_view(b: MonthBasis) -> Dict:
+    # sauramana: the month is the sidereal sign of the sun
+    return {"month": RASHIS[int(b.sid_sun // 30.0) % 12], "sun_degree": round(float(b.sid_sun % 30.0), 4)}
+
+MONTH_VIEWS: Dict[str, Callable[[MonthBasis], Dict]] = {
+    "amanta": _amanta_view,
+    "purnimanta": _purnimanta_view,
+    "solar": _solar_view,
+}
+
+def register_month_view(name: str, view: Callable[[MonthBasis], Dict]) -> None:
+    """Add a month view: a function of a MonthBasis returning a small dict."""
+    MONTH_VIEWS[name] = view
+
+def month_views(basis: MonthBasis, names: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+    """All (or the named) month views of one day; each is a few dict lookups."""
+    return {name: MONTH_VIEWS[name](basis) for name in (names or MONTH_VIEWS)}
+
+def _label_lunar_months(amanta_base: str, purnimanta_base: str, paksha: str,
+                        month_system: str) -> Tuple[Dict, str]:
+    """
+    Apply the month system to the base month names.
+    Returns (section_dict, purnimanta_month); the purnimanta month is always
+    resolved because festival rules are written in that convention.
+    """
+    basis = MonthBasis(amanta_base, purnimanta_base, paksha, 0.0)
+    purnimanta_final = _purnimanta_view(basis)["month"]
+    chosen_month = purnimanta_final if month_system == "purnimanta" else amanta_base
+    section = {
+        "lunar_month_amanta": amanta_base,
+        "lunar_month_purnimanta": purnimanta_final if month_system == "purnimanta" else None,
         "lunar_month_chosen": chosen_month,
-        "sunrise": sunrise.utc_iso(),
-        "sunset": sunset.utc_iso(),
-        "_debug": {
-            "ayanamsa_deg_at_sunrise": ayan,
-            "sun_lon_tropical_at_sunrise": sun_lon,
-            "moon_lon_tropical_at_sunrise": moon_lon,
-            "sidereal_sun_lon_at_sunrise": sid_sun,
-            "sidereal_moon_lon_at_sunrise": sid_moon,
-            "amanta_purnimanta_debug": month_debug
-        }
     }
+    return section, purnimanta_final
+
+def _lunar_month_section(sunrise, observer, paksha: str, month_system: str,
+                         ayanamsa: str = DEFAULT_AYANAMSA,
+                         precision: str = DEFAULT_PRECISION) -> Tuple[Dict, str, Dict, Tuple[str, str]]:
+    """
+    Two moon-phase searches plus labelling.
+    Returns (section, purnimanta_month, debug, (amanta_base, purnimanta_base)).
+    """
+    amanta_base, purnimanta_base, month_debug = determine_lunar_months(sunrise, observer, ayanamsa, precision)
+    section, purnimanta_final = _label_lunar_months(amanta_base, purnimanta_base, paksha, month_system)
+    return section, purnimanta_final, month_debug, (amanta_base, purnimanta_base)
+
+def _festivals_section(result: Dict, purnimanta_month: str, dt_date: _dt.date, lat: float, lon: float,
+                       tz: Optional[str] = None, ayanamsa: str = DEFAULT_AYANAMSA) -> List[str]:
+    from festivals3 import get_festivals, makar_sankranti_days
+    sankranti = dt_date in makar_sankranti_days(dt_date, dt_date, lat, lon, tz, ayanamsa)
+    return get_festivals(result, purnimanta_month, makar_sankranti=sankranti)
+
+def udaya_flags(tithi_index: int, tithi_end, next_sunrise, observer=None,
+                ayanamsa: str = DEFAULT_AYANAMSA, precision: str = DEFAULT_PRECISION) -> Dict:
+    """
+    Kshaya / vriddhi status of the day starting at this sunrise.
+    - tithi_vriddhi: the sunrise tithi is still running at the next sunrise
+    - kshaya_tithi: the following tithi begins and ends before the next sunrise
+    """
+    if tithi_end is None or tithi_end.tt >= next_sunrise.tt:
+        return {"tithi_vriddhi": True, "kshaya_tithi": None}
+    kshaya = None
+    # no tithi is shorter than ~19.5h, so only look further when one could fit
+    if next_sunrise.tt - tithi_end.tt > 0.8:
+        nxt = limb_end_times(TS.tt_jd(tithi_end.tt + 1e-6), observer=observer, ayanamsa=ayanamsa,
+                             precision=precision)["tithi"]
+        if nxt is not None and nxt.tt < next_sunrise.tt:
+            kshaya = tithi_label(tithi_index % 30 + 1)
+    return {"tithi_vriddhi": False, "kshaya_tithi": kshaya}
+
+def _transitions_section(dt_date: _dt.date, sunrise, observer, tithi_index: int,
+                         lat: float, lon: float, ayanamsa: str = DEFAULT_AYANAMSA,
+                         tz: Optional[str] = None, precision: str = DEFAULT_PRECISION) -> Dict:
+    ends = limb_end_times(sunrise, observer=observer, ayanamsa=ayanamsa, precision=precision)
+    section = {f"{k}_end": (t.utc_iso() if t is not None else None) for k, t in ends.items()}
+    ctx = observer if isinstance(observer, LocationContext) else None
+    next_sunrise, _ = sunrise_sunset_for_date(dt_date + _dt.timedelta(days=1), lat, lon, tz, ctx)
+    section.update(udaya_flags(tithi_index, ends["tithi"], next_sunrise, observer, ayanamsa, precision))
+    return section
+
+def _grahas_section(time_obj, observer, ayanamsa: str = DEFAULT_AYANAMSA) -> List[Dict]:
+    """Sidereal longitude, rashi, nakshatra and pada of the nine grahas."""
+    from grahas import graha_longitudes, graha_positions
+    return graha_positions(graha_longitudes(time_obj, observer=observer, ayanamsa=ayanamsa)[0])
+
+def _eclipses_section(dt_date: _dt.date, lat: float, lon: float, tz: Optional[str] = None) -> List[Dict]:
+    """Eclipses whose greatest phase falls on this local day, with local visibility."""
+    from eclipses import eclipses_by_day
+    nxt = dt_date + _dt.timedelta(days=1)
+    bounds = [TS.utc(d.year, d.month, d.day, -utc_offset_hours(d, lon, tz)).tt for d in (dt_date, nxt)]
+    return eclipses_by_day(np.array(bounds), lat, lon)[0]
+
+def _debug_section(vals: Dict, month_debug: Optional[Dict], ayanamsa: str = DEFAULT_AYANAMSA) -> Dict:
+    debug = {
+        "ayanamsa_model": ayanamsa,
+        "ayanamsa_deg_at_sunrise": vals["ayanamsa"],
+        "sun_lon_tropical_at_sunrise": vals["sun_lon"],
+        "moon_lon_tropical_at_sunrise": vals["moon_lon"],
+        "sidereal_sun_lon_at_sunrise": vals["sid_sun"],
+        "sidereal_moon_lon_at_sunrise": vals["sid_moon"],
+    }
+    if month_debug is not None:
+        debug["amanta_purnimanta_debug"] = month_debug
+    return debug
+
+# -------------------------
+# Main get_panchang
+# -------------------------
+def get_panchang(date_in: Union[str, _dt.date, _dt.datetime],
+                 lat: float = 28.6139,
+                 lon: float = 77.2090,
+                 month_system: str = "purnimanta",
+                 fields: Union[None, str, Iterable[str]] = None,
+                 ayanamsa: str = DEFAULT_AYANAMSA,
+                 tz: Optional[str] = None,
+                 precision: str = DEFAULT_PRECISION) -> Dict:
+    """
+    month_system: 'amanta' or 'purnimanta' (default 'purnimanta' for North-India style)
+    fields: sections to compute, any of FIELDS (default DEFAULT_FIELDS).
+            Stages that no requested section depends on are skipped entirely,
+            e.g. fields='core' avoids both moon-phase searches. 'months' adds
+            every month view (amanta, purnimanta, solar) and the regional
+            solar calendar dates (see solar.py).
+    ayanamsa: model name, see ayanamsa.models() (default 'lahiri')
+    tz: IANA timezone of the location; the date is a local date (default: local mean time)
+    precision: fast, standard (default) or reference, see precision.py
+    """
+    wanted = resolve_fields(fields)
+    ayanamsa = validate_ayanamsa(ayanamsa)
+    tier = precision_tier(precision)
+    dt_date = parse_date(date_in)
+
+    # observer for topocentric: the pooled context (position, almanac, sunrises)
+    observer = get_context(lat, lon, tz)
+
+    # get sunrise & sunset
+    if tier.sunrise_grid > 0:
+        from panchang_range import sunrise_values
+        rise, sets, _, _ = sunrise_values(dt_date, 1, lat, lon, tz, observer, ayanamsa,
+                                          tier.sunrise_grid, tier.name)
+        sunrise, sunset = TS.tt_jd(rise[0]), TS.tt_jd(sets[0])
+    else:
+        sunrise, sunset = sunrise_sunset_for_date(dt_date, lat, lon, tz, observer)
+
+    # compute positions (use sunrise as epoch)
+    vals = sun_moon_longitudes(sunrise, observer, ayanamsa, tier.name)
+
+    result = {"date": dt_date.isoformat()}
+    result.update(_core_section(dt_date, sunrise.utc_iso(), sunset.utc_iso(), vals))
+
+    month_debug = None
+    if "lunar_month" in wanted:
+        section, purnimanta_month, month_debug, bases = _lunar_month_section(
+            sunrise, observer, result["paksha"], month_system, ayanamsa, tier.name)
+        result.update(section)
+        if "months" in wanted:
+            from solar import solar_dates_for_range
+            result["months"] = month_views(MonthBasis(*bases, result["paksha"], vals["sid_sun"]))
+            solar = solar_dates_for_range(dt_date, dt_date, lat, lon, tz, ayanamsa)
+            result["months"].update((cal, rows[0]) for cal, rows in solar.items())
+        if "festivals" in wanted:
+            result["festivals"] = _festivals_section(result, purnimanta_month, dt_date, lat, lon, tz, ayanamsa)
+
+    if "transitions" in wanted:
+        result["transitions"] = _transitions_section(dt_date, sunrise, observer, result["tithi_index"],
+                                                     lat, lon, ayanamsa, tz, tier.name)
+
+    if "grahas" in wanted:
+        result["grahas"] = _grahas_section(sunrise, observer, ayanamsa)
+
+    if "eclipses" in wanted:
+        result["eclipses"] = _eclipses_section(dt_date, lat, lon, tz)
+
+    if "debug" in wanted:
+        result["_debug"] = _debug_section(vals, month_debug, ayanamsa)
+        result["_debug"]["precision"] = tier.name
     return result
 
 # -------------------------
@@ -0,0 +1,415 @@
+# panchang_range.py
+"""
+Range engine: panchang3 results for many consecutive days in one pass.
+
+Instead of a sunrise search, a longitude evaluation and two moon-phase
+searches per day, a range is computed from a few series:
+
+- one sunrise/sunset search over the whole range,
+- one vectorized longitude evaluation at all sunrises,
+- one moon-phase search (new/full moons) covering the range,
+- one transition search per limb (tithi, nakshatra, yoga, karana),
+
+which are then merged with searchsorted. Merging the tithi transition series
+with the sunrise series also gives the udaya tithi status of every day:
+a tithi that begins and ends between two sunrises is kshaya, a tithi that
+prevails at two sunrises is vriddhi. Festival resolution uses both.
+
+Output rows have the same shape as panchang3.get_panchang().
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import datetime as _dt
+
+import numpy as np
+from skyfield import almanac
+
+import panchang3
+from panchang3 import EPH, TS, LIMB_SPANS, DEFAULT_AYANAMSA, sun_moon_longitudes, limb_values
+from location_context import LocationContext, get_context
+from precision import DEFAULT_PRECISION, tier as precision_tier
+
+# new/full moons are searched this far before the first sunrise
+PHASE_LOOKBACK_DAYS = 40
+
+# -------------------------
+# Series
+# -------------------------
+def local_offsets(start: _dt.date, n: int, lon: float, tz: Optional[str] = None) -> np.ndarray:
+    """panchang3.utc_offset_hours for n consecutive dates from start."""
+    if not tz:
+        return np.full(n, lon / 15.0)
+    return np.array([panchang3.utc_offset_hours(start + _dt.timedelta(days=i), lon, tz) for i in range(n)])
+
+def _day_starts(start: _dt.date, offsets: np.ndarray, hour: float = 0.0):
+    """Time array of local `hour`:00 on len(offsets) consecutive days from start."""
+    n = len(offsets)
+    return TS.utc(start.year, start.month, start.day + np.arange(n), hour - offsets)
+
+def sunrise_sunset_series(start: _dt.date, n_days: int, lat: float, lon: float,
+                          tz: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    TT Julian dates of sunrise and sunset for n_days local dates from start,
+    with the same local-day windows and 06:00/18:00 fallbacks as
+    panchang3.sunrise_sunset_for_date, from a single find_discrete call.
+    """
+    sunrise, sunset, _, _ = sunrise_sunset_found(start, n_days, lat, lon, tz)
+    return sunrise, sunset
+
+def sunrise_sunset_days(start: _dt.date, days: np.ndarray, lat: float, lon: float,
+                        tz: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    sunrise_sunset_series for only the given (sorted) day offsets from start:
+    one search per run of consecutive days, for callers that recompute a few
+    flagged days of a window.
+    """
+    days = np.asarray(days, dtype=int)
+    sunrise, sunset = np.empty(len(days)), np.empty(len(days))
+    for run in np.split(np.arange(len(days)), np.nonzero(np.diff(days) != 1)[0] + 1):
+        if len(run):
+            first = start + _dt.timedelta(days=int(days[run[0]]))
+            sunrise[run], sunset[run] = sunrise_sunset_series(first, len(run), lat, lon, tz)
+    return sunrise, sunset
+
+def sunrise_sunset_found(start: _dt.date, n_days: int, lat: float, lon: float,
+                         tz: Optional[str] = None, ctx: Optional[LocationContext] = None
+                         ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    sunrise_sunset_series plus boolean arrays marking the days that did not use a fallback.
+    ctx: the location's context (default: the pooled one).
+    """
+    ctx = ctx or get_context(lat, lon, tz)
+    offsets = local_offsets(start, n_days + 1, lon, tz)
+    bounds = _day_starts(start, offsets)
+    sunrise = _day_starts(start, offsets[:n_days], 6).tt.copy()
+    sunset = _day_starts(start, offsets[:n_days], 18).tt.copy()
+    found = {1: np.zeros(n_days, dtype=bool), 0: np.zeros(n_days, dtype=bool)}
+    try:
+        times, events = almanac.find_discrete(bounds[0], TS.tt_jd(bounds.tt[-1] - 1.0 / 86400.0),
+                                              ctx.sunrise_sunset)
+    except Exception:
+        return sunrise, sunset, found[1], found[0]
+    if len(times) == 0:
+        return sunrise, sunset, found[1], found[0]
+
+    day = np.searchsorted(bounds.tt, times.tt, side="right") - 1
+    events = np.asarray(events).astype(int)
+    for value, out in ((1, sunrise), (0, sunset)):
+        mask = events == value
+        days, first = np.unique(day[mask], return_index=True)
+        out[days] = times.tt[mask][first]
+        found[value][days] = True
+    return sunrise, sunset, found[1], found[0]
+
+def sunrise_values(start: _dt.date, n_days: int, lat: float, lon: float, tz: Optional[str],
+                   observer, ayanamsa: str = DEFAULT_AYANAMSA, grid: float = 0.0,
+                   precision: str = DEFAULT_PRECISION):
+    """
+    (sunrise, sunset, longitudes at sunrise, estimated sunrise error bound in seconds).
+    grid > 0 interpolates sunrise/sunset from a grid of that many degrees
+    (sungrid.py); the days where the error bound could change a limb at
+    sunrise get an exact sunrise search and new longitudes, the other days
+    keep the interpolated values.
+    """
+    if grid <= 0:
+        sunrise, sunset = sunrise_sunset_series(start, n_days, lat, lon, tz)
+        vals = sun_moon_longitudes(TS.tt_jd(sunrise), observer, ayanamsa, precision)
+        return sunrise, sunset, vals, np.zeros(n_days)
+    import sungrid
+    sunrise, sunset, bound = sungrid.sunrise_sunset_series(start, n_days, lat, lon, tz, grid)
+    vals = sun_moon_longitudes(TS.tt_jd(sunrise), observer, ayanamsa, precision)
+    near = np.nonzero(sungrid.near_limb_boundary(limb_values(vals), bound))[0]
+    if len(near):
+        sunrise[near], sunset[near] = sunrise_sunset_days(start, near, lat, lon, tz)
+        bound[near] = 0.0
+        fixed = sun_moon_longitudes(TS.tt_jd(sunrise[near]), observer, ayanamsa, precision)
+        vals = {k: np.array(np.broadcast_to(v, n_days), dtype=float) for k, v in vals.items()}
+        for k, v in fixed.items():
+            vals[k][near] = v
+    return sunrise, sunset, vals, bound
+
+def limb_transition_series(limbs: Iterable[str], t0_jd: float, t1_jd: float, observer=None,
+                           step_days: float = 0.125, iterations: int = 5,
+                           spans: Optional[Dict[str, float]] = None,
+                           values=limb_values,
+                           ayanamsa: str = DEFAULT_AYANAMSA,
+                           precision: str = DEFAULT_PRECISION) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    All boundaries of the given limbs in [t0, t1]:
+    {limb: (TT Julian dates, 0-based index of the limb that starts there)}.
+
+    Every limb is sampled on one shared grid (step below the shortest karana,
+    so a grid cell holds at most one boundary per limb) and all brackets are
+    refined together by regula falsi: a few array evaluations in total instead
+    of a find_discrete per limb, which re-evaluates nutation for every probe.
+
+    spans/values default to the panchang limbs; other running angles (e.g.
+    the sidereal sun for sankrantis) can be passed as a values() function
+    returning {name: degrees} plus their spans.
+    """
+    limbs = list(limbs)
+    spans = LIMB_SPANS if spans is None else spans
+    n = int(np.ceil((t1_jd - t0_jd) / step_days)) + 1
+    grid = t0_jd + np.arange(n) * step_days
+    lv = values(sun_moon_longitudes(TS.tt_jd(grid), observer, ayanamsa, precision))
+
+    lo_jd, hi_jd, lo_f, hi_f, targets, owner, new_index = [], [], [], [], [], [], []
+    for k, limb in enumerate(limbs):
+        span = spans[limb]
+        unwrapped = np.unwrap(lv[limb], period=360.0)
+        count = np.floor(unwrapped / span)
+        cells = np.nonzero(np.diff(count))[0]
+        target = (count[cells] + 1) * span
+        lo_jd.append(grid[cells])
+        hi_jd.append(grid[cells + 1])
+        lo_f.append(unwrapped[cells] - target)
+        hi_f.append(unwrapped[cells + 1] - target)
+        targets.append(target % 360.0)
+        owner.append(np.full(len(cells), k))
+        new_index.append(((count[cells] + 1) % round(360.0 / span)).astype(int))
+    lo_jd, hi_jd, lo_f, hi_f, targets, owner = map(np.concatenate, (lo_jd, hi_jd, lo_f, hi_f, targets, owner))
+
+    if len(lo_jd):
+        for _ in range(iterations):
+            mid_jd = lo_jd + (hi_jd - lo_jd) * (-lo_f) / (hi_f - lo_f)
+            mv = values(sun_moon_longitudes(TS.tt_jd(mid_jd), observer, ayanamsa, precision))
+            mid_val = np.choose(owner, [mv[limb] for limb in limbs])
+            mid_f = (mid_val - targets + 180.0) % 360.0 - 180.0
+            below = mid_f < 0
+            lo_jd = np.where(below, mid_jd, lo_jd)
+            lo_f = np.where(below, mid_f, lo_f)
+            hi_jd = np.where(below, hi_jd, mid_jd)
+            hi_f = np.where(below, hi_f, mid_f)
+    end_jd = lo_jd + (hi_jd - lo_jd) * (-lo_f) / (hi_f - lo_f) if len(lo_jd) else lo_jd
+
+    out = {}
+    offset = 0
+    for k, limb in enumerate(limbs):
+        m = len(new_index[k])
+        out[limb] = (end_jd[offset:offset + m], new_index[k])
+        offset += m
+    return out
+
+def moon_phase_series(t0_jd: float, t1_jd: float, precision: str = DEFAULT_PRECISION) -> Dict[int, np.ndarray]:
+    """
+    TT Julian dates of new (0) and full (2) moons in [t0, t1]: searched, or
+    read from the event index's tithi series in tiers with phases="index".
+    """
+    if precision_tier(precision).phases == "index":
+        import events
+        if TS.utc(events.INDEX_START.year, 1, 1).tt <= t0_jd and t1_jd < TS.utc(events.INDEX_END.year + 1, 1, 1).tt:
+            jd, idx = events.get_index().series["tithi"]
+            lo, hi = np.searchsorted(jd, [t0_jd, t1_jd], side="right")
+            jd, idx = jd[lo:hi], idx[lo:hi]
+            # new moon starts Shukla Pratipada (0), full moon Krishna Pratipada (15)
+            return {0: jd[idx == 0], 2: jd[idx == 15]}
+    times, phases = almanac.find_discrete(TS.tt_jd(t0_jd), TS.tt_jd(t1_jd), almanac.moon_phases(EPH))
+    phases = np.asarray(phases).astype(int)
+    return {0: times.tt[phases == 0], 2: times.tt[phases == 2]}
+
+def moon_phase_series_for_dates(first: _dt.date, last: _dt.date,
+                                precision: str = DEFAULT_PRECISION) -> Dict[int, np.ndarray]:
+    """moon_phase_series() covering get_panchang_range(first, last) at any location (its phases=)."""
+    # local days lie within a day of UTC; sunrise is inside the local day
+    t0 = TS.utc(first.year, first.month, first.day - 1).tt - PHASE_LOOKBACK_DAYS
+    t1 = TS.utc(last.year, last.month, last.day + 2).tt
+    return moon_phase_series(t0, t1, precision)
+
+# -------------------------
+# Udaya tithi scan
+# -------------------------
+def udaya_scan(sunrise_jd: np.ndarray, tithi_at_sunrise: np.ndarray,
+               tithi_transitions_jd: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Merge the sunrise series (n + 1 sunrises for n days) with the tithi
+    transition series.
+
+    Returns (vriddhi, kshaya) for the n days:
+    - vriddhi[i]: no transition before the next sunrise, the same tithi rules both
+    - kshaya[i]: 1..30 index of the tithi that starts and ends inside day i, else 0
+    """
+    before = np.searchsorted(tithi_transitions_jd, sunrise_jd, side="right")
+    count = before[1:] - before[:-1]
+    vriddhi = count == 0
+    kshaya = np.where(count >= 2, tithi_at_sunrise[:-1] % 30 + 1, 0)
+    return vriddhi, kshaya
+
+def udaya_tithi_year(year: int, lat: float = 28.6139, lon: float = 77.2090) -> List[Dict]:
+    """Udaya tithi, vriddhi and kshaya flags for every day of a year."""
+    start = _dt.date(year, 1, 1)
+    rows = get_panchang_range(start, _dt.date(year, 12, 31), lat, lon, fields="core,transitions")
+    return [{
+        "date": r["date"],
+        "tithi": r["tithi"],
+        "tithi_index": r["tithi_index"],
+        "tithi_vriddhi": r["transitions"]["tithi_vriddhi"],
+        "kshaya_tithi": r["transitions"]["kshaya_tithi"],
+    } for r in rows]
+
+# -------------------------
+# Range panchang
+# -------------------------
+def _row_vals(vals: Dict[str, np.ndarray], i: int) -> Dict[str, float]:
+    return {k: float(v[i]) for k, v in vals.items()}
+
+def _iso_list(jd: np.ndarray) -> List[str]:
+    if len(jd) == 0:
+        return []
+    return TS.tt_jd(jd).utc_iso()
+
+def get_panchang_range(start: Union[str, _dt.date, _dt.datetime],
+                       end: Union[str, _dt.date, _dt.datetime],
+                       lat: float = 28.6139,
+                       lon: float = 77.2090,
+                       month_system: str = "purnimanta",
+                       fields: Union[None, str, Iterable[str]] = None,
+                       ayanamsa: str = DEFAULT_AYANAMSA,
+                       tz: Optional[str] = None,
+                       sunrise_grid: Optional[float] = None,
+                       precision: str = DEFAULT_PRECISION,
+                       phases: Optional[Dict[int, np.ndarray]] = None) -> List[Dict]:
+    """
+    panchang3.get_panchang() for every date in [start, end], computed from
+    shared series. Festivals honour kshaya/vriddhi tithis.
+    tz: IANA timezone; dates are local dates (default: local mean time).
+    sunrise_grid: interpolate sunrise/sunset from a grid this fine in degrees
+                  (default: the precision tier's; 0 searches every day exactly).
+    precision: fast, standard (default) or reference, see precision.py.
+    phases: moon_phase_series() of this precision covering at least
+            [first sunrise - PHASE_LOOKBACK_DAYS, last sunrise]; callers
+            computing several locations at once share one search.
+    """
+    wanted = panchang3.resolve_fields(fields)
+    ayanamsa = panchang3.validate_ayanamsa(ayanamsa)
+    d0 = panchang3.parse_date(start)
+    d1 = panchang3.parse_date(end)
+    if d1 < d0:
+        raise ValueError("end must not be before start")
+    n = (d1 - d0).days + 1
+    observer = get_context(lat, lon, tz)
+
+    # series run from the day before start (is the first day a vriddhi repeat?)
+    # to the day after end (the next sunrise closes the last day); day i of the
+    # range is index i + 1
+    tier = precision_tier(precision)
+    grid = tier.sunrise_grid if sunrise_grid is None else sunrise_grid
+    sunrise_all, sunset_all, vals_all, bound_all = sunrise_values(
+        d0 - _dt.timedelta(days=1), n + 2, lat, lon, tz, observer, ayanamsa, grid, tier.name)
+    tithi_all = (limb_values(vals_all)["tithi"] // LIMB_SPANS["tithi"]).astype(int) + 1
+    sunrise_jd = sunrise_all[1:]
+    vals = {k: v[1:] for k, v in vals_all.items()}
+    sunrise_iso = _iso_list(sunrise_all[1:n + 1])
+    sunset_iso = _iso_list(sunset_all[1:n + 1])
+
+    need_udaya = "transitions" in wanted or "festivals" in wanted
+    series = {}
+    if need_udaya:
+        limbs = LIMB_SPANS if "transitions" in wanted else ("tithi",)
+        series = limb_transition_series(limbs, sunrise_all[0], sunrise_all[-1] + 1.25, observer,
+                                        ayanamsa=ayanamsa, precision=tier.name)
+        vriddhi_all, kshaya_all = udaya_scan(sunrise_all, tithi_all, series["tithi"][0])
+        vriddhi, kshaya = vriddhi_all[1:], kshaya_all[1:]
+
+    if "lunar_month" in wanted:
+        p0, p1 = sunrise_jd[0] - PHASE_LOOKBACK_DAYS, sunrise_jd[n - 1]
+        if phases is None:
+            phases = moon_phase_series(p0, p1, tier.name)
+        else:
+            phases = {ph: jd[(jd >= p0) & (jd <= p1)] for ph, jd in phases.items()}
+        phase_rows = {}
+        for ph, jd in phases.items():
+            pv = sun_moon_longitudes(TS.tt_jd(jd), observer, ayanamsa, tier.name) if len(jd) else None
+            # index of the last phase <= each sunrise, -1 when none
+            idx = np.searchsorted(jd, sunrise_jd[:n], side="right") - 1
+            phase_rows[ph] = (jd, pv, _iso_list(jd), idx)
+
+    if "months" in wanted:
+        from solar import solar_dates
+        midnight_all = _day_starts(d0, local_offsets(d0, n + 2, lon, tz)).tt
+        solar = solar_dates(d0, sunrise_all, sunset_all, midnight_all, lat, lon, tz, ayanamsa)
+
+    if "grahas" in wanted:
+        from grahas import graha_longitudes, graha_positions
+        graha_lons = graha_longitudes(TS.tt_jd(sunrise_jd[:n]), observer=observer, ayanamsa=ayanamsa)
+
+    if "eclipses" in wanted:
+        from eclipses import eclipses_by_day
+        day_eclipses = eclipses_by_day(_day_starts(d0, local_offsets(d0, n + 1, lon, tz)).tt, lat, lon)
+
+    if "festivals" in wanted:
+        from festivals3 import makar_sankranti_days
+        sankranti_days = makar_sankranti_days(d0, d1, lat, lon, tz, ayanamsa)
+
+    if "transitions" in wanted:
+        next_end = {}
+        for limb, (jd, _) in series.items():
+            pos = np.searchsorted(jd, sunrise_jd[:n], side="right")
+            next_end[limb] = (jd, pos, _iso_list(jd))
+
+    rows = []
+    prev_vriddhi = bool(vriddhi_all[0]) if need_udaya else False
+    for i in range(n):
+        day = d0 + _dt.timedelta(days=i)
+        v = _row_vals(vals, i)
+        result = {"date": day.isoformat()}
+        result.update(panchang3._core_section(day, sunrise_iso[i], sunset_iso[i], v))
+
+        month_debug = None
+        if "lunar_month" in wanted:
+            picked = {}
+            for ph, (jd, pv, iso, idx) in phase_rows.items():
+                j = idx[i]
+                picked[ph] = (iso[j], _row_vals(pv, j)) if j >= 0 else (None, None)
+            amanta_base, purnimanta_base, month_debug = panchang3.label_lunar_months(
+                picked[0][0], picked[0][1], picked[2][0], picked[2][1], v)
+            section, purnimanta_month = panchang3._label_lunar_months(
+                amanta_base, purnimanta_base, result["paksha"], month_system)
+            result.update(section)
+            if "months" in wanted:
+                result["months"] = panchang3.month_views(panchang3.MonthBasis(
+                    amanta_base, purnimanta_base, result["paksha"], v["sid_sun"]))
+                result["months"].update((cal, days[i]) for cal, days in solar.items())
+            if "festivals" in wanted:
+                from festivals3 import get_festivals
+                result["festivals"] = get_festivals(
+                    result, purnimanta_month,
+                    kshaya_tithi=int(kshaya[i]) or None, repeated=prev_vriddhi,
+                    makar_sankranti=day in sankranti_days)
+
+        if "transitions" in wanted:
+            section = {}
+            for limb, (jd, pos, iso) in next_end.items():
+                p = pos[i]
+                section[f"{limb}_end"] = iso[p] if p < len(jd) else None
+            section["tithi_vriddhi"] = bool(vriddhi[i])
+            section["kshaya_tithi"] = panchang3.tithi_label(int(kshaya[i])) if kshaya[i] else None
+            result["transitions"] = section
+
+        if "grahas" in wanted:
+            result["grahas"] = graha_positions(graha_lons[i])
+
+        if "eclipses" in wanted:
+            result["eclipses"] = day_eclipses[i]
+
+        if "debug" in wanted:
+            result["_debug"] = panchang3._debug_section(v, month_debug, ayanamsa)
+            result["_debug"]["precision"] = tier.name
+            if grid > 0:
+                result["_debug"]["sunrise_error_bound_s"] = round(float(bound_all[i + 1]), 3)
+
+        if need_udaya:
+            prev_vriddhi = bool(vriddhi[i])
+        rows.append(result)
+    return rows
+
+# -------------------------
+# CLI test
+# -------------------------
+if __name__ == "__main__":
+    import time
+    t = time.perf_counter()
+    year = udaya_tithi_year(2025)
+    print(f"udaya scan 2025: {time.perf_counter() - t:.2f}s")
+    for r in year:
+        if r["kshaya_tithi"] or r["tithi_vriddhi"]:
+            print(r["date"], r["tithi"], "vriddhi" if r["tithi_vriddhi"] else f"kshaya {r['kshaya_tithi']}")
@@ -0,0 +1,79 @@
+# precision.py
+"""
+Precision tiers: which implementation each engine stage uses.
+
+    tier       sunrise            longitudes                         ayanamsa   moon phases
+    fast       0.1 deg grid       topocentric astrometric             tables     event index
+    standard   exact search       topocentric apparent, J2000         tables     search
+                                  ecliptic + precession
+    reference  exact search       topocentric apparent, ecliptic      direct     search
+                                  and equinox of date (rigorous)
+
+- sunrise: the grid interpolates between cached nodes (sungrid.py) and falls
+  back to the exact search near limb boundaries and in cells whose nodes are
+  not cached yet (they are then warmed in the background), so a cold request
+  costs what the standard tier's does; PANCHANG_SUNRISE_GRID_DEG > 0 also
+  puts the standard tier on the grid.
+- longitudes: astrometric skips the aberration and light deflection of
+  apparent() and applies the first-order annual aberration in longitude
+  instead; reference rotates the apparent position into the true ecliptic of
+  date and removes the nutation in longitude, instead of adding the general
+  precession to J2000 longitudes (which leaves up to ~5" for the moon).
+- ayanamsa: star-based models (true_chitrapaksha) are read from their 10-day
+  table or, in reference, evaluated at every instant.
+- moon phases (lunar month): fast looks up new and full moons in the event
+  index (1900-2050, events.py) instead of searching.
+
+Every tier has latency budgets (one /panchang day, default fields, in ms,
+warm and cold: a new date and location with nothing cached) and error
+budgets against the reference tier; `python -m bench.precision`
+measures both and fails when a tier is over budget. Transition searches
+evaluate longitudes with the tier's implementation; grahas, the solar
+calendars and eclipses are the same in every tier.
+"""
+
+from typing import Dict, List, NamedTuple
+
+import config
+
+DEFAULT_PRECISION = "standard"
+
+class Tier(NamedTuple):
+    name: str
+    sunrise_grid: float             # degrees; 0 = exact search at the location
+    longitudes: str                 # "astrometric", "apparent" or "rigorous"
+    exact_ayanamsa: bool            # evaluate table-driven ayanamsas directly
+    phases: str                     # "index" or "search"
+    # budgets
+    latency_ms: float               # one warm /panchang day, default fields
+    cold_latency_ms: float          # the same, new date and location (nothing cached)
+    sunrise_error_s: float          # vs reference
+    longitude_error_arcsec: float   # sidereal sun and moon at sunrise, vs reference
+    phase_error_s: float            # new/full moon times, vs reference
+
+TIERS: Dict[str, Tier] = {
+    # measured over the bench corpus: fast 11 ms (46 ms cold), 0.1 s, 4.9", 4.5 s;
+    # standard 57 ms (57 ms cold), 0 s, 4.7", 0 s
+    "fast": Tier("fast", config.SUNRISE_GRID_DEG or 0.1, "astrometric", False, "index",
+                 latency_ms=25.0, cold_latency_ms=80.0,
+                 sunrise_error_s=2.0, longitude_error_arcsec=10.0, phase_error_s=30.0),
+    "standard": Tier("standard", config.SUNRISE_GRID_DEG, "apparent", False, "search",
+                     latency_ms=80.0, cold_latency_ms=100.0,
+                     sunrise_error_s=2.0, longitude_error_arcsec=10.0, phase_error_s=1.0),
+    "reference": Tier("reference", 0.0, "rigorous", True, "search",
+                      latency_ms=100.0, cold_latency_ms=120.0,
+                      sunrise_error_s=0.0, longitude_error_arcsec=0.0, phase_error_s=0.0),
+}
+
+def names() -> List[str]:
+    return list(TIERS)
+
+def validate(name: str) -> str:
+    """Canonical tier name; raises ValueError for unknown tiers."""
+    key = (name or DEFAULT_PRECISION).strip().lower()
+    if key not in TIERS:
+        raise ValueError(f"unknown precision: {name!r} (expected any of {', '.join(TIERS)})")
+    return key
+
+def tier(name: str = DEFAULT_PRECISION) -> Tier:
+    return TIERS[validate(name)]
@@ -0,0 +1,167 @@
+# prewarm.py
+"""
+Cache pre-warming for upcoming days at popular locations.
+
+Every /panchang request is counted per (location, fields, ayanamsa, precision) in hourly
+buckets covering the last PANCHANG_PREWARM_WINDOW_HOURS. An asyncio task,
+started with the app, wakes every PANCHANG_PREWARM_INTERVAL seconds; for each
+of the top-K entries whose local midnight is less than
+PANCHANG_PREWARM_LEAD_MINUTES away it computes the next PANCHANG_PREWARM_DAYS
+local dates with one range-engine call (in a worker thread) and stores every
+day in the result cache under the key /panchang looks up, so the sunrise
+rush finds the new date already computed.
+
+Metrics are per process: requests seen, how many asked for a pre-warmed day
+(coverage) and how many of those were answered from the cache (hit rate).
+"""
+
+import asyncio
+import datetime as _dt
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from typing import Deque, Dict, Hashable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import cache
+import config
+from cities import Location
+
+# (location key, fields key, ayanamsa, precision)
+Target = Tuple[str, str, str, str]
+
+class Tracker:
+    """Recent traffic per target, pre-warm state and metrics."""
+
+    def __init__(self, window_hours: int = config.PREWARM_WINDOW_HOURS,
+                 max_warmed_keys: int = max(config.RESULT_CACHE_SIZE, 1)):
+        self.window_hours = max(1, window_hours)
+        self.max_warmed_keys = max_warmed_keys
+        self._lock = threading.Lock()
+        self._buckets: Deque[Tuple[int, Counter]] = deque()
+        self._targets: Dict[Target, Tuple[Location, str, str, str]] = {}
+        self._warmed_keys: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._warmed_for: Dict[Target, _dt.date] = {}
+        self.requests = 0
+        self.covered = 0
+        self.prewarm_hits = 0
+        self.runs = 0
+        self.days_warmed = 0
+        self.errors = 0
+        self.last_run: Optional[float] = None
+        self.last_run_seconds: Optional[float] = None
+
+    # -------------------------
+    # Traffic
+    # -------------------------
+    def _bucket(self, now: float) -> Counter:
+        hour = int(now // 3600)
+        if not self._buckets or self._buckets[-1][0] != hour:
+            self._buckets.append((hour, Counter()))
+        while self._buckets[0][0] <= hour - self.window_hours:
+            self._buckets.popleft()
+        return self._buckets[-1][1]
+
+    def record(self, loc: Location, fields_key: str, ayanamsa: str, precision: str, key: Hashable) -> None:
+        """Count one /panchang request; call before the cache lookup."""
+        target = (loc.key, fields_key, ayanamsa, precision)
+        with self._lock:
+            self._bucket(time.time())[target] += 1
+            self._targets[target] = (loc, fields_key, ayanamsa, precision)
+            self.requests += 1
+            if key in self._warmed_keys:
+                self.covered += 1
+                if key in cache.RESULTS:
+                    self.prewarm_hits += 1
+
+    def top(self, k: int = config.PREWARM_TOP_K) -> List[Tuple[Location, str, str, str]]:
+        """The k most requested targets in the window."""
+        with self._lock:
+            totals: Counter = Counter()
+            self._bucket(time.time())
+            for _, counts in self._buckets:
+                totals.update(counts)
+            # forget targets that left the window
+            for target in [t for t in self._targets if t not in totals]:
+                del self._targets[target]
+            return [self._targets[t] for t, _ in totals.most_common(k)]
+
+    # -------------------------
+    # Warming
+    # -------------------------
+    def due(self, now: Optional[_dt.datetime] = None,
+            lead_minutes: int = config.PREWARM_LEAD_MINUTES,
+            k: int = config.PREWARM_TOP_K) -> List[Tuple[Location, str, str, str, _dt.date]]:
+        """Top targets whose local midnight is within the lead time and not yet warmed."""
+        now = now or _dt.datetime.now(_dt.timezone.utc)
+        out = []
+        for loc, fields_key, ayanamsa, precision in self.top(k):
+            local = now.astimezone(ZoneInfo(loc.tz))
+            tomorrow = local.date() + _dt.timedelta(days=1)
+            midnight = _dt.datetime.combine(tomorrow, _dt.time(), tzinfo=local.tzinfo)
+            if midnight - local > _dt.timedelta(minutes=lead_minutes):
+                continue
+            if self._warmed_for.get((loc.key, fields_key, ayanamsa, precision)) == tomorrow:
+                continue
+            out.append((loc, fields_key, ayanamsa, precision, tomorrow))
+        return out
+
+    def warm(self, loc: Location, fields_key: str, ayanamsa: str, precision: str, first: _dt.date,
+             days: int = config.PREWARM_DAYS) -> int:
+        """Compute `days` local dates from `first` in one batch and cache each day."""
+        from panchang_range import get_panchang_range
+        last = first + _dt.timedelta(days=max(1, days) - 1)
+        rows = get_panchang_range(first, last, loc.lat, loc.lon, fields=fields_key,
+                                  ayanamsa=ayanamsa, tz=loc.tz, precision=precision)
+        for row in rows:
+            row["location"] = loc.info()
+            key = cache.panchang_key(loc, row["date"], fields_key, ayanamsa, precision)
+            cache.RESULTS.warm(key, row)
+            with self._lock:
+                self._warmed_keys[key] = None
+                self._warmed_keys.move_to_end(key)
+                while len(self._warmed_keys) > self.max_warmed_keys:
+                    self._warmed_keys.popitem(last=False)
+        with self._lock:
+            self._warmed_for[(loc.key, fields_key, ayanamsa, precision)] = first
+            self.days_warmed += len(rows)
+        return len(rows)
+
+    def run_once(self, now: Optional[_dt.datetime] = None) -> int:
+        """One scheduler pass; returns the number of days computed."""
+        t0 = time.perf_counter()
+        done = 0
+        for loc, fields_key, ayanamsa, precision, first in self.due(now):
+            try:
+                done += self.warm(loc, fields_key, ayanamsa, precision, first)
+            except Exception:
+                self.errors += 1
+        self.runs += 1
+        self.last_run = time.time()
+        self.last_run_seconds = round(time.perf_counter() - t0, 3)
+        return done
+
+    def stats(self) -> Dict:
+        with self._lock:
+            targets = len(self._targets)
+            warmed = len(self._warmed_keys)
+        return {
+            "requests": self.requests,
+            "coverage": round(self.covered / self.requests, 4) if self.requests else None,
+            "hit_rate": round(self.prewarm_hits / self.covered, 4) if self.covered else None,
+            "tracked_targets": targets,
+            "warmed_entries": warmed,
+            "days_warmed": self.days_warmed,
+            "runs": self.runs,
+            "errors": self.errors,
+            "last_run": self.last_run,
+            "last_run_seconds": self.last_run_seconds,
+        }
+
+TRACKER = Tracker()
+
+async def run_scheduler(tracker: Tracker = TRACKER, interval: float = config.PREWARM_INTERVAL) -> None:
+    """Pre-warm loop for the app's lifespan; the work runs in a thread."""
+    while True:
+        await asyncio.to_thread(tracker.run_once)
+        await asyncio.sleep(max(1.0, interval))
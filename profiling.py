@@ -0,0 +1,115 @@
+# profiling.py
+"""
+Opt-in per-request profiling.
+
+profile_call() runs a function under cProfile and reports
+- per-stage timings, read from the profile of the engine's stage functions
+  (so the engines carry no timing code and cost nothing when profiling is
+  off), and
+- the top-N functions by cumulative time.
+"""
+
+import cProfile
+import os
+import pstats
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import grahas
+import panchang3
+import panchang_range
+
+# stage -> (function, caller or None). With a caller, only time spent in calls
+# made from that caller is counted (sun_moon_longitudes is reused by later stages).
+# Both the single-day engine and the range engine are covered; entries sharing
+# a stage name are summed.
+STAGES = [
+    ("sunrise", panchang3.sunrise_sunset_for_date, None),
+    ("sunrise", panchang_range.sunrise_sunset_series, None),
+    ("longitudes", panchang3.sun_moon_longitudes, panchang3.get_panchang),
+    ("longitudes", panchang3.sun_moon_longitudes, panchang_range.get_panchang_range),
+    ("core", panchang3._core_section, None),
+    ("lunar_month", panchang3._lunar_month_section, None),
+    ("lunar_month", panchang_range.moon_phase_series, None),
+    ("lunar_month", panchang3.label_lunar_months, panchang_range.get_panchang_range),
+    ("festivals", panchang3._festivals_section, None),
+    ("transitions", panchang3._transitions_section, None),
+    ("transitions", panchang_range.limb_transition_series, None),
+    ("grahas", grahas.graha_longitudes, None),
+    ("debug", panchang3._debug_section, None),
+]
+
+# cProfile hooks are per thread but only one profiler should be active at a time
+_lock = threading.Lock()
+
+def _key(fn: Callable) -> Tuple[str, int, str]:
+    code = fn.__code__
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+def _label(key: Tuple[str, int, str]) -> str:
+    filename, line, name = key
+    if filename == "~":
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+def stage_timings(stats: pstats.Stats) -> Dict[str, Dict]:
+    """Cumulative ms and call count per stage (stages that did not run are omitted)."""
+    out = {}
+    for stage, fn, caller in STAGES:
+        entry = stats.stats.get(_key(fn))
+        if entry is None:
+            continue
+        cc, nc, tt, ct, callers = entry
+        if caller is not None:
+            per_caller = callers.get(_key(caller))
+            if per_caller is None:
+                continue
+            nc, ct = per_caller[1], per_caller[3]
+        prev = out.get(stage, {"ms": 0.0, "calls": 0})
+        out[stage] = {"ms": round(prev["ms"] + ct * 1000.0, 3), "calls": prev["calls"] + nc}
+    return out
+
+def top_functions(stats: pstats.Stats, n: int) -> List[Dict]:
+    """Top-n functions by cumulative time."""
+    rows = sorted(stats.stats.items(), key=lambda kv: kv[1][3], reverse=True)
+    out = []
+    for key, (cc, nc, tt, ct, callers) in rows:
+        if "_lsprof" in key[2]:
+            continue
+        out.append({
+            "function": _label(key),
+            "calls": nc,
+            "tottime_ms": round(tt * 1000.0, 3),
+            "cumtime_ms": round(ct * 1000.0, 3),
+        })
+        if len(out) >= n:
+            break
+    return out
+
+def profile_call(fn: Callable, *args, top_n: Optional[int] = None, **kwargs) -> Tuple[object, Dict]:
+    """
+    Run fn(*args, **kwargs) under cProfile.
+    Returns (result, report) with report = {"wall_ms", "stages", "top"}.
+    """
+    import config
+    if top_n is None:
+        top_n = config.PROFILE_TOP_N
+
+    prof = cProfile.Profile()
+    with _lock:
+        t0 = time.perf_counter()
+        prof.enable()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            prof.disable()
+        wall = time.perf_counter() - t0
+
+    stats = pstats.Stats(prof)
+    report = {
+        "wall_ms": round(wall * 1000.0, 3),
+        "stages": stage_timings(stats),
+        "top": top_functions(stats, top_n),
+    }
+    return result, report
@@ -0,0 +1,125 @@
+# server.py
+"""
+Pre-fork server for multi-worker deployments.
+
+The parent process binds the socket, loads everything read-only once (the
+ephemeris, city index, event index arrays, eclipse tables and ayanamsa
+tables), creates the shared result cache and then forks the workers. The
+loaded pages stay shared copy-on-write (gc.freeze() keeps the collector from
+touching them), the de421 kernel is memory-mapped by jplephem and shared
+through the page cache, and every worker reads and fills the same result
+cache. Only worker 0 runs the bulk job queue and the cache pre-warmer; the
+in-flight request counts of all workers are shared (jobs.enable_shared_gate),
+so its jobs pause for requests served by any worker. A worker that dies is
+replaced.
+
+    python server.py --workers 4 --port 8000
+    python server.py --workers 4 --no-preload     # each worker loads its own copy (for comparison)
+"""
+
+import argparse
+import datetime as _dt
+import gc
+import os
+import signal
+import socket
+import sys
+from typing import Dict
+
+import config
+
+def preload() -> None:
+    """Import the app and build every process-wide read-only table."""
+    import main  # noqa: F401  (ephemeris, cities, engines)
+    import ayanamsa
+    import eclipses
+    import events
+    for model in ayanamsa.models():
+        ayanamsa.ayanamsa_deg(ayanamsa.J2000, model)
+    events.get_index()
+    eclipses.get_table(_dt.date.today().year // 100)
+
+def _run_worker(sock: socket.socket, index: int, preloaded: bool, log_level: str) -> None:
+    import uvicorn
+    if not preloaded:
+        preload()
+    import jobs
+    import main
+    jobs.set_worker(index)
+    main.RUN_BACKGROUND = index == 0
+    server = uvicorn.Server(uvicorn.Config(main.app, lifespan="on", log_level=log_level))
+    server.run(sockets=[sock])
+
+def serve(host: str = "0.0.0.0", port: int = 8000, workers: int = config.WORKERS,
+          preloaded: bool = True, log_level: str = "info") -> None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    if preloaded:
+        preload()
+    import cache
+    import jobs
+    cache.enable_shared()
+    jobs.enable_shared_gate(max(1, workers))
+    # objects that exist now are never collected, so the collector does not
+    # write to (and un-share) their pages in the workers
+    gc.freeze()
+
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                _run_worker(sock, index, preloaded, log_level)
+            except BaseException:
+                code = 1
+            os._exit(code)
+        children[pid] = index
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for i in range(max(1, workers)):
+        spawn(i)
+    print(f"pre-fork server pid {os.getpid()}: {len(children)} workers on {host}:{port}", file=sys.stderr)
+
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index = children.pop(pid, None)
+        if index is not None and not stopping:
+            print(f"worker {index} (pid {pid}) exited, restarting", file=sys.stderr)
+            spawn(index)
+
+# -------------------------
+# CLI
+# -------------------------
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Pre-fork multi-worker server")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--workers", type=int, default=config.WORKERS)
+    ap.add_argument("--no-preload", action="store_true", help="load state in each worker instead of once")
+    ap.add_argument("--log-level", default="info")
+    args = ap.parse_args()
+    serve(args.host, args.port, args.workers, not args.no_preload, args.log_level)
@@ -0,0 +1,193 @@
+# solar.py
+"""
+Regional solar calendars (Tamil, Malayalam, Bengali, Odia).
+
+A solar month is the sun's stay in one sidereal sign. Its civil first day
+depends on when the sankranti (ingress) falls within the Hindu day (sunrise
+to sunrise) and on the regional cutoff:
+
+- tamil:     before sunset -> that day, else the next day
+- malayalam: before the end of madhyahna (3/5 of daytime) -> that day, else the next
+- bengali:   before midnight -> the next day, else the day after
+- odia:      always that day
+
+Ingress times come from the sankranti series of the event index (events.py),
+already computed over the whole ephemeris span; a range needs one bisect per
+month plus the sunrises it already has.
+"""
+
+import datetime as _dt
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from ayanamsa import DEFAULT_AYANAMSA
+from panchang3 import parse_date
+
+class SolarCalendar(NamedTuple):
+    months: Tuple[str, ...]                     # indexed by the sign entered, Mesha first
+    cutoff: str                                 # "sunrise", "midday", "sunset" or "midnight"
+    delay: int = 0                              # days added after the cutoff rule
+    era: Optional[Tuple[str, int, int]] = None  # (name, first month index, year offset)
+
+SOLAR_CALENDARS: Dict[str, SolarCalendar] = {
+    "tamil": SolarCalendar(
+        ("Chithirai", "Vaikasi", "Aani", "Aadi", "Aavani", "Purattasi",
+         "Aippasi", "Karthigai", "Margazhi", "Thai", "Maasi", "Panguni"), "sunset"),
+    "malayalam": SolarCalendar(
+        ("Medam", "Edavam", "Midhunam", "Karkidakam", "Chingam", "Kanni",
+         "Thulam", "Vrischikam", "Dhanu", "Makaram", "Kumbham", "Meenam"), "midday",
+        era=("Kollam", 4, 824)),
+    "bengali": SolarCalendar(
+        ("Boishakh", "Joishtho", "Asharh", "Srabon", "Bhadro", "Ashshin",
+         "Kartik", "Ogrohayon", "Poush", "Magh", "Falgun", "Choitro"), "midnight", 1,
+        era=("Bangabda", 0, 593)),
+    "odia": SolarCalendar(
+        ("Baisakha", "Jyeshtha", "Ashadha", "Shrabana", "Bhadraba", "Ashwina",
+         "Kartika", "Margashira", "Pausha", "Magha", "Phalguna", "Chaitra"), "sunrise"),
+}
+
+# share of daytime after sunrise at which madhyahna ends
+MADHYAHNA_END = 0.6
+
+def _ingress_series(ayanamsa: str) -> Tuple[np.ndarray, np.ndarray]:
+    from events import get_index
+    return get_index(ayanamsa).series["sankranti"]
+
+def _era_year(cal: SolarCalendar, start: _dt.date, month: int) -> Optional[int]:
+    if cal.era is None:
+        return None
+    _, first, offset = cal.era
+    # months from the first month of the era year up to Dhanu begin in the
+    # same Gregorian year as that first month; Makara onwards in the next one
+    return start.year - offset if first <= month <= 8 else start.year - offset - 1
+
+# -------------------------
+# Month starts
+# -------------------------
+class _DayBounds(NamedTuple):
+    sunrise: float
+    sunset: float
+    next_sunrise: float
+    midnight: float        # local midnight ending the civil day
+
+def _month_start(ingress_jd: float, day: _dt.date, b: _DayBounds, cal: SolarCalendar) -> _dt.date:
+    """First civil day of the month whose ingress falls in the Hindu day `day`."""
+    if cal.cutoff == "sunrise":
+        cutoff = b.next_sunrise
+    elif cal.cutoff == "midday":
+        cutoff = b.sunrise + MADHYAHNA_END * (b.sunset - b.sunrise)
+    elif cal.cutoff == "sunset":
+        cutoff = b.sunset
+    else:
+        cutoff = b.midnight
+    return day + _dt.timedelta(days=cal.delay + (0 if ingress_jd < cutoff else 1))
+
+@lru_cache(maxsize=1024)
+def _ingress_day(ingress_jd: float, lat: float, lon: float,
+                 tz: Optional[str]) -> Tuple[_dt.date, _DayBounds]:
+    """Hindu day containing an ingress outside the caller's sunrise series."""
+    from panchang_range import _day_starts, local_offsets, sunrise_sunset_series
+    from panchang3 import TS, utc_offset_hours
+    utc = TS.tt_jd(ingress_jd).utc_datetime()
+    local = (utc + _dt.timedelta(hours=utc_offset_hours(utc.date(), lon, tz))).date()
+    first = local - _dt.timedelta(days=1)
+    sunrise, sunset = sunrise_sunset_series(first, 3, lat, lon, tz)
+    midnights = _day_starts(first + _dt.timedelta(days=1), local_offsets(first + _dt.timedelta(days=1), 3, lon, tz)).tt
+    i = int(np.searchsorted(sunrise, ingress_jd, side="right")) - 1
+    return first + _dt.timedelta(days=i), _DayBounds(sunrise[i], sunset[i], sunrise[i + 1], midnights[i])
+
+def solar_dates(start: _dt.date, sunrise_jd: np.ndarray, sunset_jd: np.ndarray,
+                midnight_jd: np.ndarray, lat: float, lon: float, tz: Optional[str] = None,
+                ayanamsa: str = DEFAULT_AYANAMSA,
+                calendars: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
+    """
+    Solar calendar dates for the days start .. start + len(sunrise_jd) - 3.
+
+    sunrise_jd, sunset_jd, midnight_jd: TT JDs for the local days start - 1
+    through the day after the last one (the range engine's sunrise series);
+    midnight_jd[i] is the midnight ending day i. Returns {calendar: [row per day]}.
+    """
+    names = calendars or list(SOLAR_CALENDARS)
+    cals = [SOLAR_CALENDARS[c] for c in names]
+    first_day = start - _dt.timedelta(days=1)
+    n = len(sunrise_jd) - 2
+
+    jd, idx = _ingress_series(ayanamsa)
+    # the last ingress before the series, then every ingress inside it
+    lo = max(int(np.searchsorted(jd, sunrise_jd[0], side="right")) - 1, 0)
+    hi = int(np.searchsorted(jd, sunrise_jd[-1], side="left"))
+    starts = [[] for _ in cals]
+    for k in range(lo, hi):
+        if jd[k] < sunrise_jd[0]:
+            day, bounds = _ingress_day(float(jd[k]), lat, lon, tz)
+        else:
+            i = int(np.searchsorted(sunrise_jd, jd[k], side="right")) - 1
+            day = first_day + _dt.timedelta(days=i)
+            bounds = _DayBounds(sunrise_jd[i], sunset_jd[i], sunrise_jd[i + 1], midnight_jd[i])
+        for c, cal in enumerate(cals):
+            starts[c].append(_month_start(float(jd[k]), day, bounds, cal))
+
+    months = idx[lo:hi]
+    out = {}
+    for c, (name, cal) in enumerate(zip(names, cals)):
+        ordinals = np.array([s.toordinal() for s in starts[c]])
+        days = start.toordinal() + np.arange(n)
+        # a month whose first day is still ahead leaves the previous month in force;
+        # the series always begins >= 1 day after the first ingress, so k >= 0
+        pos = np.searchsorted(ordinals, days, side="right") - 1
+        rows = []
+        for d, k in zip(days, pos):
+            m = int(months[k])
+            row = {"month": cal.months[m], "day": int(d - ordinals[k]) + 1}
+            year = _era_year(cal, starts[c][k], m)
+            if year is not None:
+                row["year"] = year
+                row["era"] = cal.era[0]
+            rows.append(row)
+        out[name] = rows
+    return out
+
+def solar_dates_for_range(start, end, lat: float, lon: float, tz: Optional[str] = None,
+                          ayanamsa: str = DEFAULT_AYANAMSA,
+                          calendars: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
+    """solar_dates() with its own sunrise series (for callers without one)."""
+    from panchang_range import _day_starts, local_offsets, sunrise_sunset_series
+    d0, d1 = parse_date(start), parse_date(end)
+    n = (d1 - d0).days + 1
+    sunrise, sunset = sunrise_sunset_series(d0 - _dt.timedelta(days=1), n + 2, lat, lon, tz)
+    midnight = _day_starts(d0, local_offsets(d0, n + 2, lon, tz)).tt
+    return solar_dates(d0, sunrise, sunset, midnight, lat, lon, tz, ayanamsa, calendars)
+
+# -------------------------
+# Sankranti festivals
+# -------------------------
+MAKARA = 9  # sign index of Makara (Capricorn), Mesha = 0
+
+def sankranti_day(sign: int, year: int, lat: float, lon: float, tz: Optional[str] = None,
+                  ayanamsa: str = DEFAULT_AYANAMSA) -> Optional[_dt.date]:
+    """
+    Local date on which the sun's sidereal ingress into `sign` during `year`
+    is observed: the day of the ingress, or the next day when it falls after
+    sunset (the same cutoff as the Tamil month start). None outside the index.
+    """
+    jd, idx = _ingress_series(ayanamsa)
+    from panchang3 import TS
+    lo, hi = TS.utc(year, 1, 1).tt, TS.utc(year + 1, 1, 1).tt
+    k = np.flatnonzero((idx == sign) & (jd >= lo) & (jd < hi))
+    if not len(k):
+        return None
+    day, bounds = _ingress_day(float(jd[k[0]]), lat, lon, tz)
+    return _month_start(float(jd[k[0]]), day, bounds, SOLAR_CALENDARS["tamil"])
+
+# -------------------------
+# CLI test
+# -------------------------
+if __name__ == "__main__":
+    import time
+    t = time.perf_counter()
+    res = solar_dates_for_range("2025-04-10", "2025-04-20", 13.08, 80.27, "Asia/Kolkata")
+    print(f"{time.perf_counter() - t:.3f}s")
+    for i, day in enumerate(range(11)):
+        print(_dt.date(2025, 4, 10 + i), {c: (r[i]["month"], r[i]["day"]) for c, r in res.items()})
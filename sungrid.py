@@ -0,0 +1,199 @@
+# sungrid.py
+"""
+Sunrise and sunset interpolated from a grid of nodes.
+
+Nearby coordinates (users a few hundred metres apart) each need their own
+sunrise search. In grid mode the search runs only at grid nodes, once per
+node and aligned block of BLOCK_DAYS dates (so the overlapping windows of
+consecutive days, months and batches share them), and a coordinate gets its
+sunrise and sunset by bilinear interpolation between the four corners of its
+cell.
+
+Every cell also has check points, the midpoints of its edges and its centre,
+computed exactly like the corners (they are the nodes of the half-step grid,
+so neighbouring cells share them). For a smooth function the bilinear error
+is dominated by its second-order term, which peaks at edge midpoints and the
+centre when the second derivatives are nearly constant over the cell, so
+SAFETY x the largest error seen there is an estimated bound for the whole
+cell. It is an estimate, not a guarantee: curvature that varies within the
+cell can exceed it. A day falls back to the exact search when the estimate
+exceeds the allowed maximum (high latitudes near solstices) or when a
+corner or check point had no sunrise or sunset (polar day/night).
+
+A cell is only worth interpolating once its nodes are cached: a cold cell
+needs nine node searches where the exact search at the location is one. So
+a request whose cell is cold uses the exact search, and for windows of at
+most WARM_MAX_DAYS (single days, batches; not months or exports) the cell's
+nodes are computed on a background thread for the requests that follow.
+warm() computes them synchronously.
+
+Longitudes are evaluated at the interpolated sunrise, so a sunrise error
+matters only where it changes a limb; callers check near_limb_boundary()
+and recompute only those days exactly (panchang_range.sunrise_sunset_days).
+"""
+
+import datetime as _dt
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+import cache
+import config
+
+SAFETY = 1.5
+# node series are computed and cached per block of this many dates, aligned on the ordinal
+BLOCK_DAYS = 8
+# cold cells of longer windows are not warmed in the background
+WARM_MAX_DAYS = 16
+# cells queued for background warming at most
+WARM_MAX_PENDING = 64
+
+# fastest change of each limb's running value (degrees/day): the moon's
+# speed (at most about 15.4 deg/day) plus the sun's for yoga
+LIMB_RATES = {"tithi": 15.5, "nakshatra": 15.5, "yoga": 16.5, "karana": 15.5}
+
+# (half-step lat index, half-step lon index, step, tz, ordinal // BLOCK_DAYS)
+#   -> (sunrise, sunset, sunrise found, sunset found) of that block's dates
+NODES = cache.LRUCache(config.SUNRISE_GRID_CACHE)
+
+# corners, then the check points (edge midpoints and centre), as (lat, lon)
+# offsets in half steps from the cell's south-west corner
+CORNERS = ((0, 0), (2, 0), (0, 2), (2, 2))
+CHECKS = ((1, 0), (1, 2), (0, 1), (2, 1), (1, 1))
+
+def _node_block(ki: int, kj: int, step: float, block: int, tz: Optional[str]) -> Tuple[np.ndarray, ...]:
+    from location_context import LocationContext
+    from panchang_range import sunrise_sunset_found
+    key = (ki, kj, step, tz, block)
+    cached = NODES.get(key)
+    if cached is None:
+        lat, lon = ki * step / 2.0, kj * step / 2.0
+        # a node is searched once per block, so its context is not pooled
+        start = _dt.date.fromordinal(block * BLOCK_DAYS)
+        cached = sunrise_sunset_found(start, BLOCK_DAYS, lat, lon, tz, LocationContext(lat, lon, tz))
+        NODES.put(key, cached)
+    return cached
+
+def _node_series(ki: int, kj: int, step: float, start: _dt.date, n_days: int,
+                 tz: Optional[str]) -> Tuple[np.ndarray, ...]:
+    """A node's (sunrise, sunset, found, found) for n_days dates from start, cut from its blocks."""
+    first = start.toordinal()
+    b0, b1 = first // BLOCK_DAYS, (first + n_days - 1) // BLOCK_DAYS
+    blocks = [_node_block(ki, kj, step, b, tz) for b in range(b0, b1 + 1)]
+    off = first - b0 * BLOCK_DAYS
+    if len(blocks) == 1:
+        return tuple(a[off:off + n_days] for a in blocks[0])
+    return tuple(np.concatenate(parts)[off:off + n_days] for parts in zip(*blocks))
+
+def _cell(start: _dt.date, n_days: int, lat: float, lon: float, step: float) -> Optional[Tuple]:
+    """(i0, j0, first block, last block) of a location's cell; None off the grid."""
+    i0 = math.floor(lat / step) if step > 0 else 0
+    j0 = math.floor(lon / step) if step > 0 else 0
+    if step <= 0 or (i0 + 1) * step > 90.0 or i0 * step < -90.0:
+        return None
+    first = start.toordinal()
+    return i0, j0, first // BLOCK_DAYS, (first + n_days - 1) // BLOCK_DAYS
+
+def _is_warm(i0: int, j0: int, b0: int, b1: int, step: float, tz: Optional[str]) -> bool:
+    return all((2 * i0 + a, 2 * j0 + b, step, tz, blk) in NODES
+               for a, b in CORNERS + CHECKS for blk in range(b0, b1 + 1))
+
+def warm(start: _dt.date, n_days: int, lat: float, lon: float, tz: Optional[str] = None,
+         step: float = config.SUNRISE_GRID_DEG) -> None:
+    """Compute (if missing) the node blocks the cell of (lat, lon) needs for the window."""
+    cell = _cell(start, n_days, lat, lon, step)
+    if cell is None:
+        return
+    i0, j0, b0, b1 = cell
+    for a, b in CORNERS + CHECKS:
+        for blk in range(b0, b1 + 1):
+            _node_block(2 * i0 + a, 2 * j0 + b, step, blk, tz)
+
+_warm_lock = threading.Lock()
+_warm_pending: set = set()
+_warmer: Optional[ThreadPoolExecutor] = None
+
+def _warm_later(start: _dt.date, n_days: int, lat: float, lon: float, tz: Optional[str],
+                step: float, cell: Tuple) -> None:
+    global _warmer
+    key = (cell, step, tz)
+    with _warm_lock:
+        if key in _warm_pending or len(_warm_pending) >= WARM_MAX_PENDING:
+            return
+        _warm_pending.add(key)
+        if _warmer is None:
+            _warmer = ThreadPoolExecutor(1, thread_name_prefix="sungrid-warm")
+
+    def task():
+        try:
+            warm(start, n_days, lat, lon, tz, step)
+        finally:
+            with _warm_lock:
+                _warm_pending.discard(key)
+    _warmer.submit(task)
+
+def wait_warm() -> None:
+    """Block until the cells queued for background warming are done."""
+    with _warm_lock:
+        warmer = _warmer
+    if warmer is not None:
+        warmer.submit(lambda: None).result()
+
+def _bilinear(f: Dict[Tuple[int, int], np.ndarray], u: float, v: float) -> np.ndarray:
+    f00, f20, f02, f22 = (f[c] for c in CORNERS)
+    # interpolate offsets from one corner: Julian dates lose precision when weighted directly
+    return f00 + (u * (1 - v) * (f20 - f00) + (1 - u) * v * (f02 - f00) + u * v * (f22 - f00))
+
+def sunrise_sunset_series(start: _dt.date, n_days: int, lat: float, lon: float,
+                          tz: Optional[str] = None, step: float = config.SUNRISE_GRID_DEG,
+                          max_error_s: float = config.SUNRISE_GRID_MAX_ERROR_S
+                          ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    panchang_range.sunrise_sunset_series from the grid, plus the estimated error
+    bound (seconds) of each day's sunrise and sunset; 0 where the exact search was used
+    (off the grid, or a cold cell).
+    """
+    from panchang_range import sunrise_sunset_days, sunrise_sunset_series as exact_series
+    cell = _cell(start, n_days, lat, lon, step)
+    if cell is None or not _is_warm(*cell, step, tz):
+        if cell is not None and n_days <= WARM_MAX_DAYS:
+            _warm_later(start, n_days, lat, lon, tz, step, cell)
+        sunrise, sunset = exact_series(start, n_days, lat, lon, tz)
+        return sunrise, sunset, np.zeros(n_days)
+    i0, j0 = cell[0], cell[1]
+    u = lat / step - i0
+    v = lon / step - j0
+
+    rise, sets, ok = {}, {}, np.ones(n_days, dtype=bool)
+    for a, b in CORNERS + CHECKS:
+        r, s, r_ok, s_ok = _node_series(2 * i0 + a, 2 * j0 + b, step, start, n_days, tz)
+        rise[a, b], sets[a, b] = r, s
+        ok &= r_ok & s_ok
+
+    bound = np.zeros(n_days)
+    for f in (rise, sets):
+        for a, b in CHECKS:
+            err = np.abs(_bilinear(f, a / 2.0, b / 2.0) - f[a, b]) * 86400.0
+            bound = np.maximum(bound, err)
+    bound = SAFETY * bound
+
+    sunrise = _bilinear(rise, u, v)
+    sunset = _bilinear(sets, u, v)
+    exact = np.nonzero(~ok | (bound > max_error_s))[0]
+    if len(exact):
+        sunrise[exact], sunset[exact] = sunrise_sunset_days(start, exact, lat, lon, tz)
+        bound[exact] = 0.0
+    return sunrise, sunset, bound
+
+def near_limb_boundary(values: Dict[str, np.ndarray], bound_s: np.ndarray) -> np.ndarray:
+    """Days whose limbs (panchang3.limb_values at sunrise) could change within bound_s of sunrise."""
+    from panchang3 import LIMB_SPANS
+    near = np.zeros(len(bound_s), dtype=bool)
+    for limb, span in LIMB_SPANS.items():
+        margin = LIMB_RATES[limb] * bound_s / 86400.0
+        pos = np.asarray(values[limb]) % span
+        near |= (pos < margin) | (span - pos < margin)
+    return near & (bound_s > 0)
@@ -0,0 +1,33 @@
+# tests/test_festivals.py
+"""
+Festival dates of the range engine (festivals3.py rules on the lunar month
+labels of panchang3.py) for Delhi 2025, checked against published calendars.
+Only festivals whose tithi prevails at sunrise on the observed day are listed.
+"""
+
+from panchang_range import get_panchang_range
+
+DELHI = (28.6139, 77.2090, "Asia/Kolkata")
+
+KNOWN_2025 = {
+    "Makar Sankranti": "2025-01-14",
+    "Holi": "2025-03-14",
+    "Ram Navami": "2025-04-06",
+    "Raksha Bandhan": "2025-08-09",
+    "Ganesh Chaturthi": "2025-08-27",
+    "Sharadiya Navratri Begins": "2025-09-22",
+    "Dussehra / Vijayadashami": "2025-10-02",
+    "Karva Chauth": "2025-10-10",
+    "Chhath Puja": "2025-10-27",
+}
+
+def test_known_festival_dates():
+    lat, lon, tz = DELHI
+    rows = get_panchang_range("2025-01-01", "2025-12-31", lat, lon, fields=["core", "festivals"], tz=tz)
+    days = {}
+    for row in rows:
+        for name in row["festivals"]:
+            days.setdefault(name, []).append(row["date"])
+    assert {name: days.get(name) for name in KNOWN_2025} == {name: [d] for name, d in KNOWN_2025.items()}
+    # no festival is observed twice in a year
+    assert all(len(d) == 1 for d in days.values()), days
@@ -0,0 +1,32 @@
+# tests/test_months.py
+"""
+Amanta and purnimanta month views (panchang3.month_views) around known month
+boundaries in 2025, Delhi: the amanta month turns the day after the new moon,
+the purnimanta month the day after the full moon.
+"""
+
+from panchang_range import get_panchang_range
+
+DELHI = (28.6139, 77.2090, "Asia/Kolkata")
+
+# date -> (amanta, purnimanta, paksha)
+KNOWN_2025 = {
+    "2025-01-01": ("Pausha", "Pausha", "Shukla"),
+    "2025-03-14": ("Phalguna", "Phalguna", "Shukla"),     # Phalguna Purnima (Holi)
+    "2025-03-15": ("Phalguna", "Chaitra", "Krishna"),
+    "2025-03-29": ("Phalguna", "Chaitra", "Krishna"),     # Amavasya
+    "2025-03-30": ("Chaitra", "Chaitra", "Shukla"),       # Chaitra Shukla Pratipada
+    "2025-10-08": ("Ashwin", "Kartika", "Krishna"),
+    "2025-10-21": ("Ashwin", "Kartika", "Krishna"),       # Amavasya (Diwali)
+    "2025-10-22": ("Kartika", "Kartika", "Shukla"),
+}
+
+def test_month_boundaries():
+    lat, lon, tz = DELHI
+    for day, (amanta, purnimanta, paksha) in KNOWN_2025.items():
+        row = get_panchang_range(day, day, lat, lon, fields=["lunar_month", "months"], tz=tz)[0]
+        months = row["months"]
+        assert months["amanta"] == {"month": amanta, "paksha": paksha}, day
+        assert months["purnimanta"] == {"month": purnimanta, "paksha": paksha}, day
+        assert row["lunar_month_amanta"] == amanta, day
+        assert row["lunar_month_purnimanta"] == purnimanta, day
@@ -0,0 +1,17 @@
+# tests/test_precision.py
+"""
+Every precision tier within its error and latency budgets (precision.py) on
+a slice of the golden corpus. Slower machines can stretch the latency
+budgets with PANCHANG_TEST_LATENCY_SCALE.
+"""
+
+import os
+
+import precision
+from bench.precision import run
+
+def test_tiers_within_budget():
+    scale = float(os.environ.get("PANCHANG_TEST_LATENCY_SCALE", "1"))
+    report = run(precision.names(), latency_cases=6, latency_scale=scale, max_cases=12)
+    over = {name: report["tiers"][name]["over_budget"] for name in report["failed"]}
+    assert report["failed"] == [], over
@@ -0,0 +1,191 @@
+# yearpack.py
+"""
+Offline year packs: a whole year of panchang rows for one city, built from a
+single range-engine call and published as a static file.
+
+- A pack is gzip-compressed JSON for one (city, year, month_system), written
+  deterministically (compact JSON, gzip mtime 0), so identical inputs give
+  byte-identical files.
+- File names carry the first 16 hex digits of the content's sha256; a pack URL
+  therefore never changes meaning and can be cached forever. Clients find the
+  current file of each pack through the manifest, which also lists the full
+  hash for verification.
+- PACK_VERSION is bumped whenever the row format or the engine changes its
+  output; packs of other versions are ignored and rebuilt.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import config
+from cities import City, PACK_CITIES, get_city
+
+PACK_VERSION = 5
+PACK_FORMAT = "panchang-year-pack"
+PACK_FIELDS = "core,lunar_month,festivals,transitions"
+MONTH_SYSTEMS = ("amanta", "purnimanta")
+# de421 covers 1900-2050; the range engine also reads a few days either side
+MIN_YEAR, MAX_YEAR = 1900, 2049
+
+MANIFEST_NAME = "manifest.json"
+
+_lock = threading.Lock()
+
+# -------------------------
+# Building
+# -------------------------
+def validate(city: str, year: int, month_system: str) -> City:
+    """Check pack coordinates; raises ValueError."""
+    c = get_city(city)
+    if not MIN_YEAR <= int(year) <= MAX_YEAR:
+        raise ValueError(f"year must be in {MIN_YEAR}..{MAX_YEAR}")
+    if month_system not in MONTH_SYSTEMS:
+        raise ValueError("month_system must be 'amanta' or 'purnimanta'")
+    return c
+
+def build_pack(city: str, year: int, month_system: str = "purnimanta") -> bytes:
+    """Compressed pack bytes for one city-year (one range computation)."""
+    from panchang_range import get_panchang_range
+    c = validate(city, year, month_system)
+    rows = get_panchang_range(f"{year}-01-01", f"{year}-12-31", c.lat, c.lon,
+                              month_system=month_system, fields=PACK_FIELDS, tz=c.tz)
+    doc = {
+        "format": PACK_FORMAT,
+        "version": PACK_VERSION,
+        "city": c._asdict(),
+        "year": int(year),
+        "month_system": month_system,
+        "fields": PACK_FIELDS.split(","),
+        "days": rows,
+    }
+    raw = json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return gzip.compress(raw, compresslevel=9, mtime=0)
+
+def read_pack(path: str) -> Dict:
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        return json.load(fh)
+
+# -------------------------
+# Store and manifest
+# -------------------------
+def _key(city: str, year: int, month_system: str) -> str:
+    return f"{city}/{int(year)}/{month_system}"
+
+def pack_path(file_name: str) -> str:
+    return os.path.join(config.PACKS_DIR, file_name)
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+def _load_manifest() -> Dict:
+    try:
+        with open(pack_path(MANIFEST_NAME)) as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get("version") != PACK_VERSION:
+        manifest = {"format": PACK_FORMAT, "version": PACK_VERSION, "packs": {}}
+    return manifest
+
+def manifest() -> Dict:
+    """Current manifest: {"version", "packs": {"city/year/system": entry}}."""
+    with _lock:
+        return _load_manifest()
+
+def find_pack(city: str, year: int, month_system: str) -> Optional[Dict]:
+    entry = manifest()["packs"].get(_key(city, year, month_system))
+    if entry is None or not os.path.exists(pack_path(entry["file"])):
+        return None
+    return entry
+
+def ensure_pack(city: str, year: int, month_system: str = "purnimanta", rebuild: bool = False) -> Dict:
+    """Manifest entry of a pack, building and publishing it if needed."""
+    c = validate(city, year, month_system)
+    if not rebuild:
+        entry = find_pack(c.slug, year, month_system)
+        if entry is not None:
+            return entry
+
+    data = build_pack(c.slug, year, month_system)
+    sha = hashlib.sha256(data).hexdigest()
+    entry = {
+        "city": c.slug,
+        "year": int(year),
+        "month_system": month_system,
+        "file": f"{c.slug}-{int(year)}-{month_system}.{sha[:16]}.json.gz",
+        "sha256": sha,
+        "bytes": len(data),
+    }
+    os.makedirs(config.PACKS_DIR, exist_ok=True)
+    with _lock:
+        path = pack_path(entry["file"])
+        if not os.path.exists(path):
+            _write_atomic(path, data)
+        m = _load_manifest()
+        m["packs"][_key(c.slug, year, month_system)] = entry
+        _write_atomic(pack_path(MANIFEST_NAME),
+                      json.dumps(m, indent=1, sort_keys=True).encode("utf-8"))
+    return entry
+
+def prune() -> List[str]:
+    """
+    Delete pack files no longer listed in the manifest. Superseded files are
+    kept until this runs, so clients holding an older manifest can finish.
+    """
+    with _lock:
+        listed = {e["file"] for e in _load_manifest()["packs"].values()}
+        removed = []
+        for name in os.listdir(config.PACKS_DIR) if os.path.isdir(config.PACKS_DIR) else []:
+            if name.endswith(".json.gz") and name not in listed:
+                os.remove(pack_path(name))
+                removed.append(name)
+    return removed
+
+def is_published(file_name: str) -> bool:
+    """True for pack files listed in the current manifest (and only those)."""
+    return any(e["file"] == file_name for e in manifest()["packs"].values())
+
+def build_many(cities: Iterable[str], years: Iterable[int],
+               month_systems: Iterable[str] = ("purnimanta",), rebuild: bool = False) -> List[Dict]:
+    out = []
+    for city in cities:
+        for year in years:
+            for ms in month_systems:
+                out.append(ensure_pack(city, year, ms, rebuild=rebuild))
+    return out
+
+# -------------------------
+# CLI
+# -------------------------
+def _parse_years(spec: str) -> List[int]:
+    if "-" in spec:
+        a, b = spec.split("-", 1)
+        return list(range(int(a), int(b) + 1))
+    return [int(y) for y in spec.split(",")]
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    ap = argparse.ArgumentParser(description="Build offline year packs into PANCHANG_PACKS_DIR.")
+    ap.add_argument("--cities", default="delhi", help="comma separated slugs, or 'all' (cities.PACK_CITIES)")
+    ap.add_argument("--years", required=True, help="e.g. 2025 or 2025-2027 or 2025,2030")
+    ap.add_argument("--month-systems", default="purnimanta", help="amanta,purnimanta")
+    ap.add_argument("--rebuild", action="store_true")
+    ap.add_argument("--prune", action="store_true", help="delete files no longer in the manifest")
+    args = ap.parse_args()
+
+    cities = PACK_CITIES if args.cities == "all" else args.cities.split(",")
+    t = time.perf_counter()
+    entries = build_many(cities, _parse_years(args.years), args.month_systems.split(","), args.rebuild)
+    for e in entries:
+        print(f"{e['file']}  {e['bytes']:>8} B")
+    print(f"{len(entries)} packs in {time.perf_counter() - t:.1f}s -> {config.PACKS_DIR}")
+    if args.prune:
+        print(f"pruned {len(prune())} superseded files")